@@ -28,6 +28,15 @@ except Exception:
     Field = lambda *a, **k: None  # type: ignore
     uvicorn = None  # type: ignore
 
+# Opt-in profiling (REQUEST_PROFILING, SAMPLING_PROFILER, ALLOC_TRACKING): importable
+# when performance-considerations/src is on PYTHONPATH; see its README
+try:
+    import alloc_tracking
+    import request_profiling
+    import sampling_profiler
+except ImportError:
+    alloc_tracking = request_profiling = sampling_profiler = None  # type: ignore
+
 
 class JobRequest(BaseModel):
     dataset: str = Field(..., description="Dataset identifier")
@@ -136,6 +145,10 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=500, detail="PyYAML not installed")
         return PlainTextResponse(yaml.safe_dump(app.openapi(), sort_keys=False), media_type="application/yaml")
 
+    if request_profiling is not None:
+        alloc_tracking.install_from_env(app)
+        sampling_profiler.install_from_env(app)
+        request_profiling.install_from_env(app)
     return app
 
 
@@ -1,26 +1,49 @@
 import os, httpx
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 CATALOG_URL = os.getenv("CATALOG_URL", "http://catalog:8000")
 CART_URL    = os.getenv("CART_URL", "http://cart:8000")
 
-app = FastAPI(title="BFF: Mobile")
+# Separate connect/read deadlines; pool= bounds the wait for a free connection
+TIMEOUT = httpx.Timeout(5.0, connect=1.0, pool=2.0)
+LIMITS  = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# Opt-in profiling (REQUEST_PROFILING, SAMPLING_PROFILER, ALLOC_TRACKING): docker-compose
+# mounts performance-considerations/src on PYTHONPATH; without it these stay off
+try:
+    import alloc_tracking
+    import request_profiling
+    import sampling_profiler
+except ImportError:
+    alloc_tracking = request_profiling = sampling_profiler = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client per process: keep-alive connections are reused across requests
+    app.state.http = httpx.AsyncClient(timeout=TIMEOUT, limits=LIMITS)
+    yield
+    await app.state.http.aclose()
+
+app = FastAPI(title="BFF: Mobile", lifespan=lifespan)
 
 @app.get("/mobile/catalog")
 async def mobile_catalog():
     # Mobile aggregation/formatting: lightweight (names only)
-    async with httpx.AsyncClient() as c:
-        data = (await c.get(f"{CATALOG_URL}/catalog", timeout=5)).json()
+    data = (await app.state.http.get(f"{CATALOG_URL}/catalog")).json()
     return {"items": [{"sku": i["sku"], "name": i["name"]} for i in data["items"]], "client": "mobile"}
 
 @app.get("/mobile/cart")
 async def mobile_cart(user: str = "u1"):
-    async with httpx.AsyncClient() as c:
-        r = await c.get(f"{CART_URL}/cart", params={"user": user}, timeout=5)
-        return r.json()
+    r = await app.state.http.get(f"{CART_URL}/cart", params={"user": user})
+    return r.json()
 
 @app.post("/mobile/cart")
 async def mobile_add_cart(item: dict, user: str = "u1"):
-    async with httpx.AsyncClient() as c:
-        r = await c.post(f"{CART_URL}/cart", params={"user": user}, json=item, timeout=5)
-        return r.json()
+    r = await app.state.http.post(f"{CART_URL}/cart", params={"user": user}, json=item)
+    return r.json()
+
+if request_profiling is not None:
+    alloc_tracking.install_from_env(app)
+    sampling_profiler.install_from_env(app)
+    request_profiling.install_from_env(app)
@@ -1,40 +1,63 @@
 import os, httpx
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 
 CATALOG_URL = os.getenv("CATALOG_URL", "http://catalog:8000")
 CART_URL    = os.getenv("CART_URL", "http://cart:8000")
 CHECKOUT_URL= os.getenv("CHECKOUT_URL", "http://checkout:8000")
 
-app = FastAPI(title="BFF: Web")
+# Separate connect/read deadlines; pool= bounds the wait for a free connection
+TIMEOUT = httpx.Timeout(5.0, connect=1.0, pool=2.0)
+LIMITS  = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# Opt-in profiling (REQUEST_PROFILING, SAMPLING_PROFILER, ALLOC_TRACKING): docker-compose
+# mounts performance-considerations/src on PYTHONPATH; without it these stay off
+try:
+    import alloc_tracking
+    import request_profiling
+    import sampling_profiler
+except ImportError:
+    alloc_tracking = request_profiling = sampling_profiler = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client per process: keep-alive connections are reused across requests
+    app.state.http = httpx.AsyncClient(timeout=TIMEOUT, limits=LIMITS)
+    yield
+    await app.state.http.aclose()
+
+app = FastAPI(title="BFF: Web", lifespan=lifespan)
 
 @app.get("/web/catalog")
 async def web_catalog():
-    async with httpx.AsyncClient() as c:
-        r = await c.get(f"{CATALOG_URL}/catalog", timeout=5)
-        r.raise_for_status()
-        data = r.json()
+    r = await app.state.http.get(f"{CATALOG_URL}/catalog")
+    r.raise_for_status()
+    data = r.json()
     # Web formatting: include count
     return {"count": len(data["items"]), "items": data["items"], "client": "web"}
 
 @app.get("/web/cart")
 async def web_cart(user: str = "u1"):
-    async with httpx.AsyncClient() as c:
-        r = await c.get(f"{CART_URL}/cart", params={"user": user}, timeout=5)
-        r.raise_for_status()
-        return r.json()
+    r = await app.state.http.get(f"{CART_URL}/cart", params={"user": user})
+    r.raise_for_status()
+    return r.json()
 
 @app.post("/web/cart")
 async def web_add_cart(item: dict, user: str = "u1"):
-    async with httpx.AsyncClient() as c:
-        r = await c.post(f"{CART_URL}/cart", params={"user": user}, json=item, timeout=5)
-        r.raise_for_status()
-        return r.json()
+    r = await app.state.http.post(f"{CART_URL}/cart", params={"user": user}, json=item)
+    r.raise_for_status()
+    return r.json()
 
 @app.post("/web/checkout")
 async def web_checkout(user: str = "u1"):
     # aggregate from cart + send to checkout
-    async with httpx.AsyncClient() as c:
-        cart = (await c.get(f"{CART_URL}/cart", params={"user": user}, timeout=5)).json()
-        resp = await c.post(f"{CHECKOUT_URL}/checkout", json={"user": user, "items": cart["items"]}, timeout=5)
-        resp.raise_for_status()
-        return resp.json()
+    c = app.state.http
+    cart = (await c.get(f"{CART_URL}/cart", params={"user": user})).json()
+    resp = await c.post(f"{CHECKOUT_URL}/checkout", json={"user": user, "items": cart["items"]})
+    resp.raise_for_status()
+    return resp.json()
+
+if request_profiling is not None:
+    alloc_tracking.install_from_env(app)
+    sampling_profiler.install_from_env(app)
+    request_profiling.install_from_env(app)
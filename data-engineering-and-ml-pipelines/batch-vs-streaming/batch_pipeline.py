@@ -2,22 +2,47 @@
 
 Run:
   python3 data-engineering-and-ml-pipelines/batch-vs-streaming/batch_pipeline.py
+
+  # Read the typed summary written by ingest_transform.py --format parquet
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/batch_pipeline.py --format parquet
+
+  # Vectorized revenue/count/argmax (numpy, pandas or polars)
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/batch_pipeline.py --engine numpy
+
+  # Incremental: merge only new/appended delta partitions into persisted state
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/ingest_transform.py \
+      --orders day1.jsonl --out data-engineering-and-ml-pipelines/ingestion-and-transformation/output/partitions/day1
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/batch_pipeline.py --incremental
 """
 
 from __future__ import annotations
 
 from datetime import datetime, timezone
 from pathlib import Path
+import argparse
 import json
 import csv
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
 
 ROOT = Path(__file__).resolve().parent
 INGEST_OUT = ROOT.parent / "ingestion-and-transformation" / "output"
 OUT = ROOT / "output"
 OUT.mkdir(parents=True, exist_ok=True)
 
+sys.path.append(str(INGEST_OUT.parent))
+import columnar  # noqa: E402
+import engines  # noqa: E402
+
+SUMMARY_COLUMNS = ["customer_id", "order_count", "total_amount"]
+
 
 def read_customer_summaries(fp: Path):
+    if fp.suffix != ".csv":
+        # Typed columns: no per-row casts, only the needed columns are loaded
+        return columnar.read_rows(fp, SUMMARY_COLUMNS)
     rows = []
     with fp.open(newline="", encoding="utf-8") as f:
         for row in csv.DictReader(f):
@@ -27,17 +52,237 @@ def read_customer_summaries(fp: Path):
     return rows
 
 
+def read_summary_columns(fp: Path) -> Dict[str, Sequence]:
+    """Summary as columns; Arrow/Parquet numeric columns come back as numpy arrays."""
+    if fp.suffix == ".csv":
+        rows = read_customer_summaries(fp)
+        return {name: [r[name] for r in rows] for name in SUMMARY_COLUMNS}
+    table = columnar.read_table(fp, SUMMARY_COLUMNS)
+    return {name: table.column(name).to_numpy() for name in SUMMARY_COLUMNS}
+
+
+def summarize(fp: Path, engine: str = "python") -> Tuple[int, float, Optional[dict]]:
+    """(order_count, total_revenue, top customer row) for the summary file."""
+    if engine == "python":
+        rows = read_customer_summaries(fp)
+        total_revenue = round(engines.fsum([r["total_amount"] for r in rows]), 2)  # as every engine sums
+        order_count = sum(r["order_count"] for r in rows)
+        top_customer = max(rows, key=lambda r: r["total_amount"]) if rows else None
+        return order_count, total_revenue, top_customer
+    cols = read_summary_columns(fp)
+    order_count, revenue, top = engines.get_engine(engine).totals(cols["order_count"], cols["total_amount"])
+    top_customer = None
+    if top is not None:
+        top_customer = {"customer_id": str(cols["customer_id"][top]), "total_amount": float(cols["total_amount"][top])}
+    return order_count, round(revenue, 2), top_customer
+
+
+# --- incremental mode ---
+PARTITIONS = INGEST_OUT / "partitions"
+STATE_DB = OUT / "batch_state.sqlite"
+
+_STATE_SCHEMA = """
+create table if not exists watermark (
+    partition text primary key, offset integer not null, inode integer not null
+);
+create table if not exists customers (
+    customer_id text primary key, order_count integer not null, total_amount real not null
+);
+create index if not exists customers_by_total on customers(total_amount desc);
+create table if not exists totals (
+    id integer primary key check (id = 1), order_count integer not null, revenue real not null
+);
+insert or ignore into totals values (1, 0, 0.0);
+create table if not exists contributions (
+    partition text not null, customer_id text not null, order_count integer not null, total_amount real not null,
+    primary key (partition, customer_id)
+) without rowid;
+"""
+STATE_VERSION = 1  # 1: per-partition contributions, so a rewritten partition can be taken back out
+
+
+def open_state(fp: Path = STATE_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(fp)
+    version = conn.execute("pragma user_version").fetchone()[0]
+    conn.executescript(_STATE_SCHEMA)
+    if version < STATE_VERSION:
+        if conn.execute("select exists (select 1 from watermark)").fetchone()[0]:
+            conn.close()
+            raise RuntimeError(f"{fp} predates per-partition tracking; delete it to rebuild the state")
+        conn.execute(f"pragma user_version = {STATE_VERSION}")
+    return conn
+
+
+def _merge(conn: sqlite3.Connection, key: str, params: List[Tuple[str, int, float]], sign: int = 1) -> None:
+    """Add (``sign=-1``: take back) ``params`` rows of partition ``key`` to the aggregates."""
+    signed = [(cid, sign * n, sign * amount) for cid, n, amount in params]
+    conn.executemany(
+        "insert into customers values (?, ?, ?) on conflict(customer_id) do update set "
+        "order_count = order_count + excluded.order_count, "
+        "total_amount = total_amount + excluded.total_amount",
+        signed,
+    )
+    conn.executemany(
+        "insert into contributions values (?, ?, ?, ?) on conflict(partition, customer_id) do update set "
+        "order_count = order_count + excluded.order_count, "
+        "total_amount = total_amount + excluded.total_amount",
+        [(key, *p) for p in signed],
+    )
+    conn.execute(
+        "update totals set order_count = order_count + ?, revenue = revenue + ?",
+        (sum(p[1] for p in signed), sum(p[2] for p in signed)),
+    )
+
+
+def _take_back(conn: sqlite3.Connection, key: str) -> None:
+    """Remove everything partition ``key`` contributed (it was rewritten and is read again)."""
+    params = conn.execute(
+        "select customer_id, order_count, total_amount from contributions where partition = ?", (key,)
+    ).fetchall()
+    _merge(conn, key, params, sign=-1)
+    conn.execute("delete from contributions where partition = ?", (key,))
+    conn.execute("delete from customers where order_count = 0 and abs(total_amount) < 1e-9")
+
+
+def read_delta(fp: Path, offset: int) -> Tuple[List[dict], int]:
+    """Complete CSV rows after byte ``offset`` and the offset just past them.
+
+    A trailing line without a newline is still being written and is left
+    for the next run.
+    """
+    with fp.open("rb") as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    fieldnames = next(csv.reader([header.decode("utf-8")]))
+    text = data[:end].decode("utf-8").splitlines()
+    rows = list(csv.DictReader(text, fieldnames=fieldnames))
+    return rows, max(offset, len(header)) + end
+
+
+def run_incremental(
+    input_dir: Path = PARTITIONS, pattern: str = "*/customer_order_summary.csv", state_db: Path = STATE_DB
+) -> dict:
+    """Merge delta partitions added or appended since the last run into the state.
+
+    Each partition is a CSV with the summary columns holding only new orders
+    (e.g. ``ingest_transform.py --orders <new batch> --out partitions/<name>``).
+    The watermark is a byte offset per partition, committed in the same
+    SQLite transaction as the merged aggregates, so a crash never applies a
+    delta twice. Work per run is proportional to the new rows; the top
+    customer comes from an index rather than a scan.
+
+    A partition whose file was replaced (another inode, as the pipeline's
+    writers produce with a temp file and ``os.replace``) or truncated is a
+    rewrite: what it contributed before is subtracted and it is read again
+    from the start.
+    """
+    t0 = time.perf_counter()
+    conn = open_state(state_db)
+    marks = {p: (off, ino) for p, off, ino in conn.execute("select partition, offset, inode from watermark")}
+    delta_rows = 0
+    partitions = 0
+    with conn:  # one transaction: aggregates and watermark move together
+        for fp in sorted(input_dir.glob(pattern)):
+            key = fp.relative_to(input_dir).as_posix()
+            st = fp.stat()
+            offset, inode = marks.get(key, (0, st.st_ino))
+            if inode != st.st_ino or st.st_size < offset:
+                print(f"[info] {key} was rewritten; re-aggregating it")
+                _take_back(conn, key)
+                offset = 0
+            elif st.st_size == offset:
+                continue
+            rows, new_offset = read_delta(fp, offset)
+            params = [
+                (
+                    r["customer_id"],
+                    int(r["order_count"]) if r.get("order_count") else 0,
+                    float(r["total_amount"]) if r.get("total_amount") else 0.0,
+                )
+                for r in rows
+            ]
+            _merge(conn, key, params)
+            conn.execute(
+                "insert or replace into watermark values (?, ?, ?)", (key, new_offset, st.st_ino)
+            )
+            delta_rows += len(rows)
+            partitions += 1
+    order_count, revenue = conn.execute("select order_count, revenue from totals").fetchone()
+    top = conn.execute(
+        "select customer_id, total_amount from customers order by total_amount desc limit 1"
+    ).fetchone()
+    conn.close()
+    return {
+        "order_count": order_count,
+        "total_revenue": round(revenue, 2),
+        "top_customer": {
+            "customer_id": top[0] if top else None,
+            "total_amount": round(top[1], 2) if top else None,
+        },
+        "delta": {"partitions": partitions, "rows": delta_rows, "seconds": round(time.perf_counter() - t0, 4)},
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Summarize the ingestion outputs into a timestamped JSON.")
+    parser.add_argument(
+        "--format",
+        choices=list(columnar.FORMATS),
+        default="csv",
+        help="Which customer_order_summary file to read (parquet/arrow need pyarrow)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=list(engines.ENGINES),
+        default=engines.default_engine(),
+        help="Backend for the revenue/count/top-customer step (default: $PIPELINE_ENGINE or python)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Merge only new delta partitions into output/batch_state.sqlite and summarize the state",
+    )
+    parser.add_argument("--input-dir", type=Path, default=PARTITIONS, help="Delta partitions (--incremental)")
+    parser.add_argument(
+        "--pattern",
+        default="*/customer_order_summary.csv",
+        help="Glob for partitions under --input-dir (--incremental)",
+    )
+    return parser.parse_args()
+
+
 def main() -> None:
-    summary_fp = INGEST_OUT / "customer_order_summary.csv"
+    args = parse_args()
+    if args.incremental:
+        try:
+            merged = run_incremental(args.input_dir, args.pattern)
+        except RuntimeError as exc:  # state from an older version
+            raise SystemExit(str(exc))
+        dt = datetime.now(timezone.utc)
+        payload = {
+            "generated_at": dt.isoformat().replace("+00:00", "Z"),
+            **merged,
+            "source": str(args.input_dir / args.pattern),
+        }
+        out_fp = OUT / f"batch_summary_{dt.strftime('%Y%m%dT%H%M%SZ')}.json"
+        out_fp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        delta = payload["delta"]
+        print(f"Merged {delta['rows']} rows from {delta['partitions']} partitions in {delta['seconds']}s")
+        print(f"Wrote batch summary → {out_fp}")
+        return
+
+    summary_fp = columnar.output_path(INGEST_OUT, "customer_order_summary", args.format)
     if not summary_fp.exists():
         raise SystemExit(
             "Missing ingestion outputs. Run ingest_transform.py first (see README)."
         )
 
-    rows = read_customer_summaries(summary_fp)
-    total_revenue = round(sum(r["total_amount"] for r in rows), 2)
-    order_count = sum(r["order_count"] for r in rows)
-    top_customer = max(rows, key=lambda r: r["total_amount"]) if rows else None
+    try:
+        order_count, total_revenue, top_customer = summarize(summary_fp, args.engine)
+    except (RuntimeError, ValueError) as exc:  # engine library not installed, unknown $PIPELINE_ENGINE
+        raise SystemExit(str(exc))
 
     dt = datetime.now(timezone.utc)
     payload = {
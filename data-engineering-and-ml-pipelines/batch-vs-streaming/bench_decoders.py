@@ -0,0 +1,95 @@
+"""Benchmark the JSON decoders (decoders.py) on a large JSON Lines file.
+
+Writes ``--events`` synthetic events (10M by default, ~0.8GB) with
+bench_streaming.generate, then for each installed decoder measures:
+
+  - decode: bytes batches from iter_line_batches through ``decode_lines``
+  - pipeline: process_appended end to end (bench_streaming.run_file:
+    decode + aggregate, none sink)
+
+The pipeline results must be identical for every decoder. The old path,
+``json.loads`` per text line, is the baseline for the speed-ups.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/bench_decoders.py
+  python3 .../bench_decoders.py --events 1000000 --decoders json msgspec
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from bench_streaming import generate, run_file
+from streaming_pipeline import MetricsFlusher, NullSink, iter_line_batches, new_state
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ingestion-and-transformation"))
+import decoders  # noqa: E402
+
+
+def per_line_rate(fp: Path) -> float:
+    """Events/sec of the old decode: one json.loads per text line."""
+    t0 = time.perf_counter()
+    n = 0
+    with fp.open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                json.loads(line)
+                n += 1
+    return n / (time.perf_counter() - t0)
+
+
+def decode_rate(fp: Path, decoder) -> float:
+    t0 = time.perf_counter()
+    n = sum(len(decoder.decode_lines(data)) for _, data in iter_line_batches(fp))
+    return n / (time.perf_counter() - t0)
+
+
+def pipeline_rate(fp: Path, decoder) -> Dict:
+    state = new_state()
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        n = run_file(fp, state, MetricsFlusher(NullSink()), decoder)
+    return {"rate": n / (time.perf_counter() - t0), "state": state}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--decoders", nargs="+", choices=list(decoders.DECODERS), default=decoders.available(),
+                        help="Decoders to compare (default: all installed)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        fp = Path(tmp) / "events.jsonl"
+        generate(fp, args.events)
+        print(f"{args.events:,} events, {fp.stat().st_size / 1e6:.0f}MB")
+        base = per_line_rate(fp)
+        print(f"{'decoder':<24} {'decode/s':>12} {'pipeline/s':>12} {'vs per-line':>12}  same result")
+        print(f"{'json.loads per line':<24} {base:>12,.0f} {'':>12} {1:>11.1f}x")
+        reference = None
+        for name in args.decoders:
+            try:
+                decoder = decoders.get_decoder(name)
+            except RuntimeError as exc:
+                print(f"{name:<24} skipped: {exc}")
+                continue
+            rate = decode_rate(fp, decoder)
+            r = pipeline_rate(fp, decoder)
+            reference = reference or r["state"]
+            same = "yes" if r["state"] == reference else "NO"
+            print(f"{name:<24} {rate:>12,.0f} {r['rate']:>12,.0f} {rate / base:>11.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark the binary event log (event_log.py) against JSON Lines.
+
+Writes ``--events`` synthetic events as JSONL (bench_streaming.generate),
+converts them to ``.evb`` and reports file sizes and conversion rates.
+Then it measures parse-and-aggregate events/sec into the streaming state
+(best of ``--repeat``):
+
+  - JSONL through process_appended (bench_streaming.run_file) with each installed decoder
+  - .evb through EventLog.aggregate on the ``struct`` and ``numpy`` engines
+  - .evb to event dicts (EventLog.events), what windowing pays on top
+
+Every path must produce the same state.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/bench_event_log.py
+  python3 .../bench_event_log.py --events 10000000
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Tuple
+
+from bench_streaming import generate, run_file
+from convert_events import binary_to_jsonl, jsonl_to_binary
+from event_log import EventLog
+from streaming_pipeline import MetricsFlusher, NullSink, new_state
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ingestion-and-transformation"))
+import decoders  # noqa: E402
+
+
+def jsonl_run(fp: Path, decoder) -> Tuple[int, Dict]:
+    state = new_state()
+    with contextlib.redirect_stdout(io.StringIO()):
+        n = run_file(fp, state, MetricsFlusher(NullSink()), decoder)
+    return n, state
+
+
+def binary_run(fp: Path, engine: str) -> Tuple[int, Dict]:
+    state = new_state()
+    n = 0
+    with EventLog(fp, engine) as log:
+        for _, _, records in log.batches():
+            n += log.aggregate(records, state)
+    return n, state
+
+
+def events_run(fp: Path, engine: str) -> Tuple[int, Dict]:
+    n = 0
+    with EventLog(fp, engine) as log:
+        for _, _, records in log.batches():
+            n += len(log.events(records))
+    return n, {}
+
+
+def best_rate(run: Callable[[], Tuple[int, Dict]], repeat: int) -> Tuple[float, Dict]:
+    best = 0.0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n, state = run()
+        best = max(best, n / (time.perf_counter() - t0))
+    return best, state
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmpdir = Path(tmp)
+        src, evb, back = tmpdir / "events.jsonl", tmpdir / "events.evb", tmpdir / "back.jsonl"
+        generate(src, args.events)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            jsonl_to_binary(src, evb, decoders.get_decoder())
+        to_binary = args.events / (time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        binary_to_jsonl(evb, back)
+        to_jsonl = args.events / (time.perf_counter() - t0)
+        print(f"{args.events:,} events: JSONL {src.stat().st_size / 1e6:.0f}MB, "
+              f".evb {evb.stat().st_size / 1e6:.0f}MB ({src.stat().st_size / evb.stat().st_size:.1f}x smaller)")
+        print(f"convert: JSONL -> .evb {to_binary:,.0f} events/s, .evb -> JSONL {to_jsonl:,.0f} events/s\n")
+
+        runs = {f"jsonl, {name}": (lambda name=name: jsonl_run(src, decoders.get_decoder(name)))
+                for name in decoders.available()}
+        with EventLog(evb) as log:
+            engines = ["struct"] + (["numpy"] if log.engine == "numpy" else [])
+        for engine in engines:
+            runs[f"evb, {engine}"] = lambda engine=engine: binary_run(evb, engine)
+        for engine in engines:
+            runs[f"evb, {engine} -> dicts"] = lambda engine=engine: events_run(evb, engine)
+        print(f"{'path':<28} {'events/s':>12} {'vs json':>8}  same result")
+        reference = base = None
+        for label, run in runs.items():
+            rate, state = best_rate(run, args.repeat)
+            base = base or rate
+            same = "-"
+            if state:
+                reference = reference or state
+                same = "yes" if state == reference else "NO"
+            print(f"{label:<28} {rate:>12,.0f} {rate / base:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Benchmark streaming_pipeline parse-and-aggregate throughput.
+
+Writes synthetic JSONL events to a temp file and runs it through
+process_appended (``run_file``) with each sink. It then compares against
+the old per-event path: one json.loads per line plus a metrics file
+rewrite after every event, with the sleep removed. That path is measured on a small sample and extrapolated.
+
+Checkpoint overhead: the same file through the checkpointed path
+(tail_follow + checkpoint.CheckpointStore), with a state + offsets
+checkpoint every N events (taken at batch boundaries, ~1MB of input, so a
+small N means one checkpoint per batch). Best of ``--repeat`` runs.
+
+Windowing cost: the same path with windows.WindowEngine (per-minute and
+per-hour tumbling, 5-minute sliding, customer sessions) on the events'
+timestamps.
+
+Multi-file: ``--files`` files of events over the same time span, consumed
+serially and by ParallelConsumer for each ``--workers`` count, unordered
+and with the event-time merge. Results must match across worker counts.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/bench_streaming.py
+  python3 .../bench_streaming.py --events 5000000
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from checkpoint import CheckpointSink, CheckpointStore
+from streaming_pipeline import (
+    JsonFileSink,
+    MetricsFlusher,
+    NullSink,
+    ParallelConsumer,
+    StdoutSink,
+    new_state,
+    process_appended,
+    write_metrics,
+)
+from tail_follow import DirectoryTail, OffsetStore
+from windows import WindowEngine
+
+EVENT_TYPES = ["order_placed", "order_placed", "order_refund", "page_view"]
+
+
+def generate(fp: Path, n: int, seed: int = 7, rate: float = 50.0) -> None:
+    """``n`` events at ``rate`` events/s of event time, up to 30s out of order."""
+    rnd = random.Random(seed)
+    t = 1_700_000_000.0
+    with fp.open("w", encoding="utf-8") as f:
+        for _ in range(n):
+            etype = rnd.choice(EVENT_TYPES)
+            amount = round(rnd.uniform(1, 200), 2) * (-1 if etype == "order_refund" else 1)
+            t += rnd.expovariate(rate)
+            evt = {"event_type": etype, "customer_id": rnd.randint(1, 10_000), "amount": amount,
+                   "ts": round(t - rnd.uniform(0, 30), 3)}
+            f.write(json.dumps(evt, separators=(",", ":")) + "\n")
+
+
+def run_file(fp: Path, state: Dict, flusher: MetricsFlusher, decoder=None) -> int:
+    """Process all of ``fp`` the way the pipeline does, without a checkpoint; returns the events processed."""
+    store = OffsetStore(fp.with_name(f".{fp.name}.offsets"))  # in memory only: never committed
+    tail = DirectoryTail(store)
+    try:
+        n = process_appended(fp, tail, state, flusher, MetricsFlusher(NullSink(), float("inf"), float("inf")),
+                             decoder=decoder)
+    finally:
+        tail.close()
+    flusher.flush(state)
+    return n
+
+
+def legacy_rate(fp: Path, metrics_fp: Path, sample: int = 5_000) -> float:
+    """Events/sec of the old loop: json.loads per line + write_metrics per event."""
+    state = new_state()
+    t0 = time.perf_counter()
+    with fp.open(encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if i == sample:
+                break
+            evt = json.loads(line)
+            etype = evt.get("event_type")
+            amt = float(evt.get("amount", 0) or 0)
+            state["event_count"] += 1
+            state["last_event"] = etype
+            if etype == "order_placed":
+                state["orders"] += 1
+                state["revenue"] += amt
+            elif etype == "order_refund":
+                state["refunds"] += 1
+                state["revenue"] += amt
+            write_metrics(metrics_fp, state)
+    return sample / (time.perf_counter() - t0)
+
+
+def checkpointed_rate(fp: Path, db: Path, every: Optional[int], windows: Optional[WindowEngine] = None) -> Dict:
+    """Events/sec through process_appended with a checkpoint every ``every`` events (None: never)."""
+    db.unlink(missing_ok=True)
+    store = CheckpointStore(db)
+    operators = (lambda: {"windows": windows.to_dict()}) if windows is not None else None
+    checkpointer = MetricsFlusher(CheckpointSink(store, operators), every or float("inf"), float("inf"))
+    state = new_state()
+    t0 = time.perf_counter()
+    n = process_appended(fp, DirectoryTail(store), state, MetricsFlusher(NullSink()), checkpointer,
+                         windows=windows)
+    elapsed = time.perf_counter() - t0
+    store.close()
+    return {"rate": n / elapsed, "checkpoints": checkpointer.flushes, "state": state}
+
+
+def multi_file_rate(files: List[Path], db: Path, workers: Optional[int], ordered: bool = False) -> Dict:
+    """Events/sec over ``files``: serially (``workers`` None) or on a ParallelConsumer."""
+    db.unlink(missing_ok=True)
+    store = CheckpointStore(db)
+    checkpointer = MetricsFlusher(CheckpointSink(store), float("inf"), float("inf"))
+    flusher = MetricsFlusher(NullSink())
+    state = new_state()
+    consumer = ParallelConsumer(workers, ordered) if workers is not None else None
+    t0 = time.perf_counter()
+    if consumer is None:
+        tail = DirectoryTail(store)
+        n = sum(process_appended(fp, tail, state, flusher, checkpointer) for fp in files)
+    else:
+        n = consumer.consume(files, store, state, flusher, checkpointer)
+    elapsed = time.perf_counter() - t0
+    if consumer is not None:
+        consumer.close()
+    store.close()
+    return {"rate": n / elapsed, "state": state}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--checkpoint-every", type=int, nargs="+", default=[1_000_000, 100_000, 10_000, 1_000],
+                        help="Checkpoint intervals (events) to compare against no checkpoints")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--files", type=int, default=8, help="Files for the multi-file run (events split across them)")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}),
+                        help="Worker counts for the multi-file run")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmpdir = Path(tmp)
+        fp = tmpdir / "events.jsonl"
+        generate(fp, args.events)
+        metrics_fp = tmpdir / "metrics.json"
+        print(f"{args.events:,} events, {fp.stat().st_size / 1e6:.0f}MB")
+        print(f"{'path':<28} {'events/s':>12} {'flushes':>8}")
+        reference = None
+        sinks = {"batched, none sink": NullSink(), "batched, json sink": JsonFileSink(metrics_fp),
+                 "batched, stdout sink": StdoutSink()}
+        for label, sink in sinks.items():
+            state = new_state()
+            flusher = MetricsFlusher(sink)
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                n = run_file(fp, state, flusher)
+                elapsed = time.perf_counter() - t0
+            reference = reference or state
+            assert state == reference and n == args.events, label
+            print(f"{label:<28} {n / elapsed:>12,.0f} {flusher.flushes:>8}")
+        print(f"{'per-event write (old)':<28} {legacy_rate(fp, metrics_fp):>12,.0f} {'/event':>8}")
+
+        print(f"\n{'checkpoint every':<28} {'events/s':>12} {'ckpts':>8} {'overhead':>9}")
+        base = None
+        checkpointed_rate(fp, tmpdir / "checkpoint.sqlite", None)  # warm-up
+        for every in [None, *args.checkpoint_every]:
+            r = max((checkpointed_rate(fp, tmpdir / "checkpoint.sqlite", every) for _ in range(args.repeat)),
+                    key=lambda r: r["rate"])
+            assert r["state"] == reference, every
+            base = base or r["rate"]
+            label = f"{every:,} events" if every else "never"
+            print(f"{label:<28} {r['rate']:>12,.0f} {r['checkpoints']:>8} {base / r['rate'] - 1:>9.1%}")
+
+        windows = WindowEngine()
+        r = checkpointed_rate(fp, tmpdir / "checkpoint.sqlite", None, windows)
+        print(f"{'+ windows (4 operators)':<28} {r['rate']:>12,.0f} {'':>8} {base / r['rate'] - 1:>9.1%}"
+              f"  late={windows.late}")
+
+        files = []
+        for i in range(args.files):
+            files.append(tmpdir / f"burst-{i:03d}.jsonl")
+            generate(files[-1], args.events // args.files, seed=100 + i, rate=50.0 / args.files)
+        print(f"\n{args.files} files{'':<20} {'events/s':>12}  same result")
+        db = tmpdir / "multi.sqlite"
+        r = multi_file_rate(files, db, None)
+        print(f"{'serial':<28} {r['rate']:>12,.0f}")
+        for ordered in (False, True):
+            reference = None
+            for w in args.workers:
+                r = multi_file_rate(files, db, w, ordered)
+                reference = reference or r["state"]
+                label = f"{w} workers{', event-time merge' if ordered else ''}"
+                print(f"{label:<28} {r['rate']:>12,.0f}  {'yes' if r['state'] == reference else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
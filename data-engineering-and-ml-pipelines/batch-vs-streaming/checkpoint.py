@@ -0,0 +1,118 @@
+"""Exactly-once checkpoints for streaming_pipeline: aggregate state + file offsets.
+
+The metrics ``state`` and the byte offset of every followed file (see
+tail_follow.py) are written in one SQLite transaction (WAL journal). After
+a crash the pipeline reloads both and re-reads from the saved offsets, so
+events after the last checkpoint are counted once more and events before
+it are not counted again: each event lands in the state exactly once.
+
+Checkpoints are periodic (every N events or T seconds) through the same
+``MetricsFlusher`` used for metric snapshots, with ``CheckpointSink`` as the
+sink; only offsets that moved since the last checkpoint are written.
+Operator state (e.g. the open windows of windows.py) rides along in the
+same transaction.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import sqlite3
+from typing import Callable, Dict, Optional, Set
+
+from tail_follow import FileId, OffsetStore
+
+_SCHEMA = """
+create table if not exists offsets (
+    file_id text primary key, name text not null, offset integer not null
+);
+create table if not exists state (
+    id integer primary key check (id = 1), body text not null, checkpoints integer not null
+);
+create table if not exists operators (
+    name text primary key, body text not null
+);
+"""
+
+
+class CheckpointStore(OffsetStore):
+    """``OffsetStore`` kept in SQLite, committed together with the aggregate state."""
+
+    def __init__(self, fp: Path) -> None:
+        self.fp = fp
+        self.conn = sqlite3.connect(fp)
+        # WAL: a commit appends to the log instead of rewriting pages; NORMAL
+        # sync can lose the newest checkpoint on power loss but never mixes two
+        self.conn.execute("pragma journal_mode=wal")
+        self.conn.execute("pragma synchronous=normal")
+        self.conn.executescript(_SCHEMA)
+        self.offsets = {
+            fid: {"name": name, "offset": offset}
+            for fid, name, offset in self.conn.execute("select file_id, name, offset from offsets")
+        }
+        row = self.conn.execute("select body, checkpoints from state").fetchone()
+        self.state: Optional[Dict] = json.loads(row[0]) if row else None
+        self.checkpoints = row[1] if row else 0
+        self.operators: Dict[str, Dict] = {
+            name: json.loads(body) for name, body in self.conn.execute("select name, body from operators")
+        }
+        self._dirty: Set[FileId] = set()
+
+    def set(self, fid: FileId, name: str, offset: int) -> None:
+        super().set(fid, name, offset)
+        self._dirty.add(fid)
+
+    def discard(self, fid: FileId) -> None:
+        super().discard(fid)
+        self._dirty.add(fid)
+
+    def prune(self, live: set) -> None:
+        self._dirty.update(fid for fid in self.offsets if fid not in live)
+        super().prune(live)
+
+    def commit(self, state: Optional[Dict] = None, operators: Optional[Dict[str, Dict]] = None) -> None:
+        """Save the moved offsets, ``state`` and ``operators`` (if given) atomically."""
+        with self.conn:
+            for fid in self._dirty:
+                entry = self.offsets.get(fid)
+                if entry is None:
+                    self.conn.execute("delete from offsets where file_id = ?", (fid,))
+                else:
+                    self.conn.execute(
+                        "insert into offsets values (?, ?, ?) "
+                        "on conflict(file_id) do update set name = excluded.name, offset = excluded.offset",
+                        (fid, entry["name"], entry["offset"]),
+                    )
+            if state is not None:
+                self.checkpoints += 1
+                self.conn.execute(
+                    "insert into state values (1, ?, ?) "
+                    "on conflict(id) do update set body = excluded.body, checkpoints = excluded.checkpoints",
+                    (json.dumps(state), self.checkpoints),
+                )
+            for name, body in (operators or {}).items():
+                self.conn.execute(
+                    "insert into operators values (?, ?) on conflict(name) do update set body = excluded.body",
+                    (name, json.dumps(body)),
+                )
+        self._dirty.clear()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class CheckpointSink:
+    """Sink for ``MetricsFlusher``: each flush is a checkpoint."""
+
+    def __init__(self, store: CheckpointStore, operators: Optional[Callable[[], Dict[str, Dict]]] = None) -> None:
+        self.store = store
+        self.operators = operators
+
+    def write(self, state: Dict) -> None:
+        self.store.commit(state, self.operators() if self.operators else None)
+
+
+def reset(fp: Path) -> None:
+    """Drop a checkpoint (and its WAL files) to start from scratch."""
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{fp}{suffix}").unlink(missing_ok=True)
@@ -0,0 +1,97 @@
+"""Convert events between JSON Lines and the binary event log (event_log.py).
+
+The direction follows the suffixes: ``.jsonl`` -> ``.evb`` or ``.evb`` ->
+``.jsonl``. JSON Lines are read in batches with the pipeline's decoder
+(``--decoder``), and each batch becomes one RECS frame. Converting to
+binary keeps only event_type, customer_id (an integer or a string), amount
+and ts (ISO timestamps become epoch seconds), so the streaming results are
+the same for both files: a ts that is not a time is warned about and kept
+out of the windows, and an event the format cannot hold is warned about
+and skipped (see event_log.py). Converting back writes those fields,
+leaving out missing ones and writing such a ts as ``"not a time"``.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/convert_events.py \\
+      data-engineering-and-ml-pipelines/batch-vs-streaming/data/events.jsonl /tmp/events.evb
+  python3 .../convert_events.py /tmp/events.evb /tmp/events.jsonl
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+import event_log
+from event_log import EventLog, EventLogWriter
+from streaming_pipeline import decode_batch, iter_line_batches
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "ingestion-and-transformation"))
+import decoders  # noqa: E402
+
+
+def jsonl_to_binary(src: Path, dst: Path, decoder=None) -> int:
+    """Append the events of ``src`` to the event log ``dst``; returns the count."""
+    n = 0
+    with EventLogWriter(dst) as writer:
+        for lineno, data in iter_line_batches(src):
+            n += writer.write(decode_batch(data, src.name, lineno, decoder))
+    return n
+
+
+def binary_to_jsonl(src: Path, dst: Path) -> int:
+    """Write the events of the event log ``src`` as JSON Lines to ``dst``; returns the count."""
+    n = 0
+    with EventLog(src) as log, dst.open("w", encoding="utf-8") as f:
+        for _, _, records in log.batches():
+            events = log.events(records)
+            for evt in events:
+                if evt.get("ts") == event_log.NOT_A_TIME:
+                    evt["ts"] = "not a time"  # still not a time, and valid JSON
+            f.writelines(json.dumps(evt, separators=(",", ":")) + "\n" for evt in events)
+            n += len(events)
+    return n
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("src", type=Path, help="Input .jsonl or .evb file")
+    parser.add_argument("dst", type=Path, help="Output .evb or .jsonl file (an existing .evb is appended to)")
+    parser.add_argument(
+        "--decoder",
+        choices=decoders.CHOICES,
+        default=decoders.default_decoder(),
+        help="JSON decoder for .jsonl input (default: $PIPELINE_DECODER or auto)",
+    )
+    args = parser.parse_args()
+    to_binary = args.dst.suffix == event_log.SUFFIX
+    if to_binary == (args.src.suffix == event_log.SUFFIX):
+        parser.error(f"convert between .jsonl and {event_log.SUFFIX}: one of src and dst must be {event_log.SUFFIX}")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    t0 = time.perf_counter()
+    if args.dst.suffix == event_log.SUFFIX:
+        try:
+            decoder = decoders.get_decoder(args.decoder)
+        except RuntimeError as exc:
+            raise SystemExit(str(exc))
+        try:
+            n = jsonl_to_binary(args.src, args.dst, decoder)
+        except ValueError as exc:
+            raise SystemExit(f"[convert] {exc}")
+    else:
+        n = binary_to_jsonl(args.src, args.dst)
+    elapsed = time.perf_counter() - t0
+    print(
+        f"[convert] {n:,} events {args.src.name} ({args.src.stat().st_size / 1e6:.1f}MB) -> "
+        f"{args.dst.name} ({args.dst.stat().st_size / 1e6:.1f}MB) in {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Directory watchers for streaming_pipeline: Linux inotify with a polling fallback.
+
+``InotifyWatcher`` asks the kernel for ``IN_CLOSE_WRITE`` (a writer closed
+the file) and ``IN_MOVED_TO`` (a finished file was renamed in), so a file
+is reported as soon as it is complete: no sleep, no directory listing, and
+the cost does not grow with the number of files. Queue overflows
+(``IN_Q_OVERFLOW``, e.g. a burst of 100k+ files) fall back to a single rescan.
+
+``PollingWatcher`` is the original behaviour: list the directory every
+``interval`` and report a file once its size is the same on two polls.
+
+Both report files that already match when the watcher starts, and each file
+at most once per close/rename. With ``follow=True`` (``streaming_pipeline.py
+--follow``) they also report files that grew, were replaced or went away:
+inotify adds ``IN_MODIFY``/``IN_CREATE``/``IN_DELETE``/``IN_MOVED_FROM``, and
+polling reports any change of size or inode without waiting for it to settle.
+
+Run the latency demo (inotify vs polling, files written into a temp dir):
+  python3 data-engineering-and-ml-pipelines/batch-vs-streaming/dir_watch.py --files 1000
+"""
+
+from __future__ import annotations
+
+from fnmatch import fnmatch
+from pathlib import Path
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows, NUL padded)
+
+
+def _libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch  # noqa: B018 - probe symbols
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def _scan(dirpath: Path, pattern: str) -> List[Path]:
+    with os.scandir(dirpath) as it:
+        return sorted(Path(e.path) for e in it if fnmatch(e.name, pattern) and e.is_file())
+
+
+class InotifyWatcher:
+    name = "inotify"
+
+    def __init__(self, dirpath: Path, pattern: str = "*.jsonl", follow: bool = False) -> None:
+        libc = _libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+        self.dirpath = dirpath
+        self.pattern = pattern
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+        if follow:
+            mask |= IN_MODIFY | IN_CREATE | IN_DELETE | IN_MOVED_FROM
+        if libc.inotify_add_watch(self._fd, os.fsencode(dirpath), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, os.strerror(err), str(dirpath))
+        # Files that were complete before the watch started never get an event
+        self._pending: List[Path] = _scan(dirpath, pattern)
+
+    def wait(self, timeout: Optional[float] = None) -> List[Path]:
+        """Block until files are ready (or ``timeout``); returns them in event order."""
+        if self._pending:
+            ready, self._pending = self._pending, []
+            return ready
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return self._drain() if readable else []
+
+    def _drain(self) -> List[Path]:
+        ready: List[Path] = []
+        seen: Set[str] = set()
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(buf):
+                _wd, mask, _cookie, length = _EVENT.unpack_from(buf, pos)
+                name = buf[pos + _EVENT.size: pos + _EVENT.size + length].rstrip(b"\0")
+                pos += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    raise FileNotFoundError(f"watched directory {self.dirpath} went away")
+                elif not mask & IN_ISDIR:
+                    fname = os.fsdecode(name)
+                    if fname not in seen and fnmatch(fname, self.pattern):
+                        seen.add(fname)
+                        ready.append(self.dirpath / fname)
+        if overflow:  # the kernel dropped events: list once instead
+            ready = _scan(self.dirpath, self.pattern)
+        return ready
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "InotifyWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PollingWatcher:
+    name = "poll"
+
+    def __init__(self, dirpath: Path, pattern: str = "*.jsonl", interval: float = 1.0, follow: bool = False) -> None:
+        self.dirpath = dirpath
+        self.pattern = pattern
+        self.interval = interval
+        self.follow = follow
+        self._seen: Dict[str, Tuple[int, int]] = {}  # follow: name -> (inode, size)
+        self._last_sizes: Dict[str, int] = {}
+        self._reported: Dict[str, int] = {}  # name -> size when reported
+        self._first = True
+
+    def wait(self, timeout: Optional[float] = None) -> List[Path]:
+        if not self._first:
+            time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        self._first = False
+        if self.follow:
+            return self._changed()
+        ready = []
+        for fp in _scan(self.dirpath, self.pattern):
+            name = fp.name
+            try:
+                size = fp.stat().st_size
+            except FileNotFoundError:
+                continue  # transient
+            if self._reported.get(name) == size:
+                continue
+            # size stable check across two polls
+            prev = self._last_sizes.get(name)
+            self._last_sizes[name] = size
+            if prev is None or prev != size:
+                continue  # observe it once / still growing, confirm on next pass
+            ready.append(fp)
+            self._reported[name] = size
+            self._last_sizes.pop(name, None)
+        return ready
+
+    def _changed(self) -> List[Path]:
+        current: Dict[str, Tuple[int, int]] = {}
+        for fp in _scan(self.dirpath, self.pattern):
+            try:
+                st = fp.stat()
+            except FileNotFoundError:
+                continue
+            current[fp.name] = (st.st_ino, st.st_size)
+        ready = [self.dirpath / name for name, sig in current.items() if self._seen.get(name) != sig]
+        ready += [self.dirpath / name for name in self._seen if name not in current]
+        self._seen = current
+        return ready
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "PollingWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+BACKENDS = ("auto", "inotify", "poll")
+
+
+def make_watcher(
+    dirpath: Path, pattern: str = "*.jsonl", poll_interval: float = 1.0, backend: str = "auto", follow: bool = False
+):
+    """inotify on Linux, polling elsewhere (or when asked for)."""
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(dirpath, pattern, follow)
+        except OSError:
+            if backend == "inotify":
+                raise
+    return PollingWatcher(dirpath, pattern, poll_interval, follow)
+
+
+def measure_latency(backend: str, files: int, poll_interval: float) -> List[float]:
+    """Seconds from each file's close() to the watcher reporting it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        dirpath = Path(tmp)
+        closed_at: Dict[str, float] = {}
+        reported_at: Dict[str, float] = {}
+        with make_watcher(dirpath, "*.jsonl", poll_interval, backend) as watcher:
+
+            def writer() -> None:
+                for i in range(files):
+                    fp = dirpath / f"events-{i:06d}.jsonl"
+                    with fp.open("w", encoding="utf-8") as f:
+                        f.write('{"event_type":"order_placed","amount":1.0}\n')
+                    closed_at[fp.name] = time.perf_counter()
+                    time.sleep(0.0005)  # spread writes out so latency is per file, not queueing
+
+            t = threading.Thread(target=writer)
+            t.start()
+            deadline = time.monotonic() + 30 + 3 * poll_interval
+            while len(reported_at) < files:
+                ready = watcher.wait(timeout=1.0)
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{backend}: only {len(reported_at)}/{files} files reported")
+                now = time.perf_counter()
+                for fp in ready:
+                    reported_at.setdefault(fp.name, now)
+            t.join()
+        return [reported_at[name] - closed_at[name] for name in closed_at]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure file-ready latency of the directory watchers.")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    args = parser.parse_args()
+    for backend in ("inotify", "poll"):
+        if backend == "inotify" and _libc() is None:
+            print("inotify: not available on this platform")
+            continue
+        files = args.files if backend == "inotify" else min(args.files, 50)
+        t0 = time.perf_counter()
+        lat = sorted(measure_latency(backend, files, args.poll_interval))
+        elapsed = time.perf_counter() - t0
+        p50, p99 = lat[len(lat) // 2], lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+        print(f"{backend:>8}: {files} files in {elapsed:.2f}s, latency p50={p50 * 1e3:.2f}ms p99={p99 * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Binary event log (``.evb``): a compact, length-prefixed alternative to JSONL.
+
+A file is an 8-byte magic followed by frames, each an 8-byte header
+(4-byte kind, uint32 payload length) and its payload:
+
+  - ``TYPE``: one entry of the event_type enum (uint8 id + UTF-8 name),
+    written the first time a type appears, so any event type round-trips
+  - ``CUST``: one string customer id (int64 code + UTF-8 id), written the
+    first time the id appears, so ids like ``"c-17"`` round-trip too
+  - ``RECS``: a batch of fixed 32-byte little-endian records
+
+        ts           float64   epoch seconds, NaN if missing, +inf if not a time
+        customer_id  int64     the id, a CUST code if id_kind is 1, INT64_MIN if missing
+        amount       float64   0.0 if missing
+        event_type   uint8     enum id, 0 if missing
+        id_kind      uint8     0: integer id, 1: string id (+ 6 pad bytes)
+
+One bad event does not stop ``EventLogWriter.write``: an event whose
+``ts`` is not a time is warned about and kept with ts +inf, so it is
+counted but left out of the windows, as on JSONL. An event the format
+cannot hold (a customer_id that is not an integer, an integral float or a
+string, a non-numeric amount, a non-string event_type) is warned about
+and skipped, as a line that does not decode is.
+
+Writers append whole frames, so a reader stops at a partial last frame
+and takes it once complete, like a partial line in tail_follow.py; the
+offsets it hands out are frame boundaries. Payloads stay 8-byte aligned.
+
+``EventLog`` memory-maps the file and yields each RECS payload without
+copying it: a NumPy structured array over the map (``numpy`` engine) or a
+memoryview read with ``struct.iter_unpack`` (``struct`` engine, stdlib
+only). ``aggregate`` folds a batch into the streaming state with array
+operations, so the numpy engine builds no object per record; results are
+the same as streaming_pipeline.aggregate_events on the JSON events
+(revenue is added in order with ``cumsum``). Only the four fields above
+are stored; convert_events.py converts from and to JSON Lines.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import importlib
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tail_follow import FileId, file_id
+from windows import event_time
+
+SUFFIX = ".evb"
+MAGIC = b"EVLOG01\n"
+FRAME = struct.Struct("<4sI")  # kind, payload length
+RECORD = struct.Struct("<dqdBB6x")  # ts, customer_id, amount, event_type, id_kind
+TYPE = b"TYPE"
+CUST = b"CUST"
+RECS = b"RECS"
+CUST_CODE = struct.Struct("<q")
+NO_CUSTOMER = -(1 << 63)
+NAN = float("nan")
+NOT_A_TIME = float("inf")
+
+
+def _numpy(engine: str):
+    if engine == "struct":
+        return None
+    try:
+        return importlib.import_module("numpy")
+    except ImportError:
+        if engine == "numpy":
+            raise RuntimeError("the numpy engine needs numpy: pip install numpy") from None
+        return None
+
+
+class EventLogWriter:
+    """Append events (anything with a dict-style ``.get``), one RECS frame per ``write``."""
+
+    def __init__(self, fp: Path) -> None:
+        self.fp = fp
+        self.types: Dict[Optional[str], int] = {None: 0}
+        self.ids: Dict[str, int] = {}  # string customer id -> CUST code
+        if fp.exists() and fp.stat().st_size:
+            with EventLog(fp, "struct") as log:
+                for _ in log.batches(sys.maxsize):  # only reads the TYPE and CUST frames
+                    pass
+                self.types.update((name, code) for code, name in enumerate(log.types) if code)
+                self.ids.update((name, code) for code, name in enumerate(log.ids))
+                end = log.end
+            if end < fp.stat().st_size:
+                os.truncate(fp, end)  # drop a partial frame left by a crashed writer
+        self.f = fp.open("ab")
+        if self.f.tell() == 0:
+            self.f.write(MAGIC)
+
+    def _declare(self, name, out: bytearray) -> int:
+        if not isinstance(name, str):
+            raise ValueError(f"event_type must be a string, got {name!r}")
+        code = len(self.types)
+        if code > 255:
+            raise ValueError("more than 255 distinct event types")
+        payload = bytes([code]) + name.encode("utf-8")
+        payload += bytes(-len(payload) % 8)  # keep the next frame aligned
+        out += FRAME.pack(TYPE, len(payload)) + payload
+        self.types[name] = code
+        return code
+
+    def _declare_id(self, cid: str, out: bytearray) -> int:
+        code = len(self.ids)
+        payload = CUST_CODE.pack(code) + cid.encode("utf-8")
+        payload += bytes(-len(payload) % 8)
+        out += FRAME.pack(CUST, len(payload)) + payload
+        self.ids[cid] = code
+        return code
+
+    def write(self, events: Iterable) -> int:
+        """Append ``events`` as one frame; returns how many were written."""
+        out = bytearray()
+        recs = bytearray()
+        pack = RECORD.pack
+        n = 0
+        for i, evt in enumerate(events, start=1):
+            size, n_types, n_ids = len(out), len(self.types), len(self.ids)
+            try:
+                etype = evt.get("event_type")
+                code = self.types.get(etype)
+                if code is None:
+                    code = self._declare(etype, out)
+                cid = evt.get("customer_id")
+                kind = 0
+                if cid is None:
+                    cid = NO_CUSTOMER
+                elif isinstance(cid, str):
+                    kind = 1
+                    cid = self.ids[cid] if cid in self.ids else self._declare_id(cid, out)
+                elif isinstance(cid, int) or (isinstance(cid, float) and cid.is_integer()):
+                    cid = int(cid)
+                else:
+                    raise ValueError(f"customer_id must be an integer or a string, got {cid!r}")
+                amount = float(evt.get("amount", 0) or 0)
+                record = pack(self._ts(evt.get("ts"), i), cid, amount, code, kind)
+            except (ValueError, TypeError, struct.error) as exc:
+                # Forget what this event declared: its frames are never written
+                del out[size:]
+                for name in list(self.types)[n_types:]:
+                    del self.types[name]
+                for cid in list(self.ids)[n_ids:]:
+                    del self.ids[cid]
+                print(f"[warn] {self.fp.name}: event {i} of the batch skipped: {exc}")
+                continue
+            recs += record
+            n += 1
+        if n:
+            out += FRAME.pack(RECS, len(recs)) + recs
+        self.f.write(out)
+        self.f.flush()  # readers only see whole frames after this point
+        return n
+
+    def _ts(self, value, i: int) -> float:
+        if value is None:
+            return NAN
+        try:
+            t = event_time(value, NAN)
+        except (ValueError, OverflowError):
+            t = NOT_A_TIME
+        if not -NOT_A_TIME < t < NOT_A_TIME:  # also NaN, which the windows reject too
+            print(f"[warn] {self.fp.name}: event {i} of the batch: ts {value!r} is not a time; "
+                  "left out of the windows")
+            return NOT_A_TIME
+        return t
+
+    def close(self) -> None:
+        self.f.close()
+
+    def __enter__(self) -> "EventLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class EventLog:
+    """Memory-mapped reader; batches are views into the map, valid until ``close``."""
+
+    def __init__(self, fp: Path, engine: str = "auto") -> None:
+        self.fp = fp
+        self.np = _numpy(engine)
+        self.engine = "numpy" if self.np is not None else "struct"
+        self.types: List[Optional[str]] = [None]
+        self.ids: List[str] = []  # CUST code -> string customer id
+        self.end = 0  # end of the last complete frame read
+        with fp.open("rb") as f:
+            st = os.fstat(f.fileno())
+            self.fid: FileId = file_id(st)
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else None
+        head = self.mm[: len(MAGIC)] if self.mm is not None else b""
+        if not MAGIC.startswith(head):
+            self.close()
+            raise ValueError(f"{fp.name} is not an event log")
+        if self.np is not None:
+            np = self.np
+            self.dtype = np.dtype(
+                [("ts", "<f8"), ("customer_id", "<i8"), ("amount", "<f8"), ("event_type", "u1"),
+                 ("id_kind", "u1"), ("pad", "V6")]
+            )
+
+    @property
+    def size(self) -> int:
+        return len(self.mm) if self.mm is not None else 0
+
+    def batches(self, offset: int = 0) -> Iterator[Tuple[int, int, object]]:
+        """Yield (start, end, records) for each complete RECS frame at or after ``offset``."""
+        size = self.size
+        if size < len(MAGIC):
+            return
+        mm = self.mm
+        pos = len(MAGIC)
+        while pos + FRAME.size <= size:
+            kind, length = FRAME.unpack_from(mm, pos)
+            body = pos + FRAME.size
+            end = body + length
+            if end > size:
+                break  # partial frame: wait for the writer
+            if kind == TYPE:
+                code = mm[body]
+                name = mm[body + 1 : end].rstrip(b"\0").decode("utf-8")
+                self.types[len(self.types) :] = [None] * (code + 1 - len(self.types))
+                self.types[code] = name
+            elif kind == CUST:
+                (code,) = CUST_CODE.unpack_from(mm, body)
+                self.ids[len(self.ids) :] = [""] * (code + 1 - len(self.ids))
+                self.ids[code] = mm[body + CUST_CODE.size : end].rstrip(b"\0").decode("utf-8")
+            elif kind == RECS:
+                if pos >= offset:
+                    if self.np is not None:
+                        records = self.np.frombuffer(mm, self.dtype, length // RECORD.size, body)
+                    else:
+                        records = memoryview(mm)[body:end]
+                    self.end = end
+                    yield pos, end, records
+                    del records
+            else:
+                raise ValueError(f"{self.fp.name}@{pos}: unknown frame kind {kind!r}")
+            pos = end
+        self.end = pos
+
+    def _mask(self, etypes, name: str):
+        try:
+            return etypes == self.types.index(name)
+        except ValueError:  # type never written to this log
+            return self.np.zeros(len(etypes), dtype=bool)
+
+    def aggregate(self, records, state: Dict) -> int:
+        """Fold ``records`` into ``state`` like aggregate_events; returns the record count."""
+        if self.np is not None:
+            n = len(records)
+            if not n:
+                return 0
+            np = self.np
+            etypes = records["event_type"]
+            placed = self._mask(etypes, "order_placed")
+            refund = self._mask(etypes, "order_refund")
+            orders = int(np.count_nonzero(placed))
+            refunds = int(np.count_nonzero(refund))
+            amounts = records["amount"][placed | refund]
+            if len(amounts):
+                state["revenue"] = float(np.cumsum(np.concatenate(([state["revenue"]], amounts)))[-1])
+            last = int(etypes[-1])
+        else:
+            n = len(records) // RECORD.size
+            if not n:
+                return 0
+            types = self.types
+            placed = types.index("order_placed") if "order_placed" in types else -1
+            refund = types.index("order_refund") if "order_refund" in types else -1
+            orders = refunds = 0
+            revenue = state["revenue"]
+            last = 0
+            for _, _, amount, last, _ in RECORD.iter_unpack(records):
+                if last == placed:
+                    orders += 1
+                    revenue += amount
+                elif last == refund:
+                    refunds += 1
+                    revenue += amount
+            state["revenue"] = revenue
+        state["event_count"] += n
+        state["orders"] += orders
+        state["refunds"] += refunds
+        state["last_event"] = self.types[last]
+        return n
+
+    def events(self, records) -> List[Dict]:
+        """Records as event dicts (missing fields left out), e.g. for windows.py."""
+        if self.np is not None:
+            rows = zip(
+                records["ts"].tolist(),
+                records["customer_id"].tolist(),
+                records["amount"].tolist(),
+                records["event_type"].tolist(),
+                records["id_kind"].tolist(),
+            )
+        else:
+            rows = RECORD.iter_unpack(records)
+        types = self.types
+        ids = self.ids
+        out = []
+        for ts, cid, amount, code, kind in rows:
+            evt = {"event_type": types[code]} if code else {}
+            if kind:
+                evt["customer_id"] = ids[cid]
+            elif cid != NO_CUSTOMER:
+                evt["customer_id"] = cid
+            evt["amount"] = amount
+            if ts == ts:  # not NaN
+                evt["ts"] = ts
+            out.append(evt)
+        return out
+
+    def close(self) -> None:
+        if self.mm is not None:
+            try:
+                self.mm.close()
+            except BufferError:
+                pass  # a caller still holds a batch: the map goes with it
+            self.mm = None
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,182 @@
+"""``tail -F`` for JSON Lines files: follow appends, rotation and truncation.
+
+Each file is identified by (device, inode), not by name, with the byte
+offset of the first line not yet handed out:
+
+  - appends: ``os.preadv`` from the offset into one reusable buffer; only
+    complete lines are returned, a partial last line waits for its newline
+  - rotation (``mv events.jsonl events.jsonl.1`` + new ``events.jsonl``): the
+    old inode is drained to its end through the still-open descriptor, then
+    the new file is followed from 0. A rotated name that matches the watch
+    pattern is the same inode, so it is not read twice
+  - truncation (``copytruncate``): size below the offset restarts at 0
+
+The caller stages a batch's offset (``DirectoryTail.ack``) only once it has
+folded the batch into its state, and saves the offsets with an atomic
+rename (``OffsetStore.commit``), so a restart resumes at the next unread line.
+streaming_pipeline.py uses ``checkpoint.CheckpointStore`` instead, which
+saves them in one transaction with the aggregate state.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+FileId = str  # "<st_dev>:<st_ino>"
+
+
+def file_id(st: os.stat_result) -> FileId:
+    return f"{st.st_dev}:{st.st_ino}"
+
+
+class OffsetStore:
+    """Byte offsets per file id, persisted as JSON."""
+
+    def __init__(self, fp: Path) -> None:
+        self.fp = fp
+        self.offsets: Dict[FileId, Dict[str, object]] = {}
+        if fp.exists():
+            self.offsets = json.loads(fp.read_text(encoding="utf-8")).get("files", {})
+
+    def get(self, fid: FileId) -> int:
+        entry = self.offsets.get(fid)
+        return int(entry["offset"]) if entry else 0
+
+    def set(self, fid: FileId, name: str, offset: int) -> None:
+        self.offsets[fid] = {"name": name, "offset": offset}
+
+    def discard(self, fid: FileId) -> None:
+        self.offsets.pop(fid, None)
+
+    def prune(self, live: set) -> None:
+        """Forget files that no longer exist, so a reused inode starts at 0."""
+        for fid in list(self.offsets):
+            if fid not in live:
+                del self.offsets[fid]
+
+    def commit(self) -> None:
+        tmp = self.fp.with_name(f".{self.fp.name}.tmp")
+        tmp.write_text(json.dumps({"files": self.offsets}), encoding="utf-8")
+        os.replace(tmp, self.fp)
+
+
+class FileFollower:
+    """Read complete new lines of one inode, starting at ``offset``."""
+
+    def __init__(self, path: Path, offset: int = 0, buf_size: int = 1 << 20) -> None:
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        st = os.fstat(self.fd)
+        self.fid = file_id(st)
+        self.offset = offset if offset <= st.st_size else 0
+        self._buf = bytearray(buf_size)
+
+    def read(self, final: bool = False) -> Iterator[Tuple[int, bytes]]:
+        """Yield (start offset, bytes of complete lines) until caught up.
+
+        ``final`` also returns a trailing line without a newline (the file is
+        finished, e.g. rotated away). ``self.offset`` advances as batches are
+        yielded, so it only covers lines the caller has received.
+        """
+        if os.fstat(self.fd).st_size < self.offset:
+            print(f"[tail] {self.path.name} was truncated; reading from the start")
+            self.offset = 0
+        while True:
+            view = memoryview(self._buf)
+            n = os.preadv(self.fd, [view], self.offset)
+            if n == 0:
+                return
+            cut = self._buf.rfind(b"\n", 0, n) + 1
+            if not cut:
+                if n == len(self._buf):  # one line longer than the buffer: grow it
+                    view.release()
+                    self._buf.extend(bytes(len(self._buf)))
+                    continue
+                if not final:
+                    return
+                cut = n
+            start = self.offset
+            data = bytes(view[:cut])  # undecoded: the JSON decoder takes UTF-8 bytes
+            view.release()
+            self.offset += cut
+            yield start, data
+            if n < len(self._buf) and cut == n:
+                return  # reached the end of what has been written
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class DirectoryTail:
+    """Follow every file handed to ``poll``; rotation-aware, offsets in ``store``."""
+
+    def __init__(self, store: OffsetStore, buf_size: int = 1 << 20) -> None:
+        self.store = store
+        self.buf_size = buf_size
+        self._by_id: Dict[FileId, FileFollower] = {}
+        self._by_name: Dict[str, FileId] = {}
+        self._handed: Optional[Tuple[FileId, str, int]] = None  # end of the last batch poll() yielded
+
+    def poll(self, path: Path, final: bool = False) -> Iterator[Tuple[str, int, bytes]]:
+        """Yield (name, start offset, bytes) for new complete lines reachable from ``path``.
+
+        ``final`` also takes a trailing line without a newline, for files that
+        are known to be complete. Call ``ack`` once a batch is consumed; until
+        then its offset is not in the store.
+        """
+        name = path.name
+        try:
+            fid = file_id(path.stat())
+        except FileNotFoundError:
+            fid = None
+        old_fid = self._by_name.get(name)
+        if old_fid is not None and old_fid != fid:
+            # Rotated or deleted: finish the old inode through its open descriptor
+            del self._by_name[name]
+            old = self._by_id.get(old_fid)
+            if old is not None:
+                yield from self._read(name, old, final=True)
+                if old_fid not in self._by_name.values():
+                    self._close(old_fid)
+        if fid is None:
+            return
+        follower = self._by_id.get(fid)
+        if follower is None:
+            follower = self._by_id[fid] = FileFollower(path, self.store.get(fid), self.buf_size)
+        self._by_name[name] = fid
+        yield from self._read(name, follower, final)
+
+    def _read(self, name: str, follower: FileFollower, final: bool = False) -> Iterator[Tuple[str, int, bytes]]:
+        for start, data in follower.read(final):
+            self._handed = (follower.fid, name, follower.offset)
+            yield name, start, data
+
+    def ack(self) -> None:
+        """Stage the offset past the last batch ``poll`` yielded, now that the caller has consumed it."""
+        if self._handed is not None:
+            self.store.set(*self._handed)
+            self._handed = None
+
+    def _close(self, fid: FileId) -> None:
+        follower = self._by_id.pop(fid)
+        # Keep the offset while the inode lives on under another name
+        # (rotated to ``events.1.jsonl``); forget it once unlinked, as the
+        # inode number can be reused by a new file
+        if os.fstat(follower.fd).st_nlink == 0:
+            self.store.discard(fid)
+        follower.close()
+
+    def close(self) -> None:
+        for follower in self._by_id.values():
+            follower.close()
+        self._by_id.clear()
+
+
+def live_ids(dirpath: Path) -> set:
+    with os.scandir(dirpath) as it:
+        return {file_id(e.stat()) for e in it if e.is_file()}
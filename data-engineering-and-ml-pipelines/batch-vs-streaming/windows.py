@@ -0,0 +1,335 @@
+"""Event-time windows for streaming_pipeline: tumbling, sliding and session.
+
+Every event is placed by its ``ts`` (epoch seconds or ISO 8601, where a
+time without a UTC offset is read as local time; arrival time if missing)
+into:
+
+  - tumbling windows (per minute, per hour): one accumulator per open window
+  - sliding windows (5 minutes, every minute): one-minute panes in a ring
+    buffer with running sums, so each slide adds one pane and evicts one
+    instead of re-summing the window
+  - session windows per customer: closed after ``gap`` seconds of inactivity
+
+Updates are O(1) per event and window: each batch is first summed into
+buckets of the common grain of the time windows (one minute), which the
+tumbling and sliding windows then take whole; sessions take each event.
+An event whose ``ts`` is not a time is warned about and left out of the
+windows, as a line that does not decode is. The watermark trails the
+largest event time seen by ``lateness`` seconds and moves once per batch;
+a window closes (and is returned for the sink) when the watermark passes
+its end. Events for windows that have already closed are late: they are
+counted in ``late`` and dropped. Open windows are bounded by the lateness, plus
+``max_open`` as a hard cap that force-closes the oldest.
+
+``to_dict``/``load`` carry the open windows through checkpoint.py, so a
+restart resumes them. Closed windows can reach the sink again when a
+restart replays input after the last checkpoint; each row is identified by
+(window, start[, key]) for idempotent upserts.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from math import gcd
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Acc = List[float]  # [events, orders, refunds, revenue]
+
+
+def event_time(value, default: float) -> float:
+    """Epoch seconds of ``value``; ``default`` if None, ValueError if it is not a time."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def _iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _row(name: str, start: float, end: float, acc: Acc) -> Dict:
+    return {
+        "window": name,
+        "start": _iso(start),
+        "end": _iso(end),
+        "events": int(acc[0]),
+        "orders": int(acc[1]),
+        "refunds": int(acc[2]),
+        "revenue": round(acc[3], 2),
+    }
+
+
+class Tumbling:
+    def __init__(self, name: str, size: int, max_open: int = 10_000) -> None:
+        self.name = name
+        self.size = size
+        self.grain = size
+        self.max_open = max_open
+        self.open: Dict[int, Acc] = {}  # window start -> accumulator
+        self.late = 0
+
+    def add_bucket(self, start: int, bucket: Acc, watermark: float) -> None:
+        """Add the sums of events in [start, start + grain of the engine)."""
+        start -= start % self.size
+        if start + self.size <= watermark:
+            self.late += int(bucket[0])
+            return
+        acc = self.open.get(start)
+        if acc is None:
+            self.open[start] = list(bucket)
+        else:
+            for i in range(4):
+                acc[i] += bucket[i]
+
+    def close(self, watermark: float) -> List[Tuple[int, Acc]]:
+        """Closed (start, accumulator) pairs in time order."""
+        starts = sorted(s for s in self.open if s + self.size <= watermark)
+        excess = len(self.open) - len(starts) - self.max_open
+        if excess > 0:
+            starts += sorted(s for s in self.open if s + self.size > watermark)[:excess]
+        return [(s, self.open.pop(s)) for s in starts]
+
+    def advance(self, watermark: float) -> List[Dict]:
+        return [_row(self.name, s, s + self.size, acc) for s, acc in self.close(watermark)]
+
+    def to_dict(self) -> Dict:
+        return {"open": [[s, acc] for s, acc in self.open.items()], "late": self.late}
+
+    def load(self, d: Dict) -> None:
+        self.open = {int(s): acc for s, acc in d["open"]}
+        self.late = d["late"]
+
+
+class Sliding:
+    """``size``-second windows every ``slide`` seconds over a ring of ``size // slide`` panes."""
+
+    def __init__(self, name: str, size: int, slide: int, max_open: int = 10_000) -> None:
+        if size % slide:
+            raise ValueError(f"window size {size} must be a multiple of the slide {slide}")
+        self.name = name
+        self.size = size
+        self.slide = slide
+        self.grain = slide
+        self.panes = Tumbling(name, slide, max_open)
+        self.ring: deque = deque(maxlen=size // slide)
+        self.sums: Acc = [0, 0, 0, 0.0]
+        self.next_start: Optional[int] = None  # start of the next pane to enter the ring
+
+    @property
+    def late(self) -> int:
+        return self.panes.late
+
+    def add_bucket(self, start: int, bucket: Acc, watermark: float) -> None:
+        self.panes.add_bucket(start, bucket, watermark)
+
+    def _push(self, acc: Optional[Acc]) -> None:
+        if len(self.ring) == self.ring.maxlen:
+            old = self.ring[0]
+            if old is not None:
+                for i in range(4):
+                    self.sums[i] -= old[i]
+        self.ring.append(acc)
+        if acc is not None:
+            for i in range(4):
+                self.sums[i] += acc[i]
+        if self.sums[0] == 0:
+            self.sums = [0, 0, 0, 0.0]  # drop float residue once the window is empty
+
+    def advance(self, watermark: float) -> List[Dict]:
+        closed = self.panes.close(watermark)
+        if not closed and self.next_start is None:
+            return []
+        limit = max(int(watermark // self.slide) * self.slide, closed[-1][0] + self.slide if closed else 0)
+        s = self.next_start if self.next_start is not None else closed[0][0]
+        rows = []
+        i = 0
+        while s < limit:
+            if self.sums[0] == 0:  # ring holds no events: jump over the gap
+                if i == len(closed):
+                    s = limit
+                    break
+                if closed[i][0] > s:
+                    self.ring.clear()
+                    self.sums = [0, 0, 0, 0.0]
+                    s = closed[i][0]
+            acc = None
+            while i < len(closed) and closed[i][0] <= s:  # forced-closed panes land in order
+                acc = closed[i][1] if acc is None else [a + b for a, b in zip(acc, closed[i][1])]
+                i += 1
+            self._push(acc)
+            s += self.slide
+            if self.sums[0]:
+                rows.append(_row(self.name, s - self.size, s, self.sums))
+                rows[-1]["orders_per_min"] = round(self.sums[1] * 60 / self.size, 3)
+        self.next_start = s
+        return rows
+
+    def to_dict(self) -> Dict:
+        return {"panes": self.panes.to_dict(), "ring": list(self.ring), "sums": self.sums,
+                "next_start": self.next_start}
+
+    def load(self, d: Dict) -> None:
+        self.panes.load(d["panes"])
+        self.ring.extend(d["ring"])
+        self.sums = d["sums"]
+        self.next_start = d["next_start"]
+
+
+class Sessions:
+    """Per-key sessions that close after ``gap`` seconds without events."""
+
+    grain = None  # takes single events
+
+    def __init__(self, name: str, gap: int, max_open: int = 100_000) -> None:
+        self.name = name
+        self.gap = gap
+        self.max_open = max_open
+        # key -> [start, last, events, orders, refunds, revenue], least recently active first
+        self.open: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.pending: List[Dict] = []
+        self.late = 0
+
+    def _emit(self, key: str, s: List[float]) -> None:
+        row = _row(self.name, s[0], s[1] + self.gap, s[2:])
+        row["key"] = key
+        self.pending.append(row)
+
+    def add(self, t: float, key, orders: int, refunds: int, amount: float, watermark: float) -> None:
+        if key is None:
+            return
+        key = str(key)
+        s = self.open.get(key)
+        if s is not None and t - s[1] > self.gap:  # the previous session is over
+            self._emit(key, self.open.pop(key))
+            s = None
+        if s is None:
+            if t + self.gap <= watermark:
+                self.late += 1
+                return
+            s = self.open[key] = [t, t, 0, 0, 0, 0.0]
+            if len(self.open) > self.max_open:
+                old_key, old = self.open.popitem(last=False)
+                self._emit(old_key, old)
+        elif t < s[0] - self.gap:
+            self.late += 1  # belongs to an earlier session that has been emitted
+            return
+        else:
+            self.open.move_to_end(key)
+        if t < s[0]:
+            s[0] = t
+        if t > s[1]:
+            s[1] = t
+        s[2] += 1
+        s[3] += orders
+        s[4] += refunds
+        s[5] += amount
+
+    def advance(self, watermark: float) -> List[Dict]:
+        for key in [k for k, s in self.open.items() if s[1] + self.gap <= watermark]:
+            self._emit(key, self.open.pop(key))
+        rows, self.pending = self.pending, []
+        return rows
+
+    def to_dict(self) -> Dict:
+        return {"open": [[k, s] for k, s in self.open.items()], "pending": self.pending, "late": self.late}
+
+    def load(self, d: Dict) -> None:
+        self.open = OrderedDict((k, s) for k, s in d["open"])
+        self.pending = d["pending"]
+        self.late = d["late"]
+
+
+def default_windows(session_gap: int = 1800) -> list:
+    return [
+        Tumbling("1m", 60),
+        Tumbling("1h", 3600),
+        Sliding("5m/1m", 300, 60),
+        Sessions("session", session_gap),
+    ]
+
+
+class WindowEngine:
+    """Feed event batches to window operators; returns windows the watermark closed."""
+
+    def __init__(self, windows: Optional[list] = None, lateness: float = 60.0) -> None:
+        self.windows = windows if windows is not None else default_windows()
+        self.lateness = lateness
+        self.max_time: Optional[float] = None
+        self.watermark = float("-inf")
+        self._bucketed = [w for w in self.windows if w.grain]
+        self._grain = 0
+        for w in self._bucketed:
+            self._grain = gcd(self._grain, w.grain)
+
+    def process(self, events: Iterable[Dict], now: Optional[float] = None) -> List[Dict]:
+        now = time.time() if now is None else now
+        watermark = self.watermark
+        max_time = self.max_time if self.max_time is not None else float("-inf")
+        adds = [w.add for w in self.windows if not w.grain]
+        grain = self._grain or 1
+        buckets: Dict[int, Acc] = {}
+        for evt in events:
+            t = evt.get("ts")
+            try:
+                if t.__class__ is not float:
+                    t = event_time(t, now)
+                b = int(t // grain)  # also rejects nan and inf
+            except (ValueError, OverflowError):
+                print(f"[warn] ts {evt.get('ts')!r} is not a time; event left out of the windows")
+                continue
+            etype = evt.get("event_type")
+            if etype == "order_placed":
+                orders, refunds, amount = 1, 0, float(evt.get("amount", 0) or 0)
+            elif etype == "order_refund":
+                orders, refunds, amount = 0, 1, float(evt.get("amount", 0) or 0)
+            else:
+                orders = refunds = 0
+                amount = 0.0
+            if t > max_time:
+                max_time = t
+            acc = buckets.get(b)
+            if acc is None:
+                acc = buckets[b] = [0, 0, 0, 0.0]
+            acc[0] += 1
+            acc[1] += orders
+            acc[2] += refunds
+            acc[3] += amount
+            if adds:
+                key = evt.get("customer_id")
+                for add in adds:
+                    add(t, key, orders, refunds, amount, watermark)
+        for b, acc in buckets.items():
+            for w in self._bucketed:
+                w.add_bucket(b * grain, acc, watermark)
+        if max_time == float("-inf"):
+            return []
+        self.max_time = max_time
+        self.watermark = max(watermark, max_time - self.lateness)
+        return [row for w in self.windows for row in w.advance(self.watermark)]
+
+    @property
+    def late(self) -> int:
+        return sum(w.late for w in self.windows)
+
+    def summary(self) -> Dict:
+        """Fields for the metrics snapshot."""
+        return {
+            "watermark": _iso(self.watermark) if self.max_time is not None else None,
+            "late_events": self.late,
+        }
+
+    def to_dict(self) -> Dict:
+        return {"max_time": self.max_time, "watermark": self.watermark if self.max_time is not None else None,
+                "windows": {w.name: w.to_dict() for w in self.windows}}
+
+    def load(self, d: Dict) -> None:
+        self.max_time = d["max_time"]
+        if d["watermark"] is not None:
+            self.watermark = d["watermark"]
+        for w in self.windows:
+            if w.name in d["windows"]:
+                w.load(d["windows"][w.name])
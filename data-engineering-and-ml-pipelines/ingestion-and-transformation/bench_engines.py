@@ -0,0 +1,103 @@
+"""Benchmark the execution engines on the pipeline's group-by and argmax steps.
+
+For each size, synthetic orders (integer customer ids, amounts with
+``--decimals`` places, cents by default) are generated once and every
+available engine runs:
+
+  - group_sum: per-customer (count, total), as in summarize_orders
+  - totals:    order count, revenue and argmax, as in batch_pipeline
+
+Results are checked against the python engine (or numpy above
+``--python-max-rows``, where the per-row loop and its lists get too big)
+for exact equality: every engine sums exactly and rounds once.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/bench_engines.py
+  python3 .../bench_engines.py --rows 1000000 100000000 --engines numpy polars   # ~3GB RAM at 1e8
+  python3 .../bench_engines.py --rows 1000000 --decimals 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import engines
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # python engine only
+    np = None  # type: ignore
+
+
+def make_orders(n: int, n_customers: int, decimals: int = 2, seed: int = 7):
+    """(customer ids, amounts) as numpy arrays when available, else lists."""
+    scale = 10**decimals
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        keys = rng.integers(1, n_customers + 1, size=n, dtype=np.int64)
+        amounts = rng.integers(scale, 200 * scale, size=n) / scale
+        return keys, amounts
+    rnd = random.Random(seed)
+    keys = [rnd.randint(1, n_customers) for _ in range(n)]
+    amounts = [rnd.randint(scale, 200 * scale - 1) / scale for _ in range(n)]
+    return keys, amounts
+
+
+def plain(summary: engines.Summary) -> Dict[int, Tuple[int, float]]:
+    return {int(k): (int(c), float(t)) for k, (c, t) in summary.items()}
+
+
+def run_engine(eng, keys, amounts, counts) -> Tuple[float, float, Dict, Tuple]:
+    t0 = time.perf_counter()
+    summary = eng.group_sum(keys, amounts)
+    t1 = time.perf_counter()
+    order_count, revenue, top = eng.totals(counts, amounts)
+    t2 = time.perf_counter()
+    return t1 - t0, t2 - t1, plain(summary), (int(order_count), float(revenue), top)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 100_000_000])
+    parser.add_argument("--customers", type=int, default=100_000, help="Distinct customer ids")
+    parser.add_argument("--decimals", type=int, default=2, help="Decimal places of the amounts")
+    parser.add_argument("--engines", nargs="+", default=None, choices=list(engines.ENGINES),
+                        help="Engines to run (default: all installed)")
+    parser.add_argument("--python-max-rows", type=int, default=10_000_000,
+                        help="Skip the python engine above this size")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    names: List[str] = args.engines or engines.available()
+    print(f"{'rows':>12} {'engine':>8} {'group_sum s':>12} {'totals s':>9} {'rows/s':>14}  match")
+    for n in args.rows:
+        keys, amounts = make_orders(n, args.customers, args.decimals)
+        counts = np.ones(n, dtype=np.int64) if np is not None else [1] * n
+        reference: Optional[Tuple[Dict, Tuple]] = None
+        for name in names:
+            if name == "python" and n > args.python_max_rows:
+                print(f"{n:>12,} {name:>8} {'skipped (--python-max-rows)':>37}")
+                continue
+            eng = engines.get_engine(name)
+            if name == "python" and np is not None:
+                data = (keys.tolist(), amounts.tolist(), counts.tolist())
+            else:
+                data = (keys, amounts, counts)
+            t_group, t_totals, summary, totals = run_engine(eng, *data)
+            del data
+            if reference is None:
+                reference = (summary, totals)
+                match = "ref"
+            else:
+                match = "yes" if (summary, totals) == reference else "NO"
+            print(f"{n:>12,} {name:>8} {t_group:>12.3f} {t_totals:>9.3f} "
+                  f"{n / (t_group + t_totals):>14,.0f}  {match}")
+
+
+if __name__ == "__main__":
+    main()
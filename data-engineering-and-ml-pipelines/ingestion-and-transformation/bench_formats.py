@@ -0,0 +1,100 @@
+"""Benchmark output formats: CSV vs Parquet vs Arrow IPC.
+
+Writes a synthetic ``customer_order_summary`` table in each format, then
+reads it back the way a downstream job would:
+
+  - read: all columns with their types (CSV: DictReader + int()/float() casts)
+  - project: only ``total_amount`` (CSV still has to parse every field)
+
+Arrow files are memory-mapped, so "read" is near zero and pages are only
+faulted in as columns are touched. Parquet/Arrow rows are skipped when
+pyarrow is not installed.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/bench_formats.py
+  python3 .../bench_formats.py --rows 100000 2000000
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import csv
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import columnar
+from ingest_transform import write_output
+
+TABLE = "customer_order_summary"
+
+
+def make_rows(n: int, seed: int = 7) -> List[Dict[str, object]]:
+    rnd = random.Random(seed)
+    return [
+        {"customer_id": str(i), "order_count": rnd.randint(1, 50), "total_amount": round(rnd.uniform(1, 5000), 2)}
+        for i in range(n)
+    ]
+
+
+def read_csv_typed(fp: Path) -> int:
+    n = 0
+    with fp.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            int(row["order_count"])
+            float(row["total_amount"])
+            n += 1
+    return n
+
+
+def project_csv(fp: Path) -> int:
+    with fp.open(newline="", encoding="utf-8") as f:
+        return len([float(row["total_amount"]) for row in csv.DictReader(f)])
+
+
+def timed(fn: Callable[[], object]) -> Tuple[float, object]:
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def bench(out: Path, rows: List[Dict[str, object]], fmt: str) -> Dict[str, float]:
+    fp = columnar.output_path(out, TABLE, fmt)
+    t_write, _ = timed(lambda: write_output(out, TABLE, rows, fmt))
+    if fmt == "csv":
+        t_read, n = timed(lambda: read_csv_typed(fp))
+        t_proj, _ = timed(lambda: project_csv(fp))
+    else:
+        t_read, table = timed(lambda: columnar.read_table(fp))
+        n = table.num_rows
+        t_proj, _ = timed(lambda: columnar.read_table(fp, ["total_amount"]))
+    assert n == len(rows), (fmt, n)
+    return {"write": t_write, "read": t_read, "project": t_proj, "mb": fp.stat().st_size / 1e6}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000], help="Table sizes")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    formats = list(columnar.FORMATS) if columnar.available() else ["csv"]
+    if not columnar.available():
+        print("pyarrow not installed: benchmarking CSV only (pip install pyarrow)")
+    print(f"{'rows':>10} {'format':>8} {'write s':>8} {'read s':>8} {'proj s':>8} {'read rows/s':>12} {'MB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        for n in args.rows:
+            rows = make_rows(n)
+            for fmt in formats:
+                r = bench(out, rows, fmt)
+                print(f"{n:>10} {fmt:>8} {r['write']:>8.3f} {r['read']:>8.3f} {r['project']:>8.3f} "
+                      f"{n / r['read']:>12,.0f} {r['mb']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark ingest_transform: peak RSS and rows/sec against input size.
+
+Generates synthetic customers/orders of increasing size in a temp directory
+and runs ``ingest_transform.py`` once per mode in a fresh subprocess, so each
+peak RSS (``ru_maxrss`` from ``os.wait4``) belongs to that run only.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/bench_ingest.py
+  python3 .../bench_ingest.py --sizes 100000 1000000 --format jsonl
+  python3 .../bench_ingest.py --modes batch parallel --workers 1 2 4 8   # scaling
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent
+SCRIPT = ROOT / "ingest_transform.py"
+
+# mode name -> extra CLI args for ingest_transform.py
+MODES: Dict[str, List[str]] = {
+    "batch": [],
+    "stream": ["--stream"],
+    "parallel": ["--workers"],  # worker count appended per run
+}
+
+
+def generate(dirpath: Path, n_orders: int, fmt: str, n_customers: int = 50_000, seed: int = 7) -> Dict[str, Path]:
+    rnd = random.Random(seed)
+    customers = dirpath / "customers.csv"
+    with customers.open("w", encoding="utf-8") as f:
+        f.write("customer_id,name,email\n")
+        for i in range(1, n_customers + 1):
+            f.write(f"{i},customer {i},c{i}@example.com\n")
+    orders = dirpath / ("orders.jsonl" if fmt == "jsonl" else "orders.json")
+    with orders.open("w", encoding="utf-8") as f:
+        if fmt == "json":
+            f.write("[\n")
+        for i in range(n_orders):
+            rec = json.dumps({"order_id": i, "customer_id": rnd.randint(1, n_customers),
+                              "amount": round(rnd.uniform(1, 200), 2)})
+            if fmt == "json":
+                f.write(rec + (",\n" if i < n_orders - 1 else "\n"))
+            else:
+                f.write(rec + "\n")
+        if fmt == "json":
+            f.write("]\n")
+    return {"customers": customers, "orders": orders}
+
+
+def run_mode(args: List[str]) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, str(SCRIPT), *args], stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise SystemExit(f"ingest_transform.py {' '.join(args)} failed ({proc.returncode})")
+    return {"wall": wall, "max_rss_mb": usage.ru_maxrss / 1024}  # ru_maxrss is KiB on Linux
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 200_000, 800_000],
+                        help="Order counts to generate")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json", help="Orders file format")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1],
+                        help="Worker counts for the parallel mode")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    runs = [(m, MODES[m]) for m in args.modes if m != "parallel"]
+    if "parallel" in args.modes:
+        runs += [(f"par-{w}", [*MODES["parallel"], str(w)]) for w in args.workers]
+    print(f"{'orders':>10} {'input MB':>9} {'mode':>8} {'wall s':>8} {'rows/s':>10} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmpdir = Path(tmp)
+        for n in args.sizes:
+            inputs = generate(tmpdir, n, args.format)
+            size_mb = inputs["orders"].stat().st_size / 1e6
+            for mode, extra in runs:
+                out = tmpdir / f"out-{mode}"
+                res = run_mode(["--customers", str(inputs["customers"]), "--orders", str(inputs["orders"]),
+                                "--out", str(out), *extra])
+                print(f"{n:>10} {size_mb:>9.1f} {mode:>8} {res['wall']:>8.2f} "
+                      f"{n / res['wall']:>10,.0f} {res['max_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
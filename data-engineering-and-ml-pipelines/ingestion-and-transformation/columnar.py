@@ -0,0 +1,87 @@
+"""Typed columnar outputs (Parquet, Arrow IPC) for the pipeline tables.
+
+CSV loses types: every reader re-parses each row and casts with ``int()`` /
+``float()``. Parquet and Arrow IPC (Feather v2) store typed columns, so a
+reader can load only the columns it needs and, for uncompressed Arrow files,
+memory-map them instead of copying.
+
+Needs ``pyarrow`` (optional: ``pip install pyarrow``); CSV keeps working
+without it.
+
+Used by ``ingest_transform.py --format`` and ``batch_pipeline.py --format``.
+"""
+
+from __future__ import annotations
+
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.feather as feather  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:  # CSV only
+    pa = feather = pq = None  # type: ignore
+
+# format name -> file suffix
+FORMATS: Dict[str, str] = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# column -> arrow type name, per output table
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "cleaned_customers": {"customer_id": "string", "name": "string", "email": "string", "region": "string"},
+    "customer_order_summary": {"customer_id": "string", "order_count": "int64", "total_amount": "float64"},
+}
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _require() -> None:
+    if pa is None:
+        raise RuntimeError("Parquet/Arrow output needs pyarrow: pip install pyarrow")
+
+
+def output_path(out: Path, table: str, fmt: str) -> Path:
+    return out / f"{table}{FORMATS[fmt]}"
+
+
+def _schema(table: str):
+    return pa.schema([(name, pa.type_for_alias(t)) for name, t in SCHEMAS[table].items()])
+
+
+def write_rows(fp: Path, table: str, rows: Iterable[Dict[str, object]], chunk_size: int = 65_536) -> int:
+    """Write dict rows to ``fp`` as Parquet or Arrow (by suffix); returns the row count.
+
+    Rows are converted ``chunk_size`` at a time, so iterators stream. Arrow
+    files are written uncompressed so readers can memory-map them.
+    """
+    _require()
+    schema = _schema(table)
+    it = iter(rows)
+    count = 0
+    if fp.suffix == ".parquet":
+        writer = pq.ParquetWriter(str(fp), schema)
+    else:
+        writer = pa.ipc.new_file(str(fp), schema)
+    with writer:  # closing writes the footer; an empty input still gets the schema
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                return count
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+
+
+def read_table(fp: Path, columns: Optional[Sequence[str]] = None, memory_map: bool = True):
+    """Load a Parquet or Arrow file as a ``pyarrow.Table``, projecting ``columns``."""
+    _require()
+    cols = list(columns) if columns is not None else None
+    if fp.suffix == ".parquet":
+        return pq.read_table(str(fp), columns=cols, memory_map=memory_map)
+    return feather.read_table(str(fp), columns=cols, memory_map=memory_map)
+
+
+def read_rows(fp: Path, columns: Optional[Sequence[str]] = None) -> List[Dict[str, object]]:
+    return read_table(fp, columns).to_pylist()
@@ -0,0 +1,146 @@
+"""JSON decoders for the pipelines' JSON / JSON Lines inputs.
+
+``json`` is the standard library (one ``json.loads`` per batch of lines
+joined into an array). ``orjson`` and ``msgspec`` are used when installed:
+
+  - orjson: one ``orjson.loads`` per line, returning dicts
+  - msgspec: ``Decoder.decode_lines`` into ``msgspec.Struct`` records that
+    hold only the fields the pipelines read; other fields are skipped by the
+    parser instead of being built into dicts and thrown away
+
+Every decoder takes bytes of complete lines and returns records with a
+dict-style ``.get``, so callers (``clean_order``, the streaming
+aggregator) work unchanged and produce the same results. Record fields are
+not type-checked: a value comes back as whatever JSON type the input has
+(``"amount": "7.5"``, ``"customer_id": 1.0``), as with json and orjson, and
+the callers convert it.
+
+Select with ``--decoder`` on ``ingest_transform.py`` / ``streaming_pipeline.py``
+or ``PIPELINE_DECODER``; ``auto`` picks msgspec, then orjson, then json.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+from typing import Any, List
+
+try:
+    import msgspec  # type: ignore
+except ImportError:  # msgspec decoder unavailable
+    msgspec = None  # type: ignore
+
+if msgspec is not None:
+    # Module level so records pickle across the process pools
+    _UNSET = msgspec.UNSET
+
+    class Record(msgspec.Struct):
+        def get(self, name: str, default: Any = None) -> Any:
+            value = getattr(self, name, _UNSET)
+            return default if value is _UNSET else value  # like dict.get on a missing key
+
+    # Any: values of any JSON type, left for the callers to convert
+    class Event(Record):
+        event_type: Any = _UNSET
+        amount: Any = _UNSET
+        customer_id: Any = _UNSET
+        ts: Any = _UNSET
+
+    class Order(Record):
+        customer_id: Any = _UNSET
+        amount: Any = _UNSET
+
+    RECORDS = {"event": Event, "order": Order}
+
+
+class JsonDecoder:
+    name = "json"
+
+    def __init__(self, schema: str = "event") -> None:
+        self.schema = schema
+
+    def decode_lines(self, data: bytes) -> List[Any]:
+        return json.loads(b"[" + data.strip().replace(b"\n", b",") + b"]")
+
+    def decode_line(self, line: bytes) -> Any:
+        return json.loads(line)
+
+    def decode_document(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonDecoder:
+    name = "orjson"
+
+    def __init__(self, schema: str = "event") -> None:
+        self.orjson = importlib.import_module("orjson")
+        self.schema = schema
+
+    def decode_lines(self, data: bytes) -> List[Any]:
+        # Per line beats joining into one array: no replace() copy of the batch
+        loads = self.orjson.loads
+        return [loads(line) for line in data.splitlines() if line and not line.isspace()]
+
+    def decode_line(self, line: bytes) -> Any:
+        return self.orjson.loads(line)
+
+    def decode_document(self, data: bytes) -> Any:
+        return self.orjson.loads(data)
+
+
+class MsgspecDecoder:
+    name = "msgspec"
+
+    def __init__(self, schema: str = "event") -> None:
+        if msgspec is None:
+            raise ImportError("No module named 'msgspec'", name="msgspec")
+        record = RECORDS[schema]
+        self.schema = schema
+        self._decoder = msgspec.json.Decoder(record)
+        self._array = msgspec.json.Decoder(List[record])
+
+    def decode_lines(self, data: bytes) -> List[Any]:
+        return self._decoder.decode_lines(data)
+
+    def decode_line(self, line: bytes) -> Any:
+        return self._decoder.decode(line)
+
+    def decode_document(self, data: bytes) -> Any:
+        return self._array.decode(data)  # a JSON array of records
+
+
+DECODERS = {d.name: d for d in (JsonDecoder, OrjsonDecoder, MsgspecDecoder)}
+CHOICES = ("auto", *DECODERS)
+
+
+def default_decoder() -> str:
+    return os.getenv("PIPELINE_DECODER", "auto")
+
+
+def get_decoder(name: str = "auto", schema: str = "event"):
+    """Instantiate a decoder; raises ``RuntimeError`` if its library is missing."""
+    if name == "auto":
+        for candidate in ("msgspec", "orjson"):
+            try:
+                return DECODERS[candidate](schema)
+            except ImportError:
+                continue
+        return JsonDecoder(schema)
+    try:
+        return DECODERS[name](schema)
+    except KeyError:
+        raise ValueError(f"unknown decoder {name!r}; choose from {list(CHOICES)}") from None
+    except ImportError as exc:
+        raise RuntimeError(f"decoder {name!r} needs {exc.name}: pip install {exc.name}") from None
+
+
+def available() -> list:
+    names = []
+    for name in DECODERS:
+        try:
+            get_decoder(name)
+        except RuntimeError:
+            continue
+        names.append(name)
+    return names
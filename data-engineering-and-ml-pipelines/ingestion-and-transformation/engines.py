@@ -0,0 +1,265 @@
+"""Execution engines for the pipeline's group-by, join and top-N steps.
+
+The default ``python`` engine is the per-row dict/tuple code the scripts
+always used. ``numpy``, ``pandas`` and ``polars`` run the same three steps as
+vectorized operations:
+
+  - group_sum: orders per customer -> (count, total)   (summarize_orders)
+  - lookup:    customer ids -> region, with a default   (region join)
+  - totals:    order count, revenue, index of top row    (batch summary)
+
+Each engine is optional and only imported when selected. Every engine sums
+exactly and rounds once (``math.fsum``), so totals do not depend on the order
+rows are added in and all engines give identical results, also for amounts
+that are not whole cents.
+
+Select with ``--engine`` on ``ingest_transform.py`` / ``batch_pipeline.py``,
+or ``PIPELINE_ENGINE=numpy`` for every step of the orchestrated run.
+"""
+
+from __future__ import annotations
+
+import importlib
+import math
+import os
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+Summary = Dict[Hashable, Tuple[int, float]]
+Totals = Tuple[int, float, Optional[int]]
+
+
+def fsum(values) -> float:
+    try:
+        return math.fsum(values)
+    except (ValueError, OverflowError):  # inf - inf, or finite values summing past the float range
+        return float(sum(values))
+
+
+def exact_partials(values: List[float]) -> List[float]:
+    """A few floats whose sum is exactly the sum of ``values``.
+
+    Each pass appends the correctly rounded remainder, so ``fsum`` of the
+    result equals ``fsum(values)``. Running sums keep memory bounded by
+    compacting their value lists with this, and compacted lists from
+    separate workers merge exactly by concatenation.
+    """
+    partials: List[float] = []
+    while True:
+        rest = fsum(values + [-p for p in partials])
+        if not rest:
+            return partials
+        if not math.isfinite(rest):
+            return [rest]
+        partials.append(rest)
+
+
+def exact_group_sums(np, codes, values, n_groups: int = 1, chunk: int = 1 << 22) -> list:
+    """``fsum`` of ``values`` per group code in ``0..n_groups-1``, vectorized.
+
+    Each value is ``m * 2**(e-53)`` with an integer mantissa ``|m| < 2**53``,
+    split into two 27-bit halves; ``bincount`` adds the halves per (e, group)
+    exactly, as a chunk's sums stay integers below ``2**53``. The sums are
+    then carried into 18-bit limbs of one fixed-point integer per group,
+    which leaves a handful of exact terms per group for ``math.fsum``.
+    ``codes=None`` sums everything as one group.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = None if codes is None else np.asarray(codes, dtype=np.int64)
+    acc: Dict[int, object] = {}  # e -> (2, n_groups) int64 sums of the low and high halves
+    for start in range(0, values.size, chunk):
+        v = values[start:start + chunk]
+        if not np.isfinite(v).all():
+            return _sorted_group_sums(np, codes, values, n_groups)
+        frac, exp = np.frexp(v)
+        lo = int(exp.min())
+        width = int(exp.max()) - lo + 1
+        if n_groups * width > 4 * chunk + 4096:  # exponents too spread out for the buckets
+            return _sorted_group_sums(np, codes, values, n_groups)
+        buckets = exp - lo
+        if codes is not None:
+            buckets = buckets * n_groups + codes[start:start + chunk]
+        mant = (frac * 2.0**53).astype(np.int64)
+        for k, half in enumerate((mant & ((1 << 27) - 1), mant >> 27)):
+            sums = np.bincount(buckets, weights=half, minlength=width * n_groups)
+            for j, row in enumerate(sums.astype(np.int64).reshape(width, n_groups)):
+                if lo + j not in acc:
+                    acc[lo + j] = np.zeros((2, n_groups), np.int64)
+                acc[lo + j][k] += row
+    if not acc:
+        return [0.0] * n_groups
+    # Carry every sum into 18-bit limbs at bit offset (e - emin + 27k) above 2**(emin-53)
+    emin = min(acc)
+    mask = (1 << 18) - 1
+    n_limbs = (max(acc) - emin + 27 + 63) // 18 + 2
+    limbs = np.zeros((n_limbs, n_groups), np.int64)
+    for e, halves in acc.items():
+        for k in range(2):
+            offset = e - emin + 27 * k
+            total = halves[k]
+            for j, part in enumerate((total & mask, (total >> 18) & mask, (total >> 36) & mask, total >> 54)):
+                limbs[offset // 18 + j] += part << (offset % 18)
+    for i in range(n_limbs - 1):
+        limbs[i + 1] += limbs[i] >> 18
+        limbs[i] &= mask
+    shifts = (np.arange(n_limbs) * 18 + (emin - 53))[:, None]
+    with np.errstate(over="ignore"):  # totals past the float range come out as inf
+        terms = np.ldexp(limbs.astype(np.float64), shifts).T  # exact: limbs are below 2**53
+    return [fsum(row) for row in terms.tolist()]
+
+
+def _sorted_group_sums(np, codes, values, n_groups: int) -> list:
+    """Fallback for non-finite amounts or widely spread exponents: fsum each group."""
+    if codes is None:
+        return [fsum(values.tolist())]
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=n_groups))[:-1]
+    return [fsum(group.tolist()) for group in np.split(values[order], bounds)]
+
+
+class PythonEngine:
+    name = "python"
+
+    def group_sum(self, keys: Sequence, values: Sequence[float]) -> Summary:
+        groups: Dict[Hashable, List[float]] = {}
+        for key, value in zip(keys, values):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = []
+            group.append(float(value))
+        return {key: (len(group), fsum(group)) for key, group in groups.items()}
+
+    def lookup(self, keys: Sequence, mapping: Mapping, default: str) -> list:
+        return [mapping.get(k) or default for k in keys]
+
+    def totals(self, counts: Sequence[int], amounts: Sequence[float]) -> Totals:
+        if not len(amounts):
+            return 0, 0.0, None
+        top = max(range(len(amounts)), key=amounts.__getitem__)  # first max, like max(rows)
+        return sum(counts), fsum(amounts), top
+
+
+class NumpyEngine:
+    name = "numpy"
+
+    def __init__(self) -> None:
+        self.np = importlib.import_module("numpy")
+
+    def group_sum(self, keys: Sequence, values: Sequence[float]) -> Summary:
+        np = self.np
+        keys = np.asarray(keys)
+        values = np.asarray(values, dtype=np.float64)
+        if keys.dtype.kind in "iu" and keys.size and 0 <= keys.min() and keys.max() <= 4 * keys.size:
+            # Dense integer ids are their own group codes: skip the sort in np.unique
+            counts = np.bincount(keys)
+            totals = np.asarray(exact_group_sums(np, keys, values, len(counts)))
+            uniq = np.flatnonzero(counts)
+            counts, totals = counts[uniq], totals[uniq]
+        else:
+            uniq, codes = np.unique(keys, return_inverse=True)
+            counts = np.bincount(codes, minlength=len(uniq))
+            totals = np.asarray(exact_group_sums(np, codes.reshape(-1), values, len(uniq)))
+        return dict(zip(uniq.tolist(), zip(counts.tolist(), totals.tolist())))
+
+    def lookup(self, keys: Sequence, mapping: Mapping, default: str) -> list:
+        np = self.np
+        # One dict lookup per distinct key, then a gather
+        uniq, codes = np.unique(np.asarray(keys), return_inverse=True)
+        found = np.array([mapping.get(k) or default for k in uniq.tolist()], dtype=object)
+        return found[codes].tolist()
+
+    def totals(self, counts: Sequence[int], amounts: Sequence[float]) -> Totals:
+        np = self.np
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if not amounts.size:
+            return 0, 0.0, None
+        return int(np.asarray(counts).sum()), exact_group_sums(np, None, amounts)[0], int(amounts.argmax())
+
+
+class PandasEngine:
+    name = "pandas"
+
+    def __init__(self) -> None:
+        self.pd = importlib.import_module("pandas")
+        self.np = importlib.import_module("numpy")  # a pandas dependency
+
+    def group_sum(self, keys: Sequence, values: Sequence[float]) -> Summary:
+        pd, np = self.pd, self.np
+        codes, uniq = pd.factorize(pd.Series(keys), sort=False)
+        counts = np.bincount(codes, minlength=len(uniq))
+        totals = exact_group_sums(np, codes, values, len(uniq))
+        return dict(zip(uniq.tolist(), zip(counts.tolist(), totals)))
+
+    def lookup(self, keys: Sequence, mapping: Mapping, default: str) -> list:
+        pd = self.pd
+        return pd.Series(keys).map(mapping).fillna(default).replace("", default).tolist()
+
+    def totals(self, counts: Sequence[int], amounts: Sequence[float]) -> Totals:
+        pd = self.pd
+        amounts = pd.Series(amounts, dtype="float64")
+        if amounts.empty:
+            return 0, 0.0, None
+        return int(pd.Series(counts).sum()), exact_group_sums(self.np, None, amounts.to_numpy())[0], int(amounts.to_numpy().argmax())
+
+
+class PolarsEngine:
+    name = "polars"
+
+    def __init__(self) -> None:
+        self.pl = importlib.import_module("polars")
+        try:
+            self.np = importlib.import_module("numpy")  # vectorized exact sums
+        except ImportError:
+            self.np = None
+
+    def group_sum(self, keys: Sequence, values: Sequence[float]) -> Summary:
+        pl = self.pl
+        df = pl.DataFrame({"k": keys, "v": pl.Series(values, dtype=pl.Float64)})
+        if self.np is None:
+            g = df.group_by("k").agg(pl.len().alias("n"), pl.col("v"))
+            totals = [fsum(v) for v in g["v"].to_list()]
+        else:
+            df = df.with_columns(pl.col("k").rank("dense").cast(pl.Int64).sub(1).alias("code"))
+            g = df.group_by("code").agg(pl.col("k").first(), pl.len().alias("n")).sort("code")
+            totals = exact_group_sums(self.np, df["code"].to_numpy(), df["v"].to_numpy(), g.height)
+        return dict(zip(g["k"].to_list(), zip(g["n"].to_list(), totals)))
+
+    def lookup(self, keys: Sequence, mapping: Mapping, default: str) -> list:
+        pl = self.pl
+        found = {k: v for k, v in mapping.items() if v}
+        return pl.Series(keys).replace_strict(found, default=default, return_dtype=pl.String).to_list()
+
+    def totals(self, counts: Sequence[int], amounts: Sequence[float]) -> Totals:
+        pl = self.pl
+        amounts = pl.Series(amounts, dtype=pl.Float64)
+        if amounts.is_empty():
+            return 0, 0.0, None
+        revenue = fsum(amounts.to_list()) if self.np is None else exact_group_sums(self.np, None, amounts.to_numpy())[0]
+        return int(pl.Series(counts).sum()), revenue, int(amounts.arg_max())
+
+
+ENGINES = {e.name: e for e in (PythonEngine, NumpyEngine, PandasEngine, PolarsEngine)}
+
+
+def default_engine() -> str:
+    return os.getenv("PIPELINE_ENGINE", "python")
+
+
+def get_engine(name: str):
+    """Instantiate an engine; raises ``RuntimeError`` if its library is missing."""
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"unknown engine {name!r}; choose from {sorted(ENGINES)}") from None
+    except ImportError as exc:
+        raise RuntimeError(f"engine {name!r} needs {exc.name}: pip install {exc.name}") from None
+
+
+def available() -> list:
+    names = []
+    for name in ENGINES:
+        try:
+            get_engine(name)
+        except RuntimeError:
+            continue
+        names.append(name)
+    return names
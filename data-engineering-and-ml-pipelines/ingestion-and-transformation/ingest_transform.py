@@ -1,17 +1,43 @@
 """Ingest from multiple sources (CSV, JSON, SQLite), clean, and prepare outputs.
 
+Orchestrators call ``ingest()`` in-process: it runs the batch mode and
+returns the output tables as rows as well as writing them.
+
 Run:
   python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/ingest_transform.py
+
+  # Constant-memory mode for large exports (JSON array or JSON Lines orders)
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/ingest_transform.py \
+      --stream --orders /data/orders.jsonl --customers /data/customers.csv
+
+  # Typed columnar outputs (needs pyarrow): customer_order_summary.parquet etc.
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/ingest_transform.py --format parquet
+
+  # Vectorized group-by/join (numpy, pandas or polars; optional)
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/ingest_transform.py --engine numpy
+
+  # Parallel mode: byte-range partitions parsed in a process pool (0 = all cores)
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/ingest_transform.py \
+      --workers 0 --orders /data/orders.jsonl --customers /data/customers.csv
+
+  # JSON decoder for orders (default auto: msgspec, then orjson, then json)
+  python3 data-engineering-and-ml-pipelines/ingestion-and-transformation/ingest_transform.py --decoder orjson
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+import argparse
+import concurrent.futures as cf
 import csv
+import io
 import json
+import os
 import sqlite3
-from typing import Dict, List, Tuple
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
 ROOT = Path(__file__).resolve().parent
@@ -19,6 +45,12 @@ DATA = ROOT / "data"
 OUT = ROOT / "output"
 OUT.mkdir(parents=True, exist_ok=True)
 
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # also importable via runpy / other folders
+import columnar  # noqa: E402
+import decoders  # noqa: E402
+import engines  # noqa: E402
+
 
 @dataclass
 class Customer:
@@ -28,34 +60,128 @@ class Customer:
     region: str | None = None
 
 
+def clean_customer(row: Dict[str, str]) -> Optional[Customer]:
+    cid = str(row.get("customer_id", "")).strip()
+    if not cid:
+        return None
+    name = (row.get("name") or "").strip().title()
+    email = (row.get("email") or "unknown@example.com").strip().lower()
+    return Customer(customer_id=cid, name=name, email=email)
+
+
+def clean_order(row: Dict) -> Optional[Tuple[str, float]]:
+    cid = row.get("customer_id", "")
+    if isinstance(cid, float) and cid.is_integer():
+        cid = int(cid)  # 1.0 -> "1", to match the customers' ids
+    cid = str(cid).strip()
+    amount = float(row.get("amount", 0) or 0)
+    return (cid, amount) if cid else None
+
+
 def read_customers_csv(fp: Path) -> List[Customer]:
     customers: Dict[str, Customer] = {}
     with fp.open(newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            cid = str(row.get("customer_id", "")).strip()
-            if not cid:
-                continue
-            name = (row.get("name") or "").strip().title()
-            email = (row.get("email") or "unknown@example.com").strip().lower()
+            c = clean_customer(row)
             # Deduplicate by first seen customer_id
-            if cid not in customers:
-                customers[cid] = Customer(customer_id=cid, name=name, email=email)
+            if c is not None and c.customer_id not in customers:
+                customers[c.customer_id] = c
     return list(customers.values())
 
 
-def read_orders_json(fp: Path) -> List[Tuple[str, float]]:
+def read_orders_json(fp: Path, decoder: str = "json") -> List[Tuple[str, float]]:
+    dec = decoders.get_decoder(decoder, "order")
     orders = []
-    with fp.open(encoding="utf-8") as f:
-        data = json.load(f)
-        for row in data:
-            cid = str(row.get("customer_id", "")).strip()
-            amount = float(row.get("amount", 0) or 0)
-            if cid:
-                orders.append((cid, amount))
+    raw = fp.read_bytes()
+    if raw.lstrip().startswith(b"["):
+        data = dec.decode_document(raw)
+    else:  # JSON Lines
+        try:
+            data = dec.decode_lines(raw)
+        except ValueError:  # e.g. blank lines for the stdlib batch decode
+            data = [dec.decode_line(line) for line in raw.splitlines() if line.strip()]
+    for row in data:
+        order = clean_order(row)
+        if order is not None:
+            orders.append(order)
     return orders
 
 
+# --- streaming (constant-memory) readers ---
+def iter_customers_csv(fp: Path) -> Iterator[Customer]:
+    """Yield cleaned customers as they are read; only the seen ids are kept."""
+    seen: Set[str] = set()
+    with fp.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            c = clean_customer(row)
+            if c is not None and c.customer_id not in seen:
+                seen.add(c.customer_id)
+                yield c
+
+
+def iter_json_records(fp: Path, chunk_size: int = 1 << 16, decoder: str = "json") -> Iterator[Dict]:
+    """Yield the elements of a JSON array, or the lines of a JSON Lines file.
+
+    The array is decoded incrementally with ``JSONDecoder.raw_decode`` over a
+    sliding ``chunk_size`` buffer, so memory does not grow with the file.
+    JSON Lines are decoded line by line with ``decoder`` (see decoders.py).
+    """
+    array_decoder = json.JSONDecoder()
+    with fp.open(encoding="utf-8") as f:
+        buf = f.read(chunk_size)
+        while buf.isspace():  # sniff the first significant character
+            more = f.read(chunk_size)
+            if not more:
+                break
+            buf += more
+        start = len(buf) - len(buf.lstrip())
+        if buf[start:start + 1] != "[":
+            f.seek(0)
+            decode_line = decoders.get_decoder(decoder, "order").decode_line
+            for line in f:
+                if line.strip():
+                    yield decode_line(line)
+            return
+
+        pos, eof = start + 1, False
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError(f"{fp}: unterminated JSON array")
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = array_decoder.raw_decode(buf, pos)
+                # A value touching the buffer end may be cut short (e.g. a number)
+                complete = end < len(buf) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                more = f.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield obj
+            pos = end
+            if pos >= chunk_size:
+                buf, pos = buf[pos:], 0
+
+
+def iter_orders(fp: Path, decoder: str = "json") -> Iterator[Tuple[str, float]]:
+    for row in iter_json_records(fp, decoder=decoder):
+        order = clean_order(row)
+        if order is not None:
+            yield order
+
+
 def read_regions_sqlite() -> Dict[str, str]:
     """Simulate a database source with a small in-memory table."""
     conn = sqlite3.connect(":memory:")
@@ -75,12 +201,24 @@ def read_regions_sqlite() -> Dict[str, str]:
     return regions
 
 
-def summarize_orders(orders: List[Tuple[str, float]]) -> Dict[str, Tuple[int, float]]:
-    summary: Dict[str, Tuple[int, float]] = {}
+def order_partials(orders: Iterable[Tuple[str, float]], compact_at: int = 16) -> Dict[str, list]:
+    """Per customer ``[order count, amounts]``, compacted exactly (``engines.exact_partials``)."""
+    partials: Dict[str, list] = {}
     for cid, amount in orders:
-        count, total = summary.get(cid, (0, 0.0))
-        summary[cid] = (count + 1, total + float(amount))
-    return summary
+        entry = partials.get(cid)
+        if entry is None:
+            entry = partials[cid] = [0, []]
+        entry[0] += 1
+        amounts = entry[1]
+        amounts.append(float(amount))
+        if len(amounts) >= compact_at:  # keeps memory bounded by customers, not orders
+            entry[1] = engines.exact_partials(amounts)
+    return partials
+
+
+def summarize_orders(orders: Iterable[Tuple[str, float]]) -> Dict[str, Tuple[int, float]]:
+    """Per customer (order count, total); totals are exact and rounded once, as in every engine."""
+    return {cid: (count, engines.fsum(p)) for cid, (count, p) in order_partials(orders).items()}
 
 
 def write_csv(fp: Path, rows: List[Dict[str, object]], fieldnames: List[str]) -> None:
@@ -90,37 +228,393 @@ def write_csv(fp: Path, rows: List[Dict[str, object]], fieldnames: List[str]) ->
         writer.writerows(rows)
 
 
-def main() -> None:
-    customers_csv = DATA / "customers.csv"
-    orders_json = DATA / "orders.json"
-    if not customers_csv.exists() or not orders_json.exists():
-        raise SystemExit("Missing input files. Ensure data/ contains customers.csv and orders.json")
+def write_csv_chunked(
+    fp: Path, rows: Iterable[Dict[str, object]], fieldnames: List[str], chunk_size: int = 10_000
+) -> int:
+    """Write rows from an iterator ``chunk_size`` at a time; returns the row count."""
+    count = 0
+    it = iter(rows)
+    with fp.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                return count
+            writer.writerows(chunk)
+            count += len(chunk)
+
+
+CUSTOMER_FIELDS = ["customer_id", "name", "email", "region"]
+SUMMARY_FIELDS = ["customer_id", "order_count", "total_amount"]
+TABLE_FIELDS = {"cleaned_customers": CUSTOMER_FIELDS, "customer_order_summary": SUMMARY_FIELDS}
+
+
+def write_output(
+    out: Path, table: str, rows: Iterable[Dict[str, object]], fmt: str = "csv", chunk_size: int = 10_000
+) -> int:
+    """Write ``<table>.csv`` / ``.parquet`` / ``.arrow`` under ``out``; returns the row count.
+
+    The file is written under a temp name and renamed into place, so readers
+    (and hard links to the previous output, see orchestration/warehouse_load.py)
+    never see a partial table.
+    """
+    fp = columnar.output_path(out, table, fmt)
+    tmp = fp.with_name(f".{fp.stem}.{os.getpid()}.tmp{fp.suffix}")  # keeps the suffix columnar reads
+    try:
+        if fmt == "csv":
+            count = write_csv_chunked(tmp, rows, TABLE_FIELDS[table], chunk_size)
+        else:
+            count = columnar.write_rows(tmp, table, rows)
+        os.replace(tmp, fp)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return count
+
 
+def run_streaming(
+    customers_csv: Path,
+    orders_json: Path,
+    out: Path,
+    chunk_size: int = 10_000,
+    fmt: str = "csv",
+    decoder: str = "json",
+) -> Tuple[int, int]:
+    """Same outputs as ``run_batch``; memory is bounded by distinct customers, not rows."""
+    regions = read_regions_sqlite()
+    cleaned = (
+        {"customer_id": c.customer_id, "name": c.name, "email": c.email,
+         "region": regions.get(c.customer_id) or "UNK"}
+        for c in iter_customers_csv(customers_csv)
+    )
+    n_customers = write_output(out, "cleaned_customers", cleaned, fmt, chunk_size)
+
+    s = summarize_orders(iter_orders(orders_json, decoder))
+    summary_rows = (
+        {"customer_id": cid, "order_count": cnt, "total_amount": round(total, 2)}
+        for cid, (cnt, total) in sorted(s.items())
+    )
+    n_summaries = write_output(out, "customer_order_summary", summary_rows, fmt, chunk_size)
+    return n_customers, n_summaries
+
+
+def transform_batch(
+    customers_csv: Path,
+    orders_json: Path,
+    engine: str = "python",
+    decoder: str = "json",
+) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+    """(cleaned customer rows, order summary rows) in memory, as ``run_batch`` writes them."""
     customers = read_customers_csv(customers_csv)
-    orders = read_orders_json(orders_json)
+    orders = read_orders_json(orders_json, decoder)
     regions = read_regions_sqlite()
+    eng = engines.get_engine(engine) if engine != "python" else None
 
     # Attach regions
-    for c in customers:
-        c.region = regions.get(c.customer_id)
+    if eng is None:
+        for c in customers:
+            c.region = regions.get(c.customer_id)
+    else:
+        for c, region in zip(customers, eng.lookup([c.customer_id for c in customers], regions, "UNK")):
+            c.region = region
 
     # Prepare cleaned customers
     cleaned_rows = [
         {"customer_id": c.customer_id, "name": c.name, "email": c.email, "region": c.region or "UNK"}
         for c in customers
     ]
-    write_csv(OUT / "cleaned_customers.csv", cleaned_rows, ["customer_id", "name", "email", "region"])
 
     # Prepare order summary
-    s = summarize_orders(orders)
+    if eng is None:
+        s = summarize_orders(orders)
+    else:
+        cids, amounts = (list(col) for col in zip(*orders)) if orders else ([], [])
+        s = eng.group_sum(cids, amounts)
     summary_rows = [
         {"customer_id": cid, "order_count": cnt, "total_amount": round(total, 2)}
         for cid, (cnt, total) in sorted(s.items())
     ]
-    write_csv(OUT / "customer_order_summary.csv", summary_rows, ["customer_id", "order_count", "total_amount"])
+    return cleaned_rows, summary_rows
+
+
+def run_batch(
+    customers_csv: Path,
+    orders_json: Path,
+    out: Path,
+    fmt: str = "csv",
+    engine: str = "python",
+    decoder: str = "json",
+) -> Tuple[int, int]:
+    cleaned_rows, summary_rows = transform_batch(customers_csv, orders_json, engine, decoder)
+    write_output(out, "cleaned_customers", cleaned_rows, fmt)
+    write_output(out, "customer_order_summary", summary_rows, fmt)
+    return len(cleaned_rows), len(summary_rows)
+
+
+# --- in-process entry point (orchestrators) ---
+@dataclass
+class IngestResult:
+    customers: List[Dict[str, object]]  # cleaned_customers rows
+    summary: List[Dict[str, object]]  # customer_order_summary rows
+
+
+def ingest(
+    customers_csv: Path = DATA / "customers.csv",
+    orders_json: Path = DATA / "orders.json",
+    out: Optional[Path] = OUT,
+    fmt: str = "csv",
+    engine: Optional[str] = None,
+    decoder: Optional[str] = None,
+) -> IngestResult:
+    """The batch run as a function call: returns the output tables as rows.
+
+    Writes them under ``out`` too (skipped if None), so downstream steps can
+    take the rows directly or read the files. ``engine`` and ``decoder``
+    default to $PIPELINE_ENGINE / $PIPELINE_DECODER like the CLI; a missing
+    engine/decoder library raises ``RuntimeError``.
+    """
+    engine = engine or engines.default_engine()
+    engines.get_engine(engine)
+    decoder = decoders.get_decoder(decoder or decoders.default_decoder(), "order").name
+    customers, summary = transform_batch(customers_csv, orders_json, engine, decoder)
+    if out is not None:
+        out.mkdir(parents=True, exist_ok=True)
+        write_output(out, "cleaned_customers", customers, fmt)
+        write_output(out, "customer_order_summary", summary, fmt)
+    return IngestResult(customers, summary)
+
+
+def load_result(out: Path = OUT) -> IngestResult:
+    """Read a previous run's CSV outputs back into an ``IngestResult``."""
+    with (out / "cleaned_customers.csv").open(newline="", encoding="utf-8") as f:
+        customers = [dict(row) for row in csv.DictReader(f)]
+    with (out / "customer_order_summary.csv").open(newline="", encoding="utf-8") as f:
+        summary = [
+            {"customer_id": row["customer_id"], "order_count": int(row["order_count"]),
+             "total_amount": float(row["total_amount"])}
+            for row in csv.DictReader(f)
+        ]
+    return IngestResult(customers, summary)
+
+
+# --- parallel (partitioned) mode ---
+class NotLineDelimited(ValueError):
+    """Orders file has records spanning lines (e.g. pretty-printed JSON array)."""
+
+
+def partition_file(fp: Path, parts: int, start: int = 0) -> List[Tuple[int, int]]:
+    """Split ``fp[start:]`` into up to ``parts`` byte ranges that begin on a line start."""
+    size = fp.stat().st_size
+    if size <= start:
+        return []
+    step = -(-(size - start) // parts)
+    bounds = [start]
+    with fp.open("rb") as f:
+        for i in range(1, parts):
+            pos = start + i * step
+            if pos >= size:
+                break
+            # Move to the first line that begins at or after pos
+            f.seek(pos - 1)
+            f.readline()
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _read_range(fp: Path, start: int, end: int) -> str:
+    with fp.open("rb") as f:
+        f.seek(start)
+        return f.read(end - start).decode("utf-8")
+
+
+def _customers_partition(fp: Path, start: int, end: int, fieldnames: List[str]) -> List[Customer]:
+    """First-seen customers of one partition, in file order."""
+    customers: Dict[str, Customer] = {}
+    text = io.StringIO(_read_range(fp, start, end), newline="")
+    for row in csv.DictReader(text, fieldnames=fieldnames):
+        c = clean_customer(row)
+        if c is not None and c.customer_id not in customers:
+            customers[c.customer_id] = c
+    return list(customers.values())
+
+
+def _line_records(text: str, decoder: str = "json") -> Iterator[Dict]:
+    """Records of a JSON Lines chunk or a one-record-per-line JSON array chunk."""
+    decode_line = decoders.get_decoder(decoder, "order").decode_line
+    for line in text.splitlines():
+        s = line.strip()
+        if s.startswith("["):
+            s = s[1:].lstrip()
+        if s.endswith("]"):
+            s = s[:-1].rstrip()
+        s = s.strip(",").strip()
+        if not s:
+            continue
+        try:
+            obj = decode_line(s)
+        except ValueError:
+            raise NotLineDelimited(line) from None
+        if not hasattr(obj, "get"):  # not an object (dict or msgspec record)
+            raise NotLineDelimited(line)
+        yield obj
+
+
+def _orders_partition(fp: Path, start: int, end: int, decoder: str = "json") -> Dict[str, list]:
+    """Pre-aggregate one partition so only the per-customer map crosses processes."""
+    orders = (clean_order(row) for row in _line_records(_read_range(fp, start, end), decoder))
+    return {
+        cid: [count, engines.exact_partials(amounts)]
+        for cid, (count, amounts) in order_partials(o for o in orders if o is not None).items()
+    }
+
+
+def merge_summaries(parts: Iterable[Dict[str, list]]) -> Dict[str, Tuple[int, float]]:
+    """Merge partition partials exactly, so every worker count gives the serial totals."""
+    merged: Dict[str, list] = {}
+    for part in parts:
+        for cid, (count, partials) in part.items():
+            entry = merged.setdefault(cid, [0, []])
+            entry[0] += count
+            entry[1].extend(partials)
+    return {cid: (count, engines.fsum(partials)) for cid, (count, partials) in merged.items()}
+
+
+def run_parallel(
+    customers_csv: Path,
+    orders_json: Path,
+    out: Path,
+    workers: int = 0,
+    min_partition_bytes: int = 1 << 20,
+    fmt: str = "csv",
+    decoder: str = "json",
+) -> Tuple[int, int]:
+    """Same outputs as ``run_batch`` with parsing spread over a process pool.
+
+    Inputs are cut into byte ranges aligned to line starts (about 4 per
+    worker, at least ``min_partition_bytes`` each). Orders must be JSON Lines
+    or a JSON array with one record per line; otherwise the orders fall back
+    to the serial streaming reader. Quoted CSV fields must not contain
+    newlines.
+    """
+    workers = workers or os.cpu_count() or 1
+    regions = read_regions_sqlite()
+
+    with customers_csv.open("rb") as f:
+        header = f.readline()
+    fieldnames = next(csv.reader([header.decode("utf-8")]))
+
+    def parts_for(fp: Path, start: int = 0) -> List[Tuple[int, int]]:
+        size = fp.stat().st_size - start
+        return partition_file(fp, max(1, min(workers * 4, size // min_partition_bytes)), start)
+
+    with cf.ProcessPoolExecutor(max_workers=workers) as ex:
+        customer_futs = [
+            ex.submit(_customers_partition, customers_csv, s, e, fieldnames)
+            for s, e in parts_for(customers_csv, len(header))
+        ]
+        order_futs = [
+            ex.submit(_orders_partition, orders_json, s, e, decoder) for s, e in parts_for(orders_json)
+        ]
+
+        # Merge in partition order so dedupe keeps the first-seen row, as in run_batch
+        customers: Dict[str, Customer] = {}
+        for fut in customer_futs:
+            for c in fut.result():
+                customers.setdefault(c.customer_id, c)
+        try:
+            s = merge_summaries(fut.result() for fut in order_futs)
+        except NotLineDelimited:
+            for fut in order_futs:
+                fut.cancel()
+            print(f"{orders_json} is not line-delimited; summarizing orders serially")
+            s = summarize_orders(iter_orders(orders_json, decoder))
+
+    cleaned_rows = [
+        {"customer_id": c.customer_id, "name": c.name, "email": c.email,
+         "region": regions.get(c.customer_id) or "UNK"}
+        for c in customers.values()
+    ]
+    write_output(out, "cleaned_customers", cleaned_rows, fmt)
+    summary_rows = [
+        {"customer_id": cid, "order_count": cnt, "total_amount": round(total, 2)}
+        for cid, (cnt, total) in sorted(s.items())
+    ]
+    write_output(out, "customer_order_summary", summary_rows, fmt)
+    return len(cleaned_rows), len(summary_rows)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingest customers/orders and write cleaned outputs.")
+    parser.add_argument("--customers", type=Path, default=DATA / "customers.csv", help="Customers CSV")
+    parser.add_argument("--orders", type=Path, default=DATA / "orders.json", help="Orders JSON array or JSON Lines")
+    parser.add_argument("--out", type=Path, default=OUT, help="Output directory (default: output/)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="Constant-memory mode: parse incrementally and write outputs in chunks",
+    )
+    mode.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel mode: parse byte-range partitions in N processes (0 = all cores)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per write in --stream mode")
+    parser.add_argument(
+        "--engine",
+        choices=list(engines.ENGINES),
+        default=engines.default_engine(),
+        help="Group-by/join backend for the batch mode (default: $PIPELINE_ENGINE or python)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(columnar.FORMATS),
+        default="csv",
+        help="Output format; parquet/arrow are typed columnar files and need pyarrow",
+    )
+    parser.add_argument(
+        "--decoder",
+        choices=decoders.CHOICES,
+        default=decoders.default_decoder(),
+        help="JSON decoder for orders (default: $PIPELINE_DECODER or auto = msgspec > orjson > json)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    customers_csv: Path = args.customers
+    orders_json: Path = args.orders
+    out: Path = args.out
+    if not customers_csv.exists() or not orders_json.exists():
+        raise SystemExit("Missing input files. Ensure data/ contains customers.csv and orders.json")
+    if args.format != "csv" and not columnar.available():
+        raise SystemExit(f"--format {args.format} needs pyarrow: pip install pyarrow")
+    if args.engine != "python" and (args.stream or args.workers is not None):
+        raise SystemExit("--engine applies to the batch mode only")
+    try:
+        engines.get_engine(args.engine)
+        decoder = decoders.get_decoder(args.decoder, "order").name
+    except RuntimeError as exc:  # engine/decoder library not installed
+        raise SystemExit(str(exc))
+    out.mkdir(parents=True, exist_ok=True)
+
+    fmt = args.format
+    if args.stream:
+        n_customers, n_summaries = run_streaming(customers_csv, orders_json, out, args.chunk_size, fmt, decoder)
+    elif args.workers is not None:
+        n_customers, n_summaries = run_parallel(
+            customers_csv, orders_json, out, args.workers, fmt=fmt, decoder=decoder
+        )
+    else:
+        n_customers, n_summaries = run_batch(customers_csv, orders_json, out, fmt, args.engine, decoder)
 
-    print(f"Wrote {len(cleaned_rows)} customers → {OUT/'cleaned_customers.csv'}")
-    print(f"Wrote {len(summary_rows)} customer summaries → {OUT/'customer_order_summary.csv'}")
+    print(f"Wrote {n_customers} customers → {columnar.output_path(out, 'cleaned_customers', fmt)}")
+    print(f"Wrote {n_summaries} customer summaries → {columnar.output_path(out, 'customer_order_summary', fmt)}")
 
 
 if __name__ == "__main__":
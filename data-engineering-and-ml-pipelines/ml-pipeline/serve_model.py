@@ -15,6 +15,15 @@ from fastapi import FastAPI, HTTPException, Query
 ROOT = Path(__file__).resolve().parent
 MODEL_FP = ROOT / "model_store" / "model.json"
 
+# Opt-in profiling (REQUEST_PROFILING, SAMPLING_PROFILER, ALLOC_TRACKING): importable
+# when performance-considerations/src is on PYTHONPATH; see its README
+try:
+    import alloc_tracking
+    import request_profiling
+    import sampling_profiler
+except ImportError:
+    alloc_tracking = request_profiling = sampling_profiler = None  # type: ignore
+
 app = FastAPI(title="Widgetizer ML Demo", version="0.1.0")
 
 
@@ -39,3 +48,9 @@ def predict(x: float = Query(..., description="Input feature value")) -> dict:
     b = float(model.get("intercept", 0.0))
     y = m * x + b
     return {"x": x, "y": y, "model": {"slope": m, "intercept": b}}
+
+
+if request_profiling is not None:
+    alloc_tracking.install_from_env(app)
+    sampling_profiler.install_from_env(app)
+    request_profiling.install_from_env(app)
@@ -2,6 +2,8 @@
 
 No external ML libraries required. Uses closed-form simple linear regression.
 
+Orchestrators call ``train()`` in-process; it returns the fitted model.
+
 Run:
   python3 data-engineering-and-ml-pipelines/ml-pipeline/train_model.py
 """
@@ -11,6 +13,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 from random import random
+from typing import Optional
 from statistics import mean
 import json
 from datetime import datetime, timezone
@@ -58,11 +61,23 @@ def save_model(model: SimpleLinearModel, fp: Path) -> None:
         json.dump(payload, f, indent=2)
 
 
-def main() -> None:
-    xs, ys = generate_data()
+def load_model(fp: Path = STORE / "model.json") -> SimpleLinearModel:
+    payload = json.loads(fp.read_text(encoding="utf-8"))
+    return SimpleLinearModel(slope=payload["slope"], intercept=payload["intercept"])
+
+
+def train(n: int = 200, out: Optional[Path] = STORE / "model.json") -> SimpleLinearModel:
+    """Fit on ``n`` generated points and save to ``out`` (skipped if None)."""
+    xs, ys = generate_data(n)
     model = fit_simple_linear_regression(xs, ys)
+    if out is not None:
+        save_model(model, out)
+    return model
+
+
+def main() -> None:
     out = STORE / "model.json"
-    save_model(model, out)
+    model = train(out=out)
     print(f"Saved model to {out} (slope={model.slope:.3f}, intercept={model.intercept:.3f})")
 
 
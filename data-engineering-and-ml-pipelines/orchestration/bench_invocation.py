@@ -0,0 +1,97 @@
+"""Benchmark how an orchestrator task invokes the transform step.
+
+Per-call wall time (median of ``--repeat``) of running ingest_transform on
+the sample data, writing to a temp directory:
+
+  - subprocess: ``python ingest_transform.py`` in a new interpreter
+  - runpy: ``runpy.run_path(..., run_name="__main__")``, what the tasks
+    meant to do (the old tasks omitted run_name, so ``main()`` never ran);
+    recompiles the script and re-parses arguments every call
+  - in-process: ``ingest_transform.ingest()``, what the tasks call now
+
+and the hand-off to the next task: reading the CSV outputs back
+(``load_result``) vs taking the returned rows.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/orchestration/bench_invocation.py
+  python3 .../bench_invocation.py --repeat 50
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+INGEST_DIR = ROOT / "ingestion-and-transformation"
+SCRIPT = INGEST_DIR / "ingest_transform.py"
+
+sys.path.append(str(INGEST_DIR))
+import ingest_transform  # noqa: E402
+
+
+def run_subprocess(out: Path) -> None:
+    subprocess.run([sys.executable, str(SCRIPT), "--out", str(out)], check=True, stdout=subprocess.DEVNULL)
+
+
+def run_runpy(out: Path) -> None:
+    argv = sys.argv
+    sys.argv = [str(SCRIPT), "--out", str(out)]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(str(SCRIPT), run_name="__main__")
+    finally:
+        sys.argv = argv
+
+
+def run_in_process(out: Path) -> None:
+    ingest_transform.ingest(out=out)
+
+
+def median_ms(run: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        print(f"{'transform call':<28} {'ms/call':>9} {'vs in-process':>14}")
+        runs = {
+            "subprocess": lambda: run_subprocess(out),
+            "runpy.run_path": lambda: run_runpy(out),
+            "in-process ingest()": lambda: run_in_process(out),
+        }
+        times = {label: median_ms(run, args.repeat) for label, run in runs.items()}
+        base = times["in-process ingest()"]
+        for label, ms in times.items():
+            print(f"{label:<28} {ms:>9.3f} {ms / base:>13.1f}x")
+
+        result = ingest_transform.ingest(out=out)
+        assert ingest_transform.load_result(out) == result
+        reread = median_ms(lambda: ingest_transform.load_result(out), args.repeat)
+        print(f"\nhand-off to load: re-reading the output CSVs {reread:.3f} ms, the returned rows none")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark simple_orchestrator's DAG scheduler on synthetic DAGs.
+
+Builds random layered DAGs of ``--nodes`` tasks (each depends on up to
+``--max-deps`` tasks of earlier layers) and compares wall time of:
+
+  - the old loop: rescan every task until all are done, one at a time
+    (kept here as ``legacy_run_all``); O(n^2) checks per pass
+  - Orchestrator.run_all: sorted once, dependency counters, a worker pool
+
+Two workloads: no-op tasks, which time the scheduling itself, and tasks
+that sleep ``--task-ms`` (I/O-bound work), which show the concurrency. The
+critical path (longest chain of sleeps) is the floor for any worker count.
+A last run tags a quarter of the tasks "db" and limits them to 2 at once.
+The no-op workload is also timed with run metrics on (run_metrics.py,
+written to a temp file), which is their per-task overhead.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/orchestration/bench_orchestrator.py
+  python3 .../bench_orchestrator.py --nodes 5000 --workers 1 16 64
+"""
+
+from __future__ import annotations
+
+from functools import partial
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from pathlib import Path
+
+from run_metrics import RunMetrics, critical_path
+from simple_orchestrator import Orchestrator, Task
+
+
+def noop() -> None:
+    pass
+
+
+def make_dag(n: int, layers: int, max_deps: int, work: Callable[[], None], seed: int = 7,
+             db_share: float = 0.0) -> List[Task]:
+    rnd = random.Random(seed)
+    width = max(1, n // layers)
+    tasks: List[Task] = []
+    for i in range(n):
+        layer_start = (i // width) * width
+        deps = rnd.sample(range(layer_start), min(layer_start, rnd.randint(1, max_deps))) if layer_start else []
+        resources = ["db"] if rnd.random() < db_share else []
+        tasks.append(Task(f"t{i:05d}", work, deps=[f"t{d:05d}" for d in deps], resources=resources))
+    rnd.shuffle(tasks)  # definition order is not topological
+    return tasks
+
+
+def legacy_run_all(tasks: List[Task]) -> None:
+    """The pre-scheduler Orchestrator.run_all, without logging."""
+    by_name: Dict[str, Task] = {t.name: t for t in tasks}
+    done: List[str] = []
+    while len(done) < len(by_name):
+        scheduled = False
+        for name, task in by_name.items():
+            if name in done:
+                continue
+            if all(d in done for d in task.deps):
+                task.run()
+                done.append(name)
+                scheduled = True
+        if not scheduled:
+            raise RuntimeError("No runnable tasks")
+
+
+def floor(tasks: List[Task], seconds: float) -> float:
+    order = Orchestrator(tasks, log_fp=None).order()
+    return critical_path(order, {t.name: t.deps for t in tasks}, {t.name: seconds for t in tasks})[0]
+
+
+def timed(run: Callable[[], None]) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):  # START/DONE lines
+        t0 = time.perf_counter()
+        run()
+        return time.perf_counter() - t0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--layers", type=int, default=20)
+    parser.add_argument("--max-deps", type=int, default=3)
+    parser.add_argument("--task-ms", type=float, default=2.0, help="Sleep per task in the I/O workload")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"{args.nodes} tasks in {args.layers} layers, up to {args.max_deps} deps each\n")
+    print(f"{'no-op tasks':<32} {'wall s':>8} {'speed-up':>9}")
+    tasks = make_dag(args.nodes, args.layers, args.max_deps, noop)
+    base = timed(lambda: legacy_run_all(tasks))
+    print(f"{'old loop':<32} {base:>8.3f} {1:>8.1f}x")
+    for w in args.workers:
+        t = timed(lambda: Orchestrator(tasks, workers=w, log_fp=None).run_all())
+        print(f"{f'scheduler, {w} workers':<32} {t:>8.3f} {base / t:>8.1f}x")
+    with tempfile.TemporaryDirectory() as tmp, RunMetrics(Path(tmp) / "metrics.jsonl") as metrics:
+        w = max(args.workers)
+        t = timed(lambda: Orchestrator(tasks, workers=w, log_fp=None, metrics=metrics).run_all())
+        print(f"{f'scheduler, {w} workers + metrics':<32} {t:>8.3f} {base / t:>8.1f}x")
+
+    seconds = args.task_ms / 1000
+    sleep = partial(time.sleep, seconds)
+    tasks = make_dag(args.nodes, args.layers, args.max_deps, sleep)
+    print(f"\n{f'{args.task_ms:g}ms tasks':<32} {'wall s':>8} {'speed-up':>9}")
+    base = timed(lambda: legacy_run_all(tasks))
+    print(f"{'old loop':<32} {base:>8.3f} {1:>8.1f}x")
+    for w in args.workers:
+        t = timed(lambda: Orchestrator(tasks, workers=w, log_fp=None).run_all())
+        print(f"{f'scheduler, {w} workers':<32} {t:>8.3f} {base / t:>8.1f}x")
+    print(f"{'critical path (floor)':<32} {floor(tasks, seconds):>8.3f}")
+
+    tasks = make_dag(args.nodes, args.layers, args.max_deps, sleep, db_share=0.25)
+    w = max(args.workers)
+    t = timed(lambda: Orchestrator(tasks, workers=w, limits={"db": 2}, log_fp=None).run_all())
+    print(f"{f'{w} workers, db=2 (25% tagged)':<32} {t:>8.3f} {base / t:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark queue_orchestrator's worker processes on synthetic DAGs.
+
+Uses bench_orchestrator's random layered DAGs (``--nodes`` tasks in
+``--layers`` layers) and a fresh queue file per run in a temp directory:
+
+  - no-op tasks on one worker: the queue's own cost per task (lease,
+    complete and the dependents' update, each a SQLite transaction)
+  - tasks that sleep ``--task-ms`` on each of ``--workers`` processes:
+    throughput and speed-up over one worker, against the critical path
+    (the floor for any worker count)
+  - the same with one worker SIGKILLed a third of the way in: its task is
+    requeued and the run still completes
+
+Wall times include starting the worker processes.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/orchestration/bench_queue.py
+  python3 .../bench_queue.py --nodes 1000 --task-ms 50 --workers 1 4 16
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+import argparse
+import os
+import signal
+import tempfile
+import threading
+import time
+from typing import List
+
+from bench_orchestrator import floor, make_dag, noop
+from queue_orchestrator import Coordinator
+from simple_orchestrator import Task
+from task_queue import TaskQueue
+
+
+def run(tasks: List[Task], db: Path, workers: int, kill_after: float = 0.0) -> float:
+    coordinator = Coordinator(tasks, db=db, workers=workers, lease_s=2.0, cache=False, log_fp=None, echo=False)
+    if kill_after:
+        def kill() -> None:
+            time.sleep(kill_after)
+            os.kill(coordinator.procs[0].pid, signal.SIGKILL)
+
+        threading.Thread(target=kill, daemon=True).start()
+    t0 = time.perf_counter()
+    coordinator.run_all()
+    return time.perf_counter() - t0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=400)
+    parser.add_argument("--layers", type=int, default=8)
+    parser.add_argument("--max-deps", type=int, default=3)
+    parser.add_argument("--task-ms", type=float, default=20.0, help="Sleep per task")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"{args.nodes} tasks in {args.layers} layers, up to {args.max_deps} deps each\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        dbs = (Path(tmp) / f"queue{i}.sqlite" for i in range(1_000_000))
+
+        tasks = make_dag(args.nodes, args.layers, args.max_deps, noop)
+        t = run(tasks, next(dbs), 1)
+        print(f"no-op tasks, 1 worker: {t:.3f}s, {args.nodes / t:,.0f} tasks/s, {t / args.nodes * 1e3:.2f}ms per task\n")
+
+        seconds = args.task_ms / 1000
+        tasks = make_dag(args.nodes, args.layers, args.max_deps, partial(time.sleep, seconds))
+        print(f"{f'{args.task_ms:g}ms tasks':<24} {'wall s':>8} {'tasks/s':>9} {'speed-up':>9} {'efficiency':>11}")
+        base = 0.0
+        for w in args.workers:
+            t = run(tasks, next(dbs), w)
+            base = base or t * w  # one worker's time, estimated from the first row
+            print(f"{f'{w} workers':<24} {t:>8.3f} {args.nodes / t:>9,.0f} {base / t:>8.1f}x {base / t / w:>10.0%}")
+        print(f"{'critical path (floor)':<24} {floor(tasks, seconds):>8.3f}")
+
+        w = max(args.workers)
+        db = next(dbs)
+        t = run(tasks, db, w, kill_after=max(args.nodes * seconds / w / 3, 0.2))
+        queue = TaskQueue(db)
+        lost = sum(r["lost"] for r in queue.rows())
+        counts = queue.counts()
+        queue.close()
+        print(f"{f'{w} workers, 1 killed':<24} {t:>8.3f} {args.nodes / t:>9,.0f} {base / t:>8.1f}x "
+              f"  requeued {lost}, {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark the ways a load can place a file into the warehouse.
+
+Writes a ``--mb`` MB CSV into a temp directory (under ``--dir``, so on the
+warehouse's filesystem) and times copying it (best of ``--repeat``), with
+the peak Python memory (tracemalloc) of each:
+
+  - read_text/write_text: the old task_load, the whole file as a str
+  - each of warehouse_load.METHODS alone: link, reflink, copy_file_range, copy
+
+Methods the filesystem does not support are reported as such. A last line
+times ``publish`` of the file as a snapshot with the default fallbacks.
+
+Run:
+  python3 data-engineering-and-ml-pipelines/orchestration/bench_warehouse_load.py
+  python3 .../bench_warehouse_load.py --mb 1000 --dir /mnt/btrfs
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from warehouse_load import METHODS, copy_file, publish
+
+ROOT = Path(__file__).resolve().parent
+
+
+def write_csv(fp: Path, mb: int) -> None:
+    line = "".join(f"{i},customer {i},c{i}@example.com,EU\n" for i in range(1000)).encode()
+    with fp.open("wb") as f:
+        f.write(b"customer_id,name,email,region\n")
+        for _ in range(mb * (1 << 20) // len(line)):
+            f.write(line)
+
+
+def old_load(src: Path, dst: Path) -> str:
+    dst.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
+    return "read_text/write_text"
+
+
+def best(run: Callable[[Path], str], tmp: Path, repeat: int) -> Tuple[float, int]:
+    """(best seconds, peak traced bytes); raises OSError if the method is unsupported."""
+    secs = float("inf")
+    peak = 0
+    for i in range(repeat):
+        dst = tmp / f"dst{i}.csv"
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        try:
+            run(dst)
+            secs = min(secs, time.perf_counter() - t0)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+            dst.unlink(missing_ok=True)
+    return secs, peak
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", type=Path, default=ROOT, help="Where to put the temp files (default: orchestration/)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        tmpdir = Path(tmp)
+        src = tmpdir / "src.csv"
+        write_csv(src, args.mb)
+        size = src.stat().st_size
+        print(f"{size / 1e6:.0f}MB CSV in {tmpdir.parent}\n")
+        print(f"{'method':<24} {'seconds':>9} {'MB/s':>9} {'peak MB':>8}")
+        runs = {"read_text/write_text": lambda dst: old_load(src, dst)}
+        for method in METHODS:
+            runs[method] = lambda dst, method=method: copy_file(src, dst, (method,))
+        for label, run in runs.items():
+            try:
+                secs, peak = best(run, tmpdir, args.repeat)
+            except OSError:
+                print(f"{label:<24} {'unsupported here':>28}")
+                continue
+            print(f"{label:<24} {secs:>9.4f} {size / 1e6 / secs:>9,.0f} {peak / 1e6:>8.1f}")
+
+        t0 = time.perf_counter()
+        snap = publish([src], tmpdir / "warehouse")
+        print(f"\npublish snapshot {snap.path.name}: {time.perf_counter() - t0:.4f}s via {snap.methods['src.csv']}")
+
+
+if __name__ == "__main__":
+    main()
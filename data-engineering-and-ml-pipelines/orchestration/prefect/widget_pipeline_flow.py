@@ -1,5 +1,12 @@
 """Prefect flow mirroring the simple orchestrator.
 
+transform and train share the simple orchestrator's task cache
+(orchestration/task_cache.py): they are skipped when their inputs, code
+and params are unchanged since a run by any of the orchestrators.
+transform and train call ``ingest_transform.ingest`` / ``train_model.train``
+in-process, and the flow hands the model to evaluate. load publishes a
+warehouse snapshot (orchestration/warehouse_load.py).
+
 Run locally:
   python3 data-engineering-and-ml-pipelines/orchestration/prefect/widget_pipeline_flow.py
 """
@@ -7,7 +14,7 @@ Run locally:
 from __future__ import annotations
 
 from pathlib import Path
-import runpy
+import sys
 from datetime import datetime, timezone
 
 from prefect import flow, task
@@ -18,6 +25,17 @@ INGEST_DIR = ROOT / "ingestion-and-transformation"
 ORCH_DIR = ROOT / "orchestration"
 ML_DIR = ROOT / "ml-pipeline"
 
+sys.path.append(str(ORCH_DIR))
+from task_cache import INGEST_OUT, SPECS, TABLES, TaskCache  # noqa: E402
+from warehouse_load import publish  # noqa: E402
+
+sys.path.append(str(INGEST_DIR))
+sys.path.append(str(ML_DIR))
+import ingest_transform  # noqa: E402
+import train_model  # noqa: E402
+
+CACHE = TaskCache()
+
 
 @task
 def extract() -> None:
@@ -28,32 +46,30 @@ def extract() -> None:
 
 
 @task
-def transform() -> None:
-    runpy.run_path(str(INGEST_DIR / "ingest_transform.py"))
-    print("transform: completed ingest_transform.py")
+@CACHE.cached("transform", SPECS["transform"])
+def transform() -> ingest_transform.IngestResult:
+    result = ingest_transform.ingest()
+    print("transform: completed ingest_transform.ingest,", len(result.customers), "customers")
+    return result
 
 
 @task
 def load() -> None:
-    src = INGEST_DIR / "output"
-    wh = ORCH_DIR / "warehouse_prefect"
-    wh.mkdir(parents=True, exist_ok=True)
-    for name in ["cleaned_customers.csv", "customer_order_summary.csv"]:
-        (wh / name).write_text((src / name).read_text(encoding="utf-8"), encoding="utf-8")
-    print("load: copied files to", wh)
+    snap = publish([INGEST_OUT / name for name in TABLES], ORCH_DIR / "warehouse_prefect")
+    print("load:", "published" if snap.published else "unchanged", snap.path, snap.methods or "")
 
 
 @task
-def train() -> None:
-    runpy.run_path(str(ML_DIR / "train_model.py"))
+@CACHE.cached("train", SPECS["train"])
+def train() -> train_model.SimpleLinearModel:
+    model = train_model.train()
     print("train: model trained")
+    return model
 
 
 @task
-def evaluate() -> None:
-    model_fp = ML_DIR / "model_store" / "model.json"
-    size = model_fp.stat().st_size if model_fp.exists() else 0
-    print("evaluate: model size bytes", size)
+def evaluate(model: train_model.SimpleLinearModel) -> None:
+    print(f"evaluate: slope={model.slope:.6f} intercept={model.intercept:.6f}")
 
 
 @flow(name="widget-pipeline-prefect")
@@ -65,8 +81,7 @@ def widget_pipeline_flow() -> None:
     train_f = train.submit()
     # fan-in
     load_f.result()
-    train_f.result()
-    evaluate()
+    evaluate(train_f.result())
     dt = datetime.now(timezone.utc)
     print("flow completed at", dt.isoformat().replace("+00:00", "Z"))
 
@@ -0,0 +1,314 @@
+"""Run the pipeline DAG on worker processes that share a durable SQLite queue.
+
+Run:
+  # A coordinator and 4 local worker processes
+  python3 data-engineering-and-ml-pipelines/orchestration/queue_orchestrator.py --workers 4
+
+  # Add a worker to the running queue from another shell (same machine)
+  python3 data-engineering-and-ml-pipelines/orchestration/queue_orchestrator.py --join
+
+  # After a failure or a crash: keep the done tasks, run the rest
+  python3 data-engineering-and-ml-pipelines/orchestration/queue_orchestrator.py --resume --workers 4
+
+The coordinator loads the DAG into ``output/queue.sqlite`` (see
+task_queue.py), starts the workers and watches them; it does not schedule.
+Each worker leases the next ready task, renews the lease from a heartbeat
+thread while the task runs, then completes or fails it, and the queue
+readies the dependents. A task gets ``--deadline`` seconds (or its
+``--timeout`` plus one lease); past that the heartbeat stops, so a hung
+task's lease runs out. When a worker process dies, or holds a lease that
+ran out, the coordinator hands its task to the others at once, replacing
+a hung worker with a new one; a worker it did not start (``--join``) is
+covered by its lease running out. A task that keeps hanging fails after
+``task_queue.MAX_LOST`` leases.
+
+Tasks run as in simple_orchestrator.py (the same ``pipeline_tasks``):
+dependency results passed as arguments (stored pickled in the queue), the
+task cache, retries with backoff and ``--timeout``; ``--limit`` caps tagged
+tasks across all workers. Per-task timings go to output/run_metrics.jsonl,
+one trace row per worker process.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+
+from run_metrics import RunMetrics, TaskRecord
+from simple_orchestrator import LOG, Orchestrator, Task, pipeline_tasks, prepare_call, result_params
+from task_cache import TaskCache
+from task_queue import LEASE_S, TaskQueue
+
+QUEUE_DB = LOG / "queue.sqlite"
+POLL_S = 0.05  # longest an idle worker waits before looking for work again
+DEADLINE_S = 3600.0  # a task without a timeout stops being heartbeated after this long
+
+
+def worker_id(pid: Optional[int] = None) -> str:
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+class _Log:
+    def __init__(self, log_fp: Optional[Path], echo: bool = True) -> None:
+        self.f = log_fp.open("a", encoding="utf-8", buffering=1) if log_fp is not None else None
+        self.echo = echo
+
+    def __call__(self, msg: str) -> None:
+        dt = datetime.now(timezone.utc)
+        line = f"{dt.isoformat().replace('+00:00','Z')} | {msg}\n"
+        if self.f is not None:
+            self.f.write(line)  # one write per line, appended: lines from several processes don't interleave
+        if self.echo:
+            print(line, end="", flush=True)
+
+    def close(self) -> None:
+        if self.f is not None:
+            self.f.close()
+
+
+def _heartbeat(db: Path, worker: str, lease_s: float, stop: threading.Event, current: Dict, log: _Log) -> None:
+    """Renew ``worker``'s lease until the running task (``current``) passes its deadline."""
+    queue = TaskQueue(db, lease_s)  # a connection of its own: sqlite3 connections stay in their thread
+    try:
+        while not stop.wait(lease_s / 3):
+            task, until = current.get("task"), current.get("until", float("inf"))
+            if time.time() < until:
+                queue.heartbeat(worker)
+            elif not current.get("overdue"):
+                current["overdue"] = True
+                log(f"OVERDUE {task} [{worker}]: past its deadline, lease left to run out")
+    finally:
+        queue.close()
+
+
+def work(
+    db: Path,
+    tasks: List[Task],
+    lease_s: float = LEASE_S,
+    cache: bool = True,
+    log_fp: Optional[Path] = LOG / "run.log",
+    echo: bool = True,
+    deadline_s: float = DEADLINE_S,
+) -> int:
+    """Lease and run tasks from the queue at ``db`` until none are left to run; returns how many ran here.
+
+    A task's lease is renewed for ``deadline_s`` seconds (its timeout plus
+    one lease if it has one), so one that hangs is handed to another worker.
+    """
+    by_name: Dict[str, Task] = {t.name: t for t in tasks}
+    me = worker_id()
+    log = _Log(log_fp, echo)
+    queue = TaskQueue(db, lease_s)
+    queue.register(me, os.getpid())
+    stop = threading.Event()
+    current: Dict = {}  # the running task and its deadline, read by the heartbeat thread
+    beat = threading.Thread(target=_heartbeat, args=(db, me, lease_s, stop, current, log), daemon=True)
+    beat.start()
+    task_cache = TaskCache() if cache else None
+    ran = 0
+    idle = 0.001
+    try:
+        while True:
+            lease = queue.lease(me)
+            if lease is None:
+                if queue.finished():
+                    return ran
+                time.sleep(idle)
+                idle = min(POLL_S, idle * 2)
+                continue
+            idle = 0.001
+            task = by_name[lease.name]
+            log(f"START {task.name} [{me}]" + (f" (attempt {lease.attempt})" if lease.attempt > 1 else ""))
+            start = time.time()
+            limit = deadline_s if task.timeout is None else task.timeout + lease_s
+            current.update(task=task.name, until=start + limit, overdue=False)
+            try:
+                run = prepare_call(task, queue.results(result_params(task)), task_cache, measured=True)
+                status, result, stats = run()
+            except Exception as exc:
+                outcome, delay = queue.fail(lease, repr(exc), {"start": start, "end": time.time(), "pid": os.getpid()})
+                if outcome == "retry":
+                    log(f"RETRY {task.name} in {delay:g}s (attempt {lease.attempt}/{task.retries + 1}): {exc!r}")
+                elif outcome == "failed":
+                    log(f"FAIL  {task.name}: {exc!r}")
+                continue
+            finally:
+                current.update(task=None, until=float("inf"))
+            ran += 1
+            if queue.complete(lease, status, result, stats):
+                log(f"DONE  {task.name} [{me}]" + (f" (cache {status})" if status in ("hit", "restored") else ""))
+            else:
+                log(f"STALE {task.name} [{me}]: lease expired, another worker has it")
+    finally:
+        stop.set()
+        beat.join()
+        queue.unregister(me)
+        queue.close()
+        log.close()
+
+
+class Coordinator:
+    """Load a DAG into the queue, run ``workers`` local worker processes on it and watch them.
+
+    A worker process that exits while holding a lease has its task put back
+    to ready for the others; one still alive with a lease that ran out (its
+    task hung past the deadline) is killed and replaced by a new worker. The
+    run ends when no task is waiting, ready or leased; like
+    ``Orchestrator.run_all``, it then raises if any failed.
+    """
+
+    def __init__(
+        self,
+        tasks: List[Task],
+        db: Path = QUEUE_DB,
+        workers: int = 2,
+        limits: Optional[Dict[str, int]] = None,
+        lease_s: float = LEASE_S,
+        cache: bool = True,
+        metrics: Optional[RunMetrics] = None,
+        resume: bool = False,
+        log_fp: Optional[Path] = LOG / "run.log",
+        echo: bool = True,
+        deadline_s: float = DEADLINE_S,
+    ) -> None:
+        self.tasks = tasks
+        self.db = db
+        self.workers = workers or os.cpu_count() or 1
+        self.limits = limits or {}
+        self.lease_s = lease_s
+        self.cache = cache
+        self.metrics = metrics
+        self.resume = resume
+        self.log_fp = log_fp
+        self.echo = echo
+        self.deadline_s = deadline_s
+        self.procs: List[multiprocessing.Process] = []
+
+    def run_all(self) -> None:
+        order = Orchestrator(self.tasks, log_fp=None, limits=self.limits).order()  # validates the DAG
+        began = time.time()
+        queue = TaskQueue(self.db, self.lease_s)
+        log = _Log(self.log_fp, self.echo)
+        if self.resume and queue.meta("run_id") is not None:
+            counts = queue.reopen()
+            log(f"QUEUE resumed run {queue.meta('run_id')}: {counts}")
+        else:
+            log(f"QUEUE run {queue.create(self.tasks, order, self.limits)}: {len(order)} tasks")
+        ctx = multiprocessing.get_context()
+        args = (self.db, self.tasks, self.lease_s, self.cache, self.log_fp, self.echo, self.deadline_s)
+        self.procs = [ctx.Process(target=work, args=args, name=f"worker-{i}") for i in range(self.workers)]
+        try:
+            for proc in self.procs:
+                proc.start()
+            released = set()
+            while not queue.finished():
+                for name, worker in queue.overdue():
+                    hung = next((p for p in self.procs if p.is_alive() and worker_id(p.pid) == worker), None)
+                    if hung is not None:
+                        log(f"HUNG  worker {worker}: {name} ran past its deadline; replacing the worker")
+                        hung.kill()
+                        hung.join()
+                        self.procs.append(ctx.Process(target=work, args=args, name=f"worker-{len(self.procs)}"))
+                        self.procs[-1].start()
+                for proc in self.procs:
+                    if proc.exitcode is not None and proc.pid not in released:
+                        released.add(proc.pid)
+                        names = queue.release_worker(worker_id(proc.pid))
+                        if proc.exitcode or names:
+                            log(f"LOST  worker {worker_id(proc.pid)} (exit code {proc.exitcode}); "
+                                f"requeued: {', '.join(names) or '-'}")
+                if len(released) == len(self.procs) and not queue.finished():
+                    raise RuntimeError("every worker exited with tasks left; re-run with --resume")
+                time.sleep(POLL_S)
+            for proc in self.procs:
+                proc.join()
+        finally:
+            for proc in self.procs:
+                if proc.is_alive():
+                    proc.terminate()
+                proc.join()
+            rows = queue.rows()
+            queue.close()
+            log.close()
+            if self.metrics is not None:
+                self._record([r for r in rows if r["stats"] and r["stats"]["start"] >= began], order)
+        failed = [r for r in rows if r["state"] == "failed"]
+        if failed:
+            blocked = [r["name"] for r in rows if r["state"] == "blocked"]
+            raise RuntimeError(
+                f"{len(failed)} task(s) failed: {', '.join(r['name'] for r in failed)}; "
+                f"not run: {', '.join(blocked) or '-'}; first error: {failed[0]['error']}. Fix and re-run with --resume"
+            )
+
+    def _record(self, rows: List[Dict], order: List[str]) -> None:
+        """Pass the timings of the tasks run (or failed) in this run to ``metrics``."""
+        deps = {t.name: list(t.deps) for t in self.tasks}
+        for row in sorted(rows, key=lambda r: r["stats"]["end"]):
+            status = row["status"] if row["state"] == "done" else "failed"
+            self.metrics.task(TaskRecord(
+                task=row["name"], status=status, deps=deps[row["name"]], ready=row["ready_at"] or row["stats"]["start"],
+                retries=max(0, row["attempts"] - 1), **row["stats"],
+            ))
+        self.metrics.finish(order, workers=self.workers, executor="queue", queue=str(self.db))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="Local worker processes (0 = all cores; default: 2)")
+    parser.add_argument("--join", action="store_true", help="Only run a worker on an existing queue (see --db)")
+    parser.add_argument("--resume", action="store_true", help="Keep the done tasks of the queue's run, run the rest")
+    parser.add_argument("--db", type=Path, default=QUEUE_DB, help="Queue file (default: output/queue.sqlite)")
+    parser.add_argument("--lease", type=float, default=LEASE_S, metavar="SECONDS",
+                        help=f"Lease length; a worker silent this long loses its task (default: {LEASE_S:g})")
+    parser.add_argument("--engine", choices=["python", "numpy", "pandas", "polars"], default=None,
+                        help="Backend for group-by/join steps; exported to tasks as PIPELINE_ENGINE")
+    parser.add_argument("--limit", action="append", default=[], metavar="TAG=N",
+                        help="Run at most N tasks tagged TAG at once, over all workers; repeatable")
+    parser.add_argument("--no-cache", action="store_true", help="Run every task even if its inputs are unchanged")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                        help="Kill a task attempt after SECONDS")
+    parser.add_argument("--deadline", type=float, default=DEADLINE_S, metavar="SECONDS",
+                        help="Hand a task that runs longer than this (and has no --timeout) to a new worker "
+                        f"(default: {DEADLINE_S:g})")
+    parser.add_argument("--metrics", type=Path, default=LOG / "run_metrics.jsonl",
+                        help="Append per-task timings as JSON lines here (default: output/run_metrics.jsonl)")
+    parser.add_argument("--trace", type=Path, default=None, help="Also write the run as Chrome trace-event JSON")
+    args = parser.parse_args()
+    try:
+        args.limits = {tag: int(n) for tag, n in (item.split("=", 1) for item in args.limit)}
+    except ValueError:
+        parser.error(f"--limit takes TAG=N, got {args.limit}")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if args.engine:
+        os.environ["PIPELINE_ENGINE"] = args.engine  # ingest()'s default engine, inherited by the workers
+    tasks = pipeline_tasks(args.timeout)
+    if args.join:
+        ran = work(args.db, tasks, args.lease, cache=not args.no_cache, deadline_s=args.deadline)
+        print(f"worker {worker_id()}: ran {ran} task(s)")
+        return
+    with RunMetrics(args.metrics) as metrics:
+        try:
+            Coordinator(
+                tasks, db=args.db, workers=args.workers, limits=args.limits, lease_s=args.lease,
+                cache=not args.no_cache, metrics=metrics, resume=args.resume, deadline_s=args.deadline,
+            ).run_all()
+        finally:
+            if metrics.summary:
+                print(metrics.format_report())
+            if args.trace:
+                metrics.write_trace(args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Per-task telemetry for orchestrator runs: timings, critical path, trace export.
+
+For each task the orchestrator records:
+
+  - queue_wait_s: from all dependencies done to the task starting (waiting
+    for a worker or a resource slot)
+  - wall_s / cpu_s: elapsed and CPU time of the task's thread
+  - rss_delta_bytes: change in resident memory of the process that ran it
+    (Linux ``/proc/self/statm``; None elsewhere). Tasks running at the same
+    time on threads share one process, so treat overlaps as approximate.
+  - retries: extra attempts before the recorded one
+
+Records go to a JSON Lines file through one buffered handle kept open for
+the run (``run_metrics.jsonl``, appended; one ``"event": "task"`` line per
+task and an ``"event": "run"`` summary). The summary carries the critical
+path: the chain of dependent tasks with the largest summed wall time, i.e.
+the floor for the run's wall time with unlimited workers.
+
+``write_trace`` exports the run as Chrome trace-event JSON (open in
+https://ui.perfetto.dev or chrome://tracing): one row per worker, a bar per
+task. ``format_report`` prints the table with a text Gantt chart.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    PAGE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):  # Windows
+    PAGE = 4096
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def measure(run: Callable[[], Tuple[str, Any]]) -> Tuple[str, Any, Dict[str, Any]]:
+    """Call ``run`` (returns (status, result)) in the worker; adds its timings."""
+    rss0 = rss_bytes()
+    cpu0 = time.thread_time()
+    start = time.time()
+    status, result = run()
+    end = time.time()
+    rss1 = rss_bytes()
+    stats = {
+        "start": start,
+        "end": end,
+        "cpu_s": time.thread_time() - cpu0,
+        "rss_delta_bytes": rss1 - rss0 if rss0 is not None and rss1 is not None else None,
+        "pid": os.getpid(),
+        "thread": threading.get_ident(),
+    }
+    return status, result, stats
+
+
+@dataclass
+class TaskRecord:
+    task: str
+    status: str  # ran | hit | restored (cache) | failed
+    deps: List[str]
+    ready: float  # epoch seconds
+    start: float
+    end: float
+    cpu_s: Optional[float] = None
+    rss_delta_bytes: Optional[int] = None
+    retries: int = 0
+    pid: int = 0
+    thread: int = 0
+
+    @property
+    def queue_wait_s(self) -> float:
+        return max(0.0, self.start - self.ready)
+
+    @property
+    def wall_s(self) -> float:
+        return self.end - self.start
+
+
+def critical_path(
+    order: Sequence[str], deps: Dict[str, Sequence[str]], durations: Dict[str, float]
+) -> Tuple[float, List[str]]:
+    """(length, tasks) of the longest chain of ``durations`` through ``deps``; ``order`` is topological."""
+    finish: Dict[str, float] = {}
+    via: Dict[str, Optional[str]] = {}
+    for name in order:
+        prev = max((d for d in deps.get(name, ()) if d in finish), key=finish.__getitem__, default=None)
+        finish[name] = durations.get(name, 0.0) + (finish[prev] if prev is not None else 0.0)
+        via[name] = prev
+    if not finish:
+        return 0.0, []
+    node: Optional[str] = max(finish, key=finish.__getitem__)
+    total = finish[node]
+    path = []
+    while node is not None:
+        path.append(node)
+        node = via[node]
+    return total, path[::-1]
+
+
+class RunMetrics:
+    """Collects one run's task records; writes them as JSON Lines as they arrive."""
+
+    def __init__(self, fp: Optional[Path] = None) -> None:
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records: List[TaskRecord] = []
+        self.summary: Dict[str, Any] = {}
+        self.start = time.time()
+        self.f = fp.open("a", encoding="utf-8", buffering=1 << 16) if fp is not None else None
+
+    def _emit(self, line: Dict[str, Any]) -> None:
+        if self.f is not None:
+            self.f.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def task(self, record: TaskRecord) -> None:
+        self.records.append(record)
+        line = {"event": "task", "run_id": self.run_id, **asdict(record)}
+        line.update(queue_wait_s=record.queue_wait_s, wall_s=record.wall_s)
+        self._emit(line)
+
+    def finish(self, order: Sequence[str], **info: Any) -> Dict[str, Any]:
+        """Close the run: compute the critical path and write the summary line."""
+        end = time.time()
+        by_name = {r.task: r for r in self.records}
+        length, path = critical_path(
+            [n for n in order if n in by_name],
+            {r.task: r.deps for r in self.records},
+            {r.task: r.wall_s for r in self.records},
+        )
+        busy = sum(r.wall_s for r in self.records)
+        wall = end - self.start
+        self.summary = {
+            "event": "run",
+            "run_id": self.run_id,
+            "start": self.start,
+            "end": end,
+            "wall_s": wall,
+            "busy_s": busy,
+            "parallelism": busy / wall if wall > 0 else 0.0,
+            "queue_wait_s": sum(r.queue_wait_s for r in self.records),
+            "critical_path": path,
+            "critical_path_s": length,
+            "tasks": len(self.records),
+            "failed": [r.task for r in self.records if r.status == "failed"],
+            **info,
+        }
+        self._emit(self.summary)
+        return self.summary
+
+    def close(self) -> None:
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+    def __enter__(self) -> "RunMetrics":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _lanes(self) -> Dict[Tuple[int, int], int]:
+        lanes: Dict[Tuple[int, int], int] = {}
+        for r in sorted(self.records, key=lambda r: r.start):
+            lanes.setdefault((r.pid, r.thread), len(lanes))
+        return lanes
+
+    def trace_events(self) -> Dict[str, Any]:
+        """The run as Chrome trace-event JSON: one thread row per worker, µs since the run start."""
+        lanes = self._lanes()
+        critical = set(self.summary.get("critical_path", ()))
+        events: List[Dict[str, Any]] = [
+            {"ph": "M", "name": "process_name", "pid": 0, "tid": 0, "args": {"name": f"run {self.run_id}"}}
+        ]
+        for (pid, _), lane in lanes.items():
+            events.append({"ph": "M", "name": "thread_name", "pid": 0, "tid": lane,
+                           "args": {"name": f"worker {lane} (pid {pid})"}})
+        for r in self.records:
+            event = {
+                "ph": "X",
+                "name": r.task,
+                "cat": r.status,
+                "pid": 0,
+                "tid": lanes[(r.pid, r.thread)],
+                "ts": (r.start - self.start) * 1e6,
+                "dur": r.wall_s * 1e6,
+                "args": {"status": r.status, "queue_wait_s": r.queue_wait_s, "cpu_s": r.cpu_s,
+                         "rss_delta_bytes": r.rss_delta_bytes, "retries": r.retries,
+                         "critical_path": r.task in critical},
+            }
+            if r.task in critical:
+                event["cname"] = "terrible"  # red in chrome://tracing
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, fp: Path) -> None:
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fp.write_text(json.dumps(self.trace_events()), encoding="utf-8")
+
+    def format_report(self, width: int = 40) -> str:
+        """Per-task table with a text Gantt bar (``-`` queued, ``#`` running, ``*`` on the critical path)."""
+        end = max((r.end for r in self.records), default=self.start)
+        span = max(end - self.start, 1e-9)
+        critical = set(self.summary.get("critical_path", ()))
+
+        def col(t: float) -> int:
+            return min(width - 1, int((t - self.start) / span * width))
+
+        lines = [f"{'task':<16} {'status':<9} {'queue s':>8} {'wall s':>8} {'cpu s':>8} {'rss MB':>7}  timeline"]
+        for r in sorted(self.records, key=lambda r: (r.start, r.task)):
+            bar = [" "] * width
+            for i in range(col(r.ready), col(r.start)):
+                bar[i] = "-"
+            for i in range(col(r.start), max(col(r.end), col(r.start) + 1)):
+                bar[i] = "*" if r.task in critical else "#"
+            cpu = f"{r.cpu_s:.3f}" if r.cpu_s is not None else "-"
+            rss = f"{r.rss_delta_bytes / 1e6:.1f}" if r.rss_delta_bytes is not None else "-"
+            lines.append(
+                f"{r.task:<16} {r.status:<9} {r.queue_wait_s:>8.3f} {r.wall_s:>8.3f} {cpu:>8} {rss:>7}  |{''.join(bar)}|"
+            )
+        s = self.summary
+        if s:
+            lines.append(
+                f"wall {s['wall_s']:.3f}s, busy {s['busy_s']:.3f}s ({s['parallelism']:.2f}x), "
+                f"critical path {s['critical_path_s']:.3f}s: {' > '.join(s['critical_path'])}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,87 @@
+"""Persisted per-task status of the last orchestrator run, for ``--resume``.
+
+``output/run_state.jsonl`` is a journal of the latest run: a header line,
+then one line per status change, ``done``, ``failed`` (after its retries),
+``blocked`` (a dependency failed) or ``running``, with the attempt count
+and last error. The last line for a task is its status; a task with none
+is pending. Lines are appended and flushed as they happen, so a crash or
+Ctrl-C leaves every finished task on record (a torn last line is ignored),
+and a change costs one short write however large the DAG.
+
+A resumed run skips the tasks that were ``done`` and runs the rest, i.e.
+the failed tasks and everything downstream of them. It trusts the saved
+state; tasks with a cache spec still re-check their inputs when they run.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import os
+import uuid
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class RunState:
+    def __init__(self, fp: Path) -> None:
+        self.fp = fp
+        self.run_id = uuid.uuid4().hex[:12]
+        self.resumed_from: Optional[str] = None
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.f = None
+
+    def load(self) -> Dict[str, Any]:
+        """{"run_id": ..., "tasks": {name: last entry}} of the saved run ({} if none)."""
+        state: Dict[str, Any] = {}
+        try:
+            with self.fp.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn write at a crash
+                    if "run" in entry:
+                        state = {"run_id": entry["run"], "tasks": dict(entry.get("done", {}))}
+                    elif state:
+                        state["tasks"][entry["task"]] = entry
+        except FileNotFoundError:
+            pass
+        return state
+
+    def start(self, names: Iterable[str], resume: bool = False) -> Set[str]:
+        """Begin a run over ``names``; returns the tasks to skip (done in the resumed run)."""
+        done: Dict[str, Dict[str, Any]] = {}
+        if resume:
+            previous = self.load()
+            self.resumed_from = previous.get("run_id")
+            done = {n: t for n, t in previous.get("tasks", {}).items() if t.get("status") == "done"}
+        names = list(names)
+        done = {n: t for n, t in done.items() if n in names}
+        self.tasks = dict(done)  # entries keep the run that did them
+        # Start a fresh journal (carrying the skipped tasks over), then append to it
+        header = {"run": self.run_id, "resumed_from": self.resumed_from, "started": _now(), "done": done}
+        self.fp.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.fp.with_name(f".{self.fp.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(header) + "\n", encoding="utf-8")
+        os.replace(tmp, self.fp)
+        self.f = self.fp.open("a", encoding="utf-8")
+        return set(done)
+
+    def mark(self, name: str, status: str, attempts: int, error: Optional[BaseException] = None) -> None:
+        entry = {"task": name, "status": status, "attempts": attempts, "run_id": self.run_id, "updated": _now()}
+        if error is not None:
+            entry["error"] = repr(error)
+        self.tasks[name] = entry
+        if self.f is not None:
+            self.f.write(json.dumps(entry) + "\n")
+            self.f.flush()
+
+    def close(self) -> None:
+        if self.f is not None:
+            self.f.close()
+            self.f = None
@@ -2,23 +2,90 @@
 
 Run:
   python3 data-engineering-and-ml-pipelines/orchestration/simple_orchestrator.py
+
+  # Attribute peak/retained memory to each task (tracemalloc)
+  python3 data-engineering-and-ml-pipelines/orchestration/simple_orchestrator.py --memory-report
+
+  # Run the transform steps on a vectorized engine (numpy, pandas or polars)
+  python3 data-engineering-and-ml-pipelines/orchestration/simple_orchestrator.py --engine numpy
+
+  # Run independent tasks (load, train) concurrently, at most one "cpu" task at a time
+  python3 data-engineering-and-ml-pipelines/orchestration/simple_orchestrator.py --workers 2 --limit cpu=1
+
+  # Also export the run as a Chrome trace (open in https://ui.perfetto.dev)
+  python3 data-engineering-and-ml-pipelines/orchestration/simple_orchestrator.py --trace /tmp/run_trace.json
+
+  # After a failed run: skip the tasks that finished, re-run the rest
+  python3 data-engineering-and-ml-pipelines/orchestration/simple_orchestrator.py --resume
+
+Tasks are plain functions; transform and train call ``ingest_transform.ingest``
+and ``train_model.train`` in-process, and a task that takes parameters named
+after its dependencies is passed their return values (evaluate gets the
+model) instead of re-reading the files. load publishes the transform's
+tables as a new warehouse snapshot, hard-linked rather than copied where
+the filesystem allows (see warehouse_load.py); readers use
+``warehouse/current``.
+
+Tasks with a cache spec (transform, train; see task_cache.py) are
+skipped when their inputs, code and params match a cached run, and their
+outputs are restored from the cache if needed. ``--no-cache`` runs them all.
+
+Each run appends per-task timings (queue wait, wall/CPU time, RSS delta)
+and its critical path to ``output/run_metrics.jsonl`` and prints them as a
+table with a text Gantt chart (see run_metrics.py).
+
+Failed tasks are retried with exponential backoff (per-task ``retries`` and
+``backoff``); ``--timeout`` kills attempts that run too long. A task that
+still fails stops only its dependents, and ``output/run_state.jsonl``
+records what finished, so ``--resume`` picks up from the failure (see
+run_state.py).
 """
 
 from __future__ import annotations
 
+from collections import Counter
+from contextlib import nullcontext
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Dict, List
-import runpy
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import concurrent.futures as cf
+import heapq
+import inspect
+import multiprocessing
+import os
+import sys
+import time
 from datetime import datetime, timezone
+from functools import partial
 
 
 ROOT = Path(__file__).resolve().parent
 LOG = ROOT / "output"
 LOG.mkdir(parents=True, exist_ok=True)
 
+sys.path.append(str(ROOT.parents[1] / "performance-considerations" / "src"))
+try:
+    from alloc_tracking import AllocationTracker
+except ImportError:
+    AllocationTracker = None  # type: ignore
+
+from run_metrics import RunMetrics, TaskRecord, measure  # noqa: E402
+from run_state import RunState  # noqa: E402
+from task_cache import INGEST_OUT, SPECS, TABLES, CacheSpec, TaskCache  # noqa: E402
+from warehouse_load import publish  # noqa: E402
 
-TaskFunc = Callable[[], None]
+sys.path.append(str(ROOT.parent / "ingestion-and-transformation"))
+sys.path.append(str(ROOT.parent / "ml-pipeline"))
+import ingest_transform  # noqa: E402
+import train_model  # noqa: E402
+
+
+TaskFunc = Callable[..., Any]
+BACKOFF_CAP = 60.0  # seconds
+# Timed-out attempts run in a fresh process, not a fork of this one: its
+# other threads (pool workers, a queue worker's heartbeat) may hold locks
+TIMEOUT_START = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
 
 
 @dataclass
@@ -26,33 +93,358 @@ class Task:
     name: str
     run: TaskFunc
     deps: List[str] = field(default_factory=list)
+    resources: List[str] = field(default_factory=list)  # tags; each holds one slot of its limit
+    cache: Optional[CacheSpec] = None  # inputs/outputs for skip-if-unchanged
+    retries: int = 0  # extra attempts after a failure
+    backoff: float = 1.0  # seconds before the first retry, doubled for each further one
+    timeout: Optional[float] = None  # seconds; the task then runs in a child process, killed on expiry
+
+
+class TaskTimeout(TimeoutError):
+    pass
+
+
+def _call(func: TaskFunc, kwargs: Dict[str, Any]) -> Tuple[str, Any]:
+    return "ran", func(**kwargs)
+
+
+def _unmeasured(run: Callable[[], Tuple[str, Any]]) -> Tuple[str, Any, None]:
+    return (*run(), None)
+
+
+def _child(run: Callable[[], Any], conn) -> None:
+    try:
+        out = (True, run())
+    except BaseException as exc:
+        out = (False, exc)
+    try:
+        conn.send(out)
+    except Exception as exc:  # result or exception not picklable
+        conn.send((False, RuntimeError(f"task result could not be sent back: {exc!r}")))
+    conn.close()
+
+
+def run_with_timeout(run: Callable[[], Any], timeout: float) -> Any:
+    """Run ``run`` in a child process; kill it and raise ``TaskTimeout`` after ``timeout`` seconds.
+
+    A thread cannot be stopped from outside, so this is how a hung task is
+    actually cancelled, whatever the executor. The child is started with
+    ``TIMEOUT_START``, so ``run`` and its result are pickled across.
+    """
+    ctx = multiprocessing.get_context(TIMEOUT_START)
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(run, send), daemon=True)
+    proc.start()
+    send.close()
+    try:
+        if not recv.poll(timeout):
+            raise TaskTimeout(f"timed out after {timeout:g}s")
+        ok, value = recv.recv()
+    except EOFError:
+        proc.join()
+        raise RuntimeError(f"task process exited with code {proc.exitcode}") from None
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        recv.close()
+    if not ok:
+        raise value
+    return value
+
+
+def result_params(task: Task) -> List[str]:
+    """The dependencies whose results ``task.run`` takes, as parameters named after them."""
+    try:
+        params = inspect.signature(task.run).parameters if task.deps else {}
+    except (TypeError, ValueError):  # builtins (e.g. partial(time.sleep, ...)) have no signature
+        params = {}
+    return [dep for dep in task.deps if dep in params]
+
+
+def prepare_call(
+    task: Task, results: Dict[str, Any], cache: Optional[TaskCache] = None, measured: bool = False
+) -> Callable[[], Tuple[str, Any, Optional[Dict[str, Any]]]]:
+    """``task``'s call returning (status, result, stats), through the cache, timings and timeout as set."""
+    kwargs = {dep: results.get(dep) for dep in result_params(task)}
+    run = partial(_call, task.run, kwargs)
+    if cache is not None and task.cache is not None:
+        run = partial(cache.run, task.name, task.cache, partial(task.run, **kwargs))
+    run = partial(measure, run) if measured else partial(_unmeasured, run)
+    if task.timeout is not None:
+        run = partial(run_with_timeout, run, task.timeout)
+    return run
 
 
 class Orchestrator:
-    def __init__(self, tasks: List[Task]):
+    """Run a DAG of tasks, up to ``workers`` at a time.
+
+    The graph is sorted once (Kahn's algorithm): each task keeps a count of
+    unfinished dependencies and becomes ready when it drops to zero, so a
+    run is O(tasks + edges). Ready tasks start in definition order on a
+    thread (or ``executor="process"``) pool; ``limits`` caps how many tasks
+    holding a resource tag run at once (e.g. ``{"cpu": 1}``). With one
+    worker tasks run inline, in the same order as before. Given a
+    ``cache``, tasks with a cache spec run through ``TaskCache.run``. Given
+    ``metrics``, each task's timings are measured where it runs and recorded.
+
+    A failed task is retried up to ``task.retries`` times, after
+    ``task.backoff`` seconds doubling per attempt (capped at BACKOFF_CAP),
+    without holding a worker while it waits. A task that still fails blocks
+    its dependents; the rest of the DAG runs, then ``run_all`` raises. Given
+    a ``state``, each task's status is journaled as it changes, and with
+    ``resume`` the tasks done in the saved run are skipped, except one whose
+    result a task still to run takes and that has no ``cache.load`` to get
+    it back: that one runs again.
+
+    A task's return value is kept in ``results`` and passed to dependents
+    whose function has a parameter of the task's name; it is dropped once
+    every dependent has started, unless nothing depends on the task.
+    """
+
+    def __init__(
+        self,
+        tasks: List[Task],
+        tracker: Optional["AllocationTracker"] = None,
+        workers: int = 1,
+        limits: Optional[Dict[str, int]] = None,
+        executor: str = "thread",
+        log_fp: Optional[Path] = LOG / "run.log",
+        cache: Optional[TaskCache] = None,
+        metrics: Optional[RunMetrics] = None,
+        state: Optional[RunState] = None,
+        resume: bool = False,
+    ):
         self.tasks: Dict[str, Task] = {t.name: t for t in tasks}
         self.done: List[str] = []
+        self.results: Dict[str, Any] = {}
+        self.tracker = tracker
+        self.workers = workers or os.cpu_count() or 1
+        self.limits = limits or {}
+        self.executor = executor
+        self.log_fp = log_fp
+        self.cache = cache
+        self.metrics = metrics
+        self.state = state
+        self.resume = resume
+        self._log_f = None
+        if tracker is not None and self.workers > 1:
+            raise ValueError("memory attribution needs tasks to run one at a time (workers=1)")
+        for task in tasks:
+            for tag in task.resources:
+                if self.limits.get(tag, 1) < 1:
+                    raise ValueError(f"task {task.name!r} needs {tag!r}, whose limit is {self.limits[tag]}")
+
+    def order(self) -> List[str]:
+        """Topological order (ties in definition order); raises on cycles or missing deps."""
+        missing = {n: [d for d in t.deps if d not in self.tasks] for n, t in self.tasks.items()}
+        missing = {n: deps for n, deps in missing.items() if deps}
+        if missing:
+            raise RuntimeError(f"No runnable tasks. Cycles or missing deps? {missing}")
+        pending = {n: len(t.deps) for n, t in self.tasks.items()}
+        dependents = self._dependents()
+        order = [n for n, count in pending.items() if not count]
+        for name in order:  # grows while iterating
+            for child in dependents[name]:
+                pending[child] -= 1
+                if not pending[child]:
+                    order.append(child)
+        if len(order) < len(self.tasks):
+            stuck = {n: [d for d in t.deps if pending[d]] for n, t in self.tasks.items() if pending[n]}
+            raise RuntimeError(f"No runnable tasks. Cycles or missing deps? {stuck}")
+        return order
+
+    def _dependents(self) -> Dict[str, List[str]]:
+        dependents: Dict[str, List[str]] = {n: [] for n in self.tasks}
+        for name, task in self.tasks.items():
+            for dep in task.deps:
+                dependents[dep].append(name)
+        return dependents
 
     def run_all(self) -> None:
-        while len(self.done) < len(self.tasks):
-            scheduled = False
-            for name, task in self.tasks.items():
-                if name in self.done:
+        order = self.order()
+        rank = {name: i for i, name in enumerate(order)}
+        pending = {n: len(t.deps) for n, t in self.tasks.items()}
+        dependents = self._dependents()
+        skip = self.state.start(order, self.resume) if self.state is not None else set()
+        rerun = self._needed_results(order, skip, dependents)
+        skip -= set(rerun)
+        ready = [rank[n] for n, count in pending.items() if not count]  # heap of ranks
+        heapq.heapify(ready)
+        delayed: List[Tuple[float, int]] = []  # heap of (due time, rank): retries waiting out their backoff
+        held: Counter = Counter()
+        consumers = {n: len(children) for n, children in dependents.items()}
+        running: Dict[cf.Future, str] = {}
+        calls: Dict[str, Callable[[], Any]] = {}
+        attempts: Counter = Counter()
+        failed: Dict[str, BaseException] = {}
+        now = time.time()
+        ready_at = {order[r]: now for r in ready}
+        started: Dict[str, float] = {}
+
+        def release(name: str) -> None:
+            self.done.append(name)
+            for child in dependents[name]:
+                pending[child] -= 1
+                if not pending[child]:
+                    heapq.heappush(ready, rank[child])
+                    ready_at[child] = time.time()
+
+        def consume(task: Task) -> None:
+            for dep in task.deps:
+                consumers[dep] -= 1
+                if not consumers[dep]:
+                    self.results.pop(dep, None)
+
+        pool = None
+        if self.workers > 1:
+            pool_cls = cf.ProcessPoolExecutor if self.executor == "process" else cf.ThreadPoolExecutor
+            pool = pool_cls(max_workers=self.workers)
+        if self.log_fp is not None:
+            self._log_f = self.log_fp.open("a", encoding="utf-8")
+        for name, child in rerun.items():
+            run_id = self.state.tasks[name].get("run_id")
+            self._log(f"RERUN {name}: done in run {run_id}, but {child} takes its result")
+        try:
+            while ready or running or delayed:
+                now = time.time()
+                while delayed and delayed[0][0] <= now:
+                    heapq.heappush(ready, heapq.heappop(delayed)[1])
+                # Start ready tasks in order while there are free workers and resource slots
+                blocked = []
+                while ready and len(running) < self.workers:
+                    r = heapq.heappop(ready)
+                    task = self.tasks[order[r]]
+                    if task.name in skip:
+                        self._log(f"SKIP  {task.name} (done in run {self.state.tasks[task.name].get('run_id')})")
+                        consume(task)
+                        if consumers[task.name] and task.cache is not None and task.cache.load is not None:
+                            self.results[task.name] = task.cache.load()
+                        release(task.name)
+                        continue
+                    if any(held[tag] >= self.limits.get(tag, self.workers) for tag in task.resources):
+                        blocked.append(r)
+                        continue
+                    held.update(task.resources)
+                    attempts[task.name] += 1
+                    tries = attempts[task.name]
+                    self._log(f"START {task.name}" + (f" (attempt {tries})" if tries > 1 else ""))
+                    if self.state is not None:
+                        self.state.mark(task.name, "running", tries)
+                    if task.name not in calls:
+                        calls[task.name] = self._prepare(task)
+                        consume(task)
+                    started[task.name] = time.time()
+                    running[self._submit(pool, task, calls[task.name])] = task.name
+                for r in blocked:
+                    heapq.heappush(ready, r)
+                if not running:
+                    if delayed:
+                        time.sleep(max(0.0, delayed[0][0] - time.time()))
                     continue
-                if all(d in self.done for d in task.deps):
-                    self._log(f"START {name}")
-                    task.run()
-                    self.done.append(name)
-                    self._log(f"DONE  {name}")
-                    scheduled = True
-            if not scheduled:
-                missing = {n: [d for d in t.deps if d not in self.done] for n, t in self.tasks.items() if n not in self.done}
-                raise RuntimeError(f"No runnable tasks. Cycles or missing deps? {missing}")
+                wait = max(0.0, delayed[0][0] - time.time()) if delayed else None
+                finished, _ = cf.wait(running, timeout=wait, return_when=cf.FIRST_COMPLETED)
+                for fut in sorted(finished, key=lambda f: rank[running[f]]):
+                    name = running.pop(fut)
+                    task = self.tasks[name]
+                    held.subtract(task.resources)
+                    tries = attempts[name]
+                    try:
+                        status, result, stats = fut.result()
+                    except Exception as exc:
+                        attempt = {"start": started[name], "end": time.time()}
+                        if tries <= task.retries:
+                            delay = min(BACKOFF_CAP, task.backoff * 2 ** (tries - 1))
+                            self._record(name, "retried", ready_at[name], attempt, tries)
+                            self._log(f"RETRY {name} in {delay:g}s (attempt {tries}/{task.retries + 1}): {exc!r}")
+                            ready_at[name] = time.time() + delay
+                            heapq.heappush(delayed, (ready_at[name], rank[name]))
+                            continue
+                        self._record(name, "failed", ready_at[name], attempt, tries)
+                        self._log(f"FAIL  {name}: {exc!r}")
+                        failed[name] = exc
+                        if self.state is not None:
+                            self.state.mark(name, "failed", tries, exc)
+                        continue
+                    self._record(name, status, ready_at[name], stats, tries)
+                    if result is not None:
+                        self.results[name] = result
+                    if self.state is not None:
+                        self.state.mark(name, "done", tries)
+                    self._log(f"DONE  {name}" + (f" (cache {status})" if status in ("hit", "restored") else ""))
+                    release(name)
+            blocked_tasks = [n for n in order if n not in failed and n not in self.done]
+            if self.state is not None and failed:
+                for name in blocked_tasks:
+                    self.state.mark(name, "blocked", 0)
+        finally:
+            if self.state is not None:
+                self.state.close()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if self.metrics is not None:
+                self.metrics.finish(
+                    order, workers=self.workers, executor=self.executor if pool else "inline", skipped=sorted(skip)
+                )
+            if self._log_f is not None:
+                self._log_f.close()
+                self._log_f = None
+        if failed:
+            first = next(iter(failed.values()))
+            raise RuntimeError(
+                f"{len(failed)} task(s) failed: {', '.join(failed)}; not run: {', '.join(blocked_tasks) or '-'}"
+                + (". Fix and re-run with --resume" if self.state is not None else "")
+            ) from first
+
+    def _needed_results(self, order: List[str], skip: set, dependents: Dict[str, List[str]]) -> Dict[str, str]:
+        """Skipped tasks that must run again: {task: a dependent that takes its result}.
+
+        A skipped task's result comes from its ``cache.load``; without one, a
+        dependent still to run would be passed None. Walking the order
+        backwards also re-runs the tasks those re-runs in turn take results from.
+        """
+        rerun: Dict[str, str] = {}
+        for name in reversed(order):
+            task = self.tasks[name]
+            if name not in skip or (task.cache is not None and task.cache.load is not None):
+                continue
+            for child in dependents[name]:
+                if (child not in skip or child in rerun) and name in result_params(self.tasks[child]):
+                    rerun[name] = child
+                    break
+        return dict(reversed(rerun.items()))
+
+    def _record(
+        self, name: str, status: str, ready: float, stats: Optional[Dict[str, Any]], attempts: int = 1
+    ) -> None:
+        if self.metrics is None or stats is None:
+            return
+        self.metrics.task(TaskRecord(
+            task=name, status=status, deps=list(self.tasks[name].deps), ready=ready, retries=attempts - 1, **stats
+        ))
+
+    def _prepare(self, task: Task) -> Callable[[], Tuple[str, Any, Optional[Dict[str, Any]]]]:
+        """The task's call with its dependencies' results bound; reused for retries."""
+        return prepare_call(task, self.results, self.cache, measured=self.metrics is not None)
+
+    def _submit(self, pool, task: Task, run: Callable[[], Any]) -> cf.Future:
+        if pool is not None:
+            return pool.submit(run)
+        fut: cf.Future = cf.Future()  # one worker: run inline, where the tracker sees it
+        try:
+            with self.tracker.stage(task.name) if self.tracker else nullcontext():
+                result = run()
+        except BaseException as exc:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+        return fut
 
     def _log(self, msg: str) -> None:
         dt = datetime.now(timezone.utc)
         line = f"{dt.isoformat().replace('+00:00','Z')} | {msg}\n"
-        (LOG / "run.log").open("a", encoding="utf-8").write(line)
+        if self._log_f is not None:
+            self._log_f.write(line)
         print(line, end="")
 
 
@@ -64,45 +456,152 @@ def task_extract() -> None:
     (LOG / "extract.ok").write_text(f"customers={len(customers)} bytes orders={len(orders)} bytes", encoding="utf-8")
 
 
-def task_transform() -> None:
-    # Execute the ingestion/transform script in-process
-    script = ROOT.parent / "ingestion-and-transformation" / "ingest_transform.py"
-    runpy.run_path(str(script))
-    (LOG / "transform.ok").write_text("transform complete", encoding="utf-8")
+def task_transform() -> "ingest_transform.IngestResult":
+    # Run the ingestion/transform in-process
+    result = ingest_transform.ingest()
+    (LOG / "transform.ok").write_text(
+        f"transform complete: {len(result.customers)} customers, {len(result.summary)} summaries", encoding="utf-8"
+    )
+    return result
 
 
 def task_load() -> None:
-    # Simulate loading into a warehouse by copying files into an area
-    wh = ROOT / "warehouse"
-    wh.mkdir(parents=True, exist_ok=True)
-    src = ROOT.parent / "ingestion-and-transformation" / "output"
-    for name in ("cleaned_customers.csv", "customer_order_summary.csv"):
-        content = (src / name).read_text(encoding="utf-8")
-        (wh / name).write_text(content, encoding="utf-8")
-    (LOG / "load.ok").write_text("warehouse loaded", encoding="utf-8")
-
-
-def task_train() -> None:
-    script = ROOT.parent / "ml-pipeline" / "train_model.py"
-    runpy.run_path(str(script))
+    # Simulate loading into a warehouse: publish the transform's files as a snapshot
+    snap = publish([INGEST_OUT / name for name in TABLES], ROOT / "warehouse")
+    if snap.published:
+        placed = ", ".join(f"{name} ({method})" for name, method in snap.methods.items())
+        msg = f"warehouse loaded: snapshot {snap.path.name}, {placed}"
+    else:
+        msg = f"warehouse unchanged: snapshot {snap.path.name}"
+    (LOG / "load.ok").write_text(msg, encoding="utf-8")
+
+
+def task_train() -> "train_model.SimpleLinearModel":
+    model = train_model.train()
     (LOG / "train.ok").write_text("model trained", encoding="utf-8")
+    return model
 
 
-def task_evaluate() -> None:
-    model_fp = ROOT.parent / "ml-pipeline" / "model_store" / "model.json"
-    data = model_fp.read_text(encoding="utf-8") if model_fp.exists() else "{}"
-    (LOG / "evaluate.ok").write_text(f"model bytes={len(data)}", encoding="utf-8")
+def task_evaluate(train: Optional["train_model.SimpleLinearModel"] = None) -> None:
+    model = train or train_model.load_model()
+    (LOG / "evaluate.ok").write_text(
+        f"model slope={model.slope:.6f} intercept={model.intercept:.6f}", encoding="utf-8"
+    )
 
 
-def main() -> None:
-    tasks = [
-        Task("extract", task_extract),
-        Task("transform", task_transform, deps=["extract"]),
-        Task("load", task_load, deps=["transform"]),
-        Task("train", task_train, deps=["transform"]),
-        Task("evaluate", task_evaluate, deps=["train", "load"]),
+def pipeline_tasks(timeout: Optional[float] = None) -> List[Task]:
+    """The demo DAG, also run by queue_orchestrator.py's workers."""
+    return [
+        Task("extract", task_extract, timeout=timeout),
+        Task("transform", task_transform, deps=["extract"], resources=["cpu"], cache=SPECS["transform"],
+             retries=2, timeout=timeout),
+        Task("load", task_load, deps=["transform"], resources=["warehouse"], retries=3, backoff=0.5,
+             timeout=timeout),
+        Task("train", task_train, deps=["transform"], resources=["cpu"], cache=SPECS["train"], retries=2,
+             timeout=timeout),
+        Task("evaluate", task_evaluate, deps=["train", "load"], timeout=timeout),
     ]
-    Orchestrator(tasks).run_all()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the demo pipeline DAG.")
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="Report peak/retained traced memory per task (writes output/memory_report.json)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy", "pandas", "polars"],
+        default=None,
+        help="Backend for group-by/join steps; exported to tasks as PIPELINE_ENGINE",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run up to N ready tasks at once (0 = all cores; default: 1, one at a time)",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Pool for --workers > 1 (default: thread)",
+    )
+    parser.add_argument(
+        "--limit",
+        action="append",
+        default=[],
+        metavar="TAG=N",
+        help="Run at most N tasks tagged TAG at once (tags: cpu, warehouse); repeatable",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Run every task even if its inputs are unchanged (see task_cache.py)",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=LOG / "run_metrics.jsonl",
+        help="Append per-task timings as JSON lines here (default: output/run_metrics.jsonl)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help="Also write the run as Chrome trace-event JSON (open in ui.perfetto.dev)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the tasks done in the last run (see --state); re-run failed ones and their dependents",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=LOG / "run_state.jsonl",
+        help="Per-task status of the run, saved as it changes (default: output/run_state.jsonl)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Kill a task attempt after SECONDS (each attempt then runs in a child process)",
+    )
+    args = parser.parse_args()
+    if args.memory_report and args.workers != 1:
+        parser.error("--memory-report attributes memory per task, so it needs --workers 1")
+    try:
+        args.limits = {tag: int(n) for tag, n in (item.split("=", 1) for item in args.limit)}
+    except ValueError:
+        parser.error(f"--limit takes TAG=N, got {args.limit}")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if args.engine:
+        os.environ["PIPELINE_ENGINE"] = args.engine  # ingest()'s default engine
+    tasks = pipeline_tasks(args.timeout)
+    cache = None if args.no_cache else TaskCache()
+    if args.memory_report and AllocationTracker is None:
+        raise SystemExit("--memory-report needs performance-considerations/src/alloc_tracking.py")
+    tracker = AllocationTracker() if args.memory_report else None
+    with RunMetrics(args.metrics) as metrics, tracker or nullcontext():
+        try:
+            Orchestrator(
+                tasks, tracker=tracker, workers=args.workers, limits=args.limits, executor=args.executor,
+                cache=cache, metrics=metrics, state=RunState(args.state), resume=args.resume,
+            ).run_all()
+        finally:
+            print(metrics.format_report())
+            if args.trace:
+                metrics.write_trace(args.trace)
+    if tracker is not None:
+        print(tracker.format_report())
+        tracker.write_json(LOG / "memory_report.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+"""Content-addressed cache for pipeline tasks: skip a task when nothing it reads changed.
+
+A task declares a ``CacheSpec``: its input files, code files, the
+environment variables that act as params, and the files it writes. Its key
+is the SHA-256 of the task name, the contents of every input and code file,
+the param values and the output paths. After a run each output is stored
+once under ``cache/objects/<sha256 of its content>``, and
+``cache/tasks/<task>/<key>.json`` maps output paths to those objects.
+
+When a task's key has a manifest, the task is skipped: outputs that still
+match are left alone, and missing or changed ones are copied back from the
+objects (e.g. after ``make clean`` or a run with other inputs). A spec's
+``load`` rebuilds the task's in-memory result from those outputs, so
+downstream tasks get the same value either way. Files are only re-hashed
+when their size or mtime changed since the last run.
+
+The cache lives in ``orchestration/cache`` (or ``$PIPELINE_CACHE_DIR``) and
+is shared by simple_orchestrator.py and the Airflow and Prefect variants,
+which use the same ``SPECS``: a transform run by one is a hit for the
+others. ``--no-cache`` on simple_orchestrator.py runs everything.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import functools
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import sys
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]  # data-engineering-and-ml-pipelines/
+CACHE_DIR = Path(os.getenv("PIPELINE_CACHE_DIR", ROOT / "orchestration" / "cache"))
+
+Stat = Tuple[int, int]  # (size, mtime_ns)
+
+
+@dataclass
+class CacheSpec:
+    inputs: Sequence[Path] = ()
+    code: Sequence[Path] = ()
+    env: Sequence[str] = ()  # environment variables that change the outputs
+    outputs: Sequence[Path] = ()
+    load: Optional[Callable[[], Any]] = None  # the task's result, from its outputs (on a hit)
+
+
+def _rel(fp: Path) -> str:
+    """Path relative to the project, so keys match whichever orchestrator runs the task."""
+    try:
+        return str(fp.resolve().relative_to(ROOT))
+    except ValueError:
+        return str(fp.resolve())
+
+
+def _stat(fp: Path) -> Stat:
+    st = fp.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def hash_file(fp: Path) -> str:
+    h = hashlib.sha256()
+    with fp.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class TaskCache:
+    def __init__(self, cache_dir: Path = CACHE_DIR) -> None:
+        self.dir = cache_dir
+        self.objects = cache_dir / "objects"
+        self.tasks = cache_dir / "tasks"
+
+    def _digests(self, files: Sequence[Path], known: Dict[str, List]) -> Dict[str, List]:
+        """{relative path: [sha256, size, mtime_ns]}, reusing ``known`` hashes of unchanged files."""
+        out = {}
+        for fp in files:
+            rel = _rel(fp)
+            try:
+                stat = _stat(fp)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"cached task input {rel} does not exist") from None
+            prev = known.get(rel)
+            digest = prev[0] if prev and tuple(prev[1:]) == stat else hash_file(fp)
+            out[rel] = [digest, *stat]
+        return out
+
+    def key(self, name: str, spec: CacheSpec, known: Optional[Dict[str, List]] = None) -> Tuple[str, Dict]:
+        """(cache key, file digests) of a task as it would run now."""
+        files = self._digests([*spec.inputs, *spec.code], known or {})
+        material = {
+            "task": name,
+            "files": {rel: d[0] for rel, d in sorted(files.items())},
+            "env": {var: os.getenv(var) for var in sorted(spec.env)},
+            "outputs": sorted(_rel(fp) for fp in spec.outputs),
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest(), files
+
+    def _read(self, fp: Path) -> Optional[Dict]:
+        try:
+            return json.loads(fp.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, fp: Path, body: Dict) -> None:
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        tmp = fp.with_name(f".{fp.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(body, indent=2), encoding="utf-8")
+        os.replace(tmp, fp)
+
+    def _store(self, fp: Path, digest: str) -> None:
+        obj = self.objects / digest[:2] / digest
+        if obj.exists():
+            return  # same content already cached (by this or another task)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        tmp = obj.with_name(f".{digest}.{os.getpid()}.tmp")
+        shutil.copyfile(fp, tmp)
+        os.replace(tmp, obj)
+
+    def _restore(self, manifest: Dict) -> Optional[int]:
+        """Bring outputs back to the cached content; None if an object is gone."""
+        restored = 0
+        for rel, (digest, *stat) in manifest["outputs"].items():
+            fp = ROOT / rel
+            try:
+                if _stat(fp) == tuple(stat) or hash_file(fp) == digest:
+                    continue
+            except FileNotFoundError:
+                pass
+            obj = self.objects / digest[:2] / digest
+            if not obj.exists():
+                return None
+            fp.parent.mkdir(parents=True, exist_ok=True)
+            tmp = fp.with_name(f".{fp.name}.{os.getpid()}.tmp")
+            shutil.copyfile(obj, tmp)
+            os.replace(tmp, fp)
+            manifest["outputs"][rel] = [digest, *_stat(fp)]
+            restored += 1
+        return restored
+
+    def run(self, name: str, spec: CacheSpec, func: Callable[[], Any]) -> Tuple[str, Any]:
+        """Run ``func`` unless its key is cached; returns ("hit" | "restored" | "ran", result)."""
+        task_dir = self.tasks / name
+        latest = self._read(task_dir / "latest.json") or {}
+        key, files = self.key(name, spec, latest.get("files"))
+        manifest = self._read(task_dir / f"{key}.json")
+        if manifest is not None:
+            restored = self._restore(manifest)
+            if restored is not None:
+                manifest["files"] = files
+                self._write(task_dir / "latest.json", manifest)
+                return "restored" if restored else "hit", spec.load() if spec.load else None
+        result = func()
+        outputs = {}
+        for fp in spec.outputs:
+            if not fp.exists():
+                raise RuntimeError(f"task {name!r} did not write its declared output {_rel(fp)}")
+            digest = hash_file(fp)
+            self._store(fp, digest)
+            outputs[_rel(fp)] = [digest, *_stat(fp)]
+        manifest = {"key": key, "files": files, "outputs": outputs}
+        self._write(task_dir / f"{key}.json", manifest)
+        self._write(task_dir / "latest.json", manifest)
+        return "ran", result
+
+    def cached(self, name: str, spec: CacheSpec) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator: run the task through the cache, printing skips (Airflow/Prefect tasks).
+
+        The wrapper returns the task's result, or ``spec.load()`` on a hit
+        (None without a loader).
+        """
+
+        def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(func)
+            def cached(*args, **kwargs) -> Any:
+                status, result = self.run(name, spec, functools.partial(func, *args, **kwargs))
+                if status != "ran":
+                    print(f"{name}: cache {status}, skipped")
+                return result
+
+            return cached
+
+        return decorate
+
+
+# --- the widget pipeline's tasks, shared by the three orchestrators ---
+INGEST_DIR = ROOT / "ingestion-and-transformation"
+ML_DIR = ROOT / "ml-pipeline"
+INGEST_OUT = INGEST_DIR / "output"
+TABLES = ("cleaned_customers.csv", "customer_order_summary.csv")
+MODEL = ML_DIR / "model_store" / "model.json"
+
+
+def _module(directory: Path, name: str):
+    if str(directory) not in sys.path:
+        sys.path.append(str(directory))
+    return importlib.import_module(name)
+
+
+def load_transform():
+    """``ingest_transform.IngestResult`` of the cached transform outputs."""
+    return _module(INGEST_DIR, "ingest_transform").load_result(INGEST_OUT)
+
+
+def load_model():
+    """``train_model.SimpleLinearModel`` of the cached model file."""
+    return _module(ML_DIR, "train_model").load_model(MODEL)
+
+
+SPECS: Dict[str, CacheSpec] = {
+    "transform": CacheSpec(
+        inputs=[INGEST_DIR / "data" / "customers.csv", INGEST_DIR / "data" / "orders.json"],
+        code=[INGEST_DIR / f"{m}.py" for m in ("ingest_transform", "columnar", "decoders", "engines")],
+        env=["PIPELINE_ENGINE"],
+        outputs=[INGEST_OUT / name for name in TABLES],
+        load=load_transform,
+    ),
+    "train": CacheSpec(code=[ML_DIR / "train_model.py"], outputs=[MODEL], load=load_model),
+}
@@ -0,0 +1,357 @@
+"""A durable SQLite task queue, for running a DAG on several worker processes.
+
+The queue is one SQLite file (WAL mode) holding the whole run: a row per
+task with its state, its count of unfinished dependencies and its lease,
+plus the dependency edges. A task goes
+
+  waiting (dependencies unfinished) -> ready -> leased -> done | failed
+
+or to ``blocked`` when a task upstream of it failed. Every transition is a
+transaction, so the queue is consistent whichever process dies when:
+
+  - ``lease`` hands a worker the first ready task (by topological rank)
+    inside ``BEGIN IMMEDIATE``, so no two workers get the same one, and
+    respects per-tag limits across all workers
+  - the worker holds it for ``lease_s`` seconds, renewed by ``heartbeat``
+    while the task runs and is within its deadline; a lease that runs out
+    (the worker died, or the task overran its deadline) puts the task back
+    to ready for another worker, and its late completion is ignored (each
+    lease has its own token)
+  - ``complete`` marks the task done and, in the same transaction, readies
+    the dependents it was the last dependency of; ``fail`` schedules a
+    retry after the task's backoff, or marks it failed and its descendants
+    blocked
+
+Results are stored pickled, so a dependent on any worker can read them.
+``reopen`` makes a stopped run runnable again: done tasks stay done,
+leased/failed/blocked ones are reset. Commits use ``synchronous=NORMAL``:
+durable across process crashes, the last commits may be lost on power loss.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import pickle
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LEASE_S = 10.0
+MAX_LOST = 3  # leases a task may lose (its worker died or it overran) before it counts as failed
+BACKOFF_CAP = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS tasks (
+    name TEXT PRIMARY KEY,
+    rank INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    pending INTEGER NOT NULL,
+    resources TEXT NOT NULL DEFAULT '',
+    retries INTEGER NOT NULL DEFAULT 0,
+    backoff REAL NOT NULL DEFAULT 1.0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lost INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    ready_at REAL,
+    lease TEXT,
+    worker TEXT,
+    lease_until REAL,
+    status TEXT,
+    result BLOB,
+    stats TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_state_rank ON tasks (state, rank);
+CREATE TABLE IF NOT EXISTS edges (
+    parent TEXT NOT NULL,
+    child TEXT NOT NULL,
+    PRIMARY KEY (parent, child)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_child ON edges (child);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER,
+    started REAL,
+    heartbeat REAL,
+    stopped REAL
+);
+"""
+
+DESCENDANTS = """
+WITH RECURSIVE down(name) AS (
+    SELECT child FROM edges WHERE parent = ?
+    UNION SELECT edges.child FROM edges JOIN down ON edges.parent = down.name
+)
+"""
+
+
+@dataclass
+class Lease:
+    name: str
+    token: str
+    attempt: int
+    ready_at: float
+
+
+class TaskQueue:
+    """One process's (or thread's) connection to the queue file ``db``."""
+
+    def __init__(self, db: Path, lease_s: float = LEASE_S) -> None:
+        self.path = db
+        self.lease_s = lease_s
+        db.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(db), timeout=60, isolation_level=None)  # transactions are explicit
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._limits: Optional[Dict[str, int]] = None
+
+    def close(self) -> None:
+        self.db.close()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        self.db.execute("BEGIN IMMEDIATE")  # take the write lock now: no upgrade deadlocks
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    # --- the coordinator's side ---
+    def create(self, tasks: Sequence[Any], order: Sequence[str], limits: Optional[Dict[str, int]] = None) -> str:
+        """Replace the queue's contents with a run of ``tasks`` (with name, deps, resources, retries,
+        backoff); ``order`` is topological. Returns the run id."""
+        run_id = uuid.uuid4().hex[:12]
+        rank = {name: i for i, name in enumerate(order)}
+        now = time.time()
+        with self._write() as db:
+            for table in ("tasks", "edges", "workers", "meta"):
+                db.execute(f"DELETE FROM {table}")
+            db.executemany(
+                "INSERT INTO tasks (name, rank, state, pending, resources, retries, backoff, ready_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (t.name, rank[t.name], "waiting" if t.deps else "ready", len(t.deps), ",".join(t.resources),
+                     t.retries, t.backoff, None if t.deps else now)
+                    for t in tasks
+                ],
+            )
+            db.executemany("INSERT INTO edges VALUES (?, ?)", [(d, t.name) for t in tasks for d in t.deps])
+            db.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("run_id", run_id), ("created", str(now)), ("limits", json.dumps(limits or {}))],
+            )
+        return run_id
+
+    def reopen(self) -> Dict[str, int]:
+        """Reset a stopped run so its unfinished tasks run again; returns the task counts by state."""
+        now = time.time()
+        with self._write() as db:
+            db.execute(
+                "UPDATE tasks SET state = 'ready', lease = NULL, worker = NULL, lease_until = NULL,"
+                " attempts = 0, lost = 0, not_before = 0, error = NULL WHERE state != 'done'"
+            )
+            db.execute(
+                "UPDATE tasks SET pending = (SELECT count(*) FROM edges JOIN tasks AS parent"
+                " ON parent.name = edges.parent WHERE edges.child = tasks.name AND parent.state != 'done')"
+                " WHERE state != 'done'"
+            )
+            db.execute("UPDATE tasks SET state = 'waiting', ready_at = NULL WHERE state = 'ready' AND pending > 0")
+            db.execute("UPDATE tasks SET ready_at = ? WHERE state = 'ready'", (now,))
+            db.execute("UPDATE workers SET stopped = ? WHERE stopped IS NULL", (now,))
+        return self.counts()
+
+    def release_worker(self, worker: str) -> List[str]:
+        """Put the tasks leased by ``worker`` (known to be dead) back to ready now; returns those requeued."""
+        with self._write() as db:
+            names = [r[0] for r in db.execute(
+                "SELECT name FROM tasks WHERE state = 'leased' AND worker = ?", (worker,)
+            )]
+            db.execute("UPDATE tasks SET lease_until = 0 WHERE state = 'leased' AND worker = ?", (worker,))
+            self._expire(time.time())
+            db.execute("UPDATE workers SET stopped = ? WHERE id = ?", (time.time(), worker))
+            failed = {r[0] for r in db.execute("SELECT name FROM tasks WHERE state = 'failed'")}
+        return [name for name in names if name not in failed]
+
+    def overdue(self) -> List[Tuple[str, str]]:
+        """(task, worker) for each lease that ran out and has not been handed out again yet."""
+        return self.db.execute(
+            "SELECT name, worker FROM tasks WHERE state = 'leased' AND lease_until < ?", (time.time(),)
+        ).fetchall()
+
+    # --- the workers' side ---
+    def register(self, worker: str, pid: int) -> None:
+        now = time.time()
+        with self._write() as db:
+            db.execute("INSERT OR REPLACE INTO workers VALUES (?, ?, ?, ?, NULL)", (worker, pid, now, now))
+
+    def unregister(self, worker: str) -> None:
+        with self._write() as db:
+            db.execute("UPDATE workers SET stopped = ? WHERE id = ?", (time.time(), worker))
+
+    def _expire(self, now: float) -> None:
+        """Hand out again the leases that ran out; a task that lost too many fails."""
+        db = self.db
+        expired = db.execute(
+            "SELECT name, lost, worker FROM tasks WHERE state = 'leased' AND lease_until < ?", (now,)
+        ).fetchall()
+        for name, lost, worker in expired:
+            if lost + 1 >= MAX_LOST:
+                self._fail(name, f"lost its lease {lost + 1} times, worker died or task hung (last: {worker})")
+                continue
+            db.execute(
+                "UPDATE tasks SET state = 'ready', lost = lost + 1, lease = NULL, worker = NULL,"
+                " lease_until = NULL, ready_at = ? WHERE name = ?",
+                (now, name),
+            )
+
+    def _has_work(self, now: float) -> bool:
+        """Whether ``lease`` could find something, without taking the write lock (idle polling)."""
+        return self.db.execute(
+            "SELECT EXISTS (SELECT 1 FROM tasks WHERE state = 'ready' AND not_before <= ?)"
+            " OR EXISTS (SELECT 1 FROM tasks WHERE state = 'leased' AND lease_until < ?)",
+            (now, now),
+        ).fetchone()[0]
+
+    def limits(self) -> Dict[str, int]:
+        if self._limits is None:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'limits'").fetchone()
+            self._limits = json.loads(row[0]) if row else {}
+        return self._limits
+
+    def lease(self, worker: str, scan: int = 64) -> Optional[Lease]:
+        """Lease the first ready task whose resource tags have a free slot; None if there is none now."""
+        now = time.time()
+        if not self._has_work(now):
+            return None
+        limits = self.limits()
+        with self._write() as db:
+            self._expire(now)
+            held: Counter = Counter()
+            if limits:
+                for (resources,) in db.execute("SELECT resources FROM tasks WHERE state = 'leased'"):
+                    held.update(filter(None, resources.split(",")))
+            rows = db.execute(
+                "SELECT name, resources, attempts, ready_at FROM tasks WHERE state = 'ready' AND not_before <= ?"
+                " ORDER BY rank LIMIT ?",
+                (now, scan),
+            ).fetchall()
+            for name, resources, attempts, ready_at in rows:
+                tags = list(filter(None, resources.split(",")))
+                if any(held[tag] >= limits[tag] for tag in tags if tag in limits):
+                    continue
+                token = uuid.uuid4().hex
+                db.execute(
+                    "UPDATE tasks SET state = 'leased', lease = ?, worker = ?, lease_until = ?,"
+                    " attempts = attempts + 1 WHERE name = ?",
+                    (token, worker, now + self.lease_s, name),
+                )
+                return Lease(name, token, attempts + 1, ready_at or now)
+        return None
+
+    def heartbeat(self, worker: str) -> None:
+        """Renew ``worker``'s leases."""
+        now = time.time()
+        with self._write() as db:
+            db.execute(
+                "UPDATE tasks SET lease_until = ? WHERE state = 'leased' AND worker = ?", (now + self.lease_s, worker)
+            )
+            db.execute("UPDATE workers SET heartbeat = ? WHERE id = ?", (now, worker))
+
+    def results(self, names: Iterable[str]) -> Dict[str, Any]:
+        names = list(names)
+        if not names:
+            return {}
+        rows = self.db.execute(
+            f"SELECT name, result FROM tasks WHERE name IN ({','.join('?' * len(names))})", names
+        ).fetchall()
+        return {name: pickle.loads(blob) if blob is not None else None for name, blob in rows}
+
+    def complete(self, lease: Lease, status: str, result: Any, stats: Optional[Dict[str, Any]]) -> bool:
+        """Mark the task done and ready its dependents; False if the lease was lost meanwhile."""
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL) if result is not None else None
+        now = time.time()
+        with self._write() as db:
+            cur = db.execute(
+                "UPDATE tasks SET state = 'done', status = ?, result = ?, stats = ?, error = NULL, lease = NULL,"
+                " lease_until = NULL WHERE name = ? AND lease = ?",
+                (status, blob, json.dumps(stats) if stats else None, lease.name, lease.token),
+            )
+            if not cur.rowcount:
+                return False
+            db.execute(
+                "UPDATE tasks SET pending = pending - 1 WHERE name IN (SELECT child FROM edges WHERE parent = ?)",
+                (lease.name,),
+            )
+            db.execute(
+                "UPDATE tasks SET state = 'ready', ready_at = ? WHERE state = 'waiting' AND pending = 0"
+                " AND name IN (SELECT child FROM edges WHERE parent = ?)",
+                (now, lease.name),
+            )
+        return True
+
+    def fail(self, lease: Lease, error: str, stats: Optional[Dict[str, Any]] = None) -> Tuple[str, float]:
+        """Record a failed attempt: ("retry", delay), ("failed", 0) or ("stale", 0) if the lease was lost."""
+        with self._write() as db:
+            row = db.execute(
+                "SELECT attempts, retries, backoff FROM tasks WHERE name = ? AND lease = ?", (lease.name, lease.token)
+            ).fetchone()
+            if row is None:
+                return "stale", 0.0
+            attempts, retries, backoff = row
+            db.execute("UPDATE tasks SET stats = ? WHERE name = ?", (json.dumps(stats) if stats else None, lease.name))
+            if attempts <= retries:
+                delay = min(BACKOFF_CAP, backoff * 2 ** (attempts - 1))
+                due = time.time() + delay
+                db.execute(
+                    "UPDATE tasks SET state = 'ready', not_before = ?, ready_at = ?, error = ?, lease = NULL,"
+                    " worker = NULL, lease_until = NULL WHERE name = ?",
+                    (due, due, error, lease.name),
+                )
+                return "retry", delay
+            self._fail(lease.name, error)
+        return "failed", 0.0
+
+    def _fail(self, name: str, error: str) -> None:
+        self.db.execute(
+            "UPDATE tasks SET state = 'failed', error = ?, lease = NULL, lease_until = NULL WHERE name = ?",
+            (error, name),
+        )
+        self.db.execute(
+            DESCENDANTS + "UPDATE tasks SET state = 'blocked' WHERE state IN ('waiting', 'ready')"
+            " AND name IN (SELECT name FROM down)",
+            (name,),
+        )
+
+    # --- progress ---
+    def counts(self) -> Dict[str, int]:
+        return dict(self.db.execute("SELECT state, count(*) FROM tasks GROUP BY state").fetchall())
+
+    def finished(self) -> bool:
+        """No task is waiting, ready or leased (all are done, failed or blocked)."""
+        return not self.db.execute(
+            "SELECT EXISTS (SELECT 1 FROM tasks WHERE state IN ('waiting', 'ready', 'leased'))"
+        ).fetchone()[0]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Every task's row (without results), in rank order."""
+        cur = self.db.execute(
+            "SELECT name, state, status, attempts, lost, ready_at, worker, stats, error FROM tasks ORDER BY rank"
+        )
+        cols = [c[0] for c in cur.description]
+        rows = [dict(zip(cols, r)) for r in cur]
+        for row in rows:
+            row["stats"] = json.loads(row["stats"]) if row["stats"] else None
+        return rows
+
+    def meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
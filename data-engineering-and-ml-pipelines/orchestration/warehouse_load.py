@@ -0,0 +1,147 @@
+"""Publish pipeline outputs to a warehouse directory as versioned snapshots.
+
+A load builds ``<warehouse>/.<version>.<pid>.tmp/`` and renames it to
+``<warehouse>/<version>/`` in one step, so a snapshot is either absent or
+complete; readers take ``latest(warehouse)`` (or the ``current`` symlink,
+repointed after each publish) and never see a half-loaded table. Versions
+are UTC timestamps, so they sort by age; the ``keep`` newest are kept.
+
+Files are placed without reading them into Python, trying in order:
+
+  - ``os.link``: a hard link, no data copied (same filesystem only)
+  - reflink (``FICLONE`` ioctl): a copy-on-write clone on btrfs/XFS/...
+  - ``os.copy_file_range``: the kernel copies, no user-space buffers
+  - ``shutil.copyfileobj``: a streamed copy, works everywhere
+
+Hard links share the source's inode, which is safe because the pipeline
+replaces its outputs (write to a temp file, then ``os.replace``) rather
+than rewriting them in place. A load whose sources match the latest
+snapshot publishes nothing.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+import filecmp
+import os
+import shutil
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int), linux/fs.h
+METHODS = ("link", "reflink", "copy_file_range", "copy")
+CURRENT = "current"
+
+
+@dataclass
+class Snapshot:
+    path: Path
+    published: bool  # False: the sources matched the latest snapshot
+    methods: Dict[str, str] = field(default_factory=dict)  # file name -> how it was placed
+
+
+def _reflink(fsrc, fdst) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:  # EOPNOTSUPP, EXDEV, EINVAL: not a CoW filesystem
+        return False
+
+
+def _copy_file_range(fsrc, fdst) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    size = os.fstat(fsrc.fileno()).st_size
+    copied = 0
+    try:
+        while copied < size:
+            n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+            if n == 0:
+                break  # source shrank
+            copied += n
+    except OSError:  # ENOSYS, EXDEV (older kernels), EINVAL
+        if not copied:
+            return False
+        shutil.copyfileobj(fsrc, fdst)  # both positions are past the copied part
+    return True
+
+
+def copy_file(src: Path, dst: Path, methods: Sequence[str] = METHODS) -> str:
+    """Create ``dst`` with the content of ``src`` by the first of ``methods`` that works; returns it."""
+    if "link" in methods:
+        try:
+            os.link(src, dst)
+            return "link"
+        except OSError:  # EXDEV across filesystems, EPERM, no hard links (FAT)
+            pass
+    with src.open("rb") as fsrc, dst.open("wb") as fdst:
+        if "reflink" in methods and _reflink(fsrc, fdst):
+            return "reflink"
+        if "copy_file_range" in methods and _copy_file_range(fsrc, fdst):
+            return "copy_file_range"
+        if "copy" not in methods:
+            raise OSError(f"none of {', '.join(methods)} can copy {src} to {dst}")
+        shutil.copyfileobj(fsrc, fdst, 1 << 20)
+        return "copy"
+
+
+def snapshots(warehouse: Path) -> List[Path]:
+    """Published snapshot directories of ``warehouse``, oldest first."""
+    if not warehouse.is_dir():
+        return []
+    return sorted(p for p in warehouse.iterdir() if p.is_dir() and not p.is_symlink() and not p.name.startswith("."))
+
+
+def latest(warehouse: Path) -> Optional[Path]:
+    found = snapshots(warehouse)
+    return found[-1] if found else None
+
+
+def _unchanged(sources: Sequence[Path], snapshot: Optional[Path]) -> bool:
+    if snapshot is None or sorted(p.name for p in snapshot.iterdir()) != sorted(p.name for p in sources):
+        return False
+    for src in sources:
+        dst = snapshot / src.name
+        if not (os.path.samefile(src, dst) or filecmp.cmp(src, dst, shallow=False)):
+            return False
+    return True
+
+
+def _point_current(warehouse: Path, snapshot: Path) -> None:
+    tmp = warehouse / f".{CURRENT}.{os.getpid()}.tmp"
+    try:
+        tmp.unlink(missing_ok=True)
+        tmp.symlink_to(snapshot.name, target_is_directory=True)
+        os.replace(tmp, warehouse / CURRENT)
+    except OSError:
+        tmp.unlink(missing_ok=True)  # no symlinks here (e.g. Windows without the privilege): latest() still works
+
+
+def publish(sources: Sequence[Path], warehouse: Path, keep: int = 3, methods: Sequence[str] = METHODS) -> Snapshot:
+    """Publish ``sources`` as a new snapshot of ``warehouse`` unless the latest one has the same files."""
+    warehouse.mkdir(parents=True, exist_ok=True)
+    current = latest(warehouse)
+    if _unchanged(sources, current):
+        return Snapshot(current, published=False)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    stage = warehouse / f".{version}.{os.getpid()}.tmp"
+    stage.mkdir()
+    try:
+        placed = {src.name: copy_file(src, stage / src.name, methods) for src in sources}
+        target = warehouse / version
+        os.rename(stage, target)  # the publish: fails rather than merge into an existing snapshot
+    except BaseException:
+        shutil.rmtree(stage, ignore_errors=True)
+        raise
+    _point_current(warehouse, target)
+    for old in snapshots(warehouse)[:-keep] if keep > 0 else []:
+        shutil.rmtree(old, ignore_errors=True)
+    return Snapshot(target, published=True, methods=placed)
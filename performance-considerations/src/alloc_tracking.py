@@ -0,0 +1,308 @@
+"""Attribute tracemalloc allocations to the stage, task or request that made them.
+
+``profiling.memory_profile`` reports one process-wide current/peak pair. Here
+each unit of work runs inside ``tracker.stage(name)``; the active stage lives
+in a ``ContextVar`` so it follows asyncio tasks and work handed to threads
+with a copied context (``asyncio.to_thread``, Starlette's threadpool). On
+exit a stage records:
+
+  - peak_bytes: highest traced memory above the stage's starting point
+  - retained_bytes: traced memory still held when the stage finished
+  - top_sites: (optional) lines that allocated the retained memory, from a
+    snapshot diff labelled with the stage path
+
+Nested stages are reported as ``parent/child``. tracemalloc's counters and
+``reset_peak`` are process-wide, so only one top-level stage (with its
+nested stages) is attributed at a time, like ``RequestProfilerMiddleware``
+profiles one request at a time. A stage that starts while another one is
+attributed runs untracked and only counts as ``unsampled``. What other
+threads allocate while a stage is attributed still lands in that stage, so
+under concurrent load a route's numbers include its neighbours' allocations.
+
+Used by ``simple_orchestrator.py --memory-report`` and
+``AllocationMiddleware`` for API requests (``install_from_env``).
+
+Run the demo:
+  python performance-considerations/src/alloc_tracking.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from request_profiling import Authorize, route_key, send_unauthorized
+
+_IGNORED = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+
+@dataclass
+class StageStats:
+    stage: str
+    calls: int = 0
+    unsampled: int = 0  # calls that overlapped another attributed stage
+    peak_bytes: int = 0  # max over calls
+    retained_bytes: int = 0  # summed over calls
+    top_sites: List[str] = field(default_factory=list)  # from the most recent call
+
+
+class _Frame:
+    """One active stage on the context stack."""
+
+    def __init__(self, path: str, start: int, snapshot: Optional[tracemalloc.Snapshot],
+                 sampled: bool = True) -> None:
+        self.path = path
+        self.start = start
+        self.snapshot = snapshot
+        self.sampled = sampled
+        self.peak_seen = start  # peak observed before a nested stage reset it
+
+
+_stack: ContextVar[Tuple[_Frame, ...]] = ContextVar("alloc_stage_stack", default=())
+
+
+def current_stage() -> Optional[str]:
+    stack = _stack.get()
+    return stack[-1].path if stack else None
+
+
+class AllocationTracker:
+    def __init__(self, top_sites: int = 3, frames: int = 1) -> None:
+        self.top_sites = top_sites
+        self.frames = frames
+        self._stats: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()  # held by the attributed top-level stage
+        self._owns_tracing = False
+
+    def start(self) -> "AllocationTracker":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns_tracing = True
+        return self
+
+    def stop(self) -> None:
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def __enter__(self) -> "AllocationTracker":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Optional[_Frame]]:
+        """Attribute allocations inside the block to ``name``.
+
+        Yields the stage frame; set ``frame.path`` before exit to relabel it.
+        """
+        if not tracemalloc.is_tracing():
+            yield None  # tracker not started: zero overhead passthrough
+            return
+        stack = _stack.get()
+        path = f"{stack[-1].path}/{name}" if stack else name
+        if not (stack[-1].sampled if stack else self._busy.acquire(blocking=False)):
+            frame = _Frame(path, 0, None, sampled=False)
+            token = _stack.set(stack + (frame,))
+            try:
+                yield frame
+            finally:
+                _stack.reset(token)
+                with self._lock:
+                    self._record(frame.path).unsampled += 1
+            return
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                parent = stack[-1]
+                parent.peak_seen = max(parent.peak_seen, peak)
+            snapshot = self._snapshot() if self.top_sites else None
+            frame = _Frame(path, current, snapshot)
+            tracemalloc.reset_peak()
+            token = _stack.set(stack + (frame,))
+            try:
+                yield frame
+            finally:
+                _stack.reset(token)
+                self._finish(frame, stack[-1] if stack else None)
+        finally:
+            if not stack:
+                self._busy.release()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def _finish(self, frame: _Frame, parent: Optional[_Frame]) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame.peak_seen)
+        sites: List[str] = []
+        if frame.snapshot is not None:
+            diff = self._snapshot().compare_to(frame.snapshot, "lineno")
+            grown = (d for d in diff if d.size_diff > 0 and not _bookkeeping(d.traceback[0]))
+            sites = [str(d) for _, d in zip(range(self.top_sites), grown)]
+        if parent is not None:
+            # The parent's peak includes everything this stage reached
+            parent.peak_seen = max(parent.peak_seen, peak)
+        with self._lock:
+            stats = self._record(frame.path)
+            stats.calls += 1
+            stats.peak_bytes = max(stats.peak_bytes, peak - frame.start)
+            stats.retained_bytes += current - frame.start
+            if sites:
+                stats.top_sites = sites
+
+    def _record(self, path: str) -> StageStats:
+        stats = self._stats.get(path)
+        if stats is None:
+            stats = self._stats[path] = StageStats(path)
+        return stats
+
+    def report(self) -> List[StageStats]:
+        with self._lock:
+            return sorted(self._stats.values(), key=lambda s: s.peak_bytes, reverse=True)
+
+    def format_report(self) -> str:
+        lines = [f"{'stage':<32} {'calls':>5} {'unsampled':>9} {'peak':>10} {'retained':>10}"]
+        for s in self.report():
+            lines.append(
+                f"{s.stage:<32} {s.calls:>5} {s.unsampled:>9} "
+                f"{s.peak_bytes/1e6:>8.2f}MB {s.retained_bytes/1e6:>8.2f}MB"
+            )
+            lines.extend(f"    {site}" for site in s.top_sites)
+        return "\n".join(lines)
+
+    def write_json(self, fp: Path) -> None:
+        fp.write_text(json.dumps([asdict(s) for s in self.report()], indent=2), encoding="utf-8")
+
+
+def _source_lines(obj) -> range:
+    lines, start = inspect.getsourcelines(obj)
+    return range(start, start + len(lines))
+
+
+# Where the tracker allocates its own bookkeeping; left out of top_sites
+_OWN_LINES = frozenset(n for obj in (_Frame, AllocationTracker) for n in _source_lines(obj))
+
+
+def _bookkeeping(frame: tracemalloc.Frame) -> bool:
+    return frame.filename == __file__ and frame.lineno in _OWN_LINES
+
+
+class AllocationMiddleware:
+    """Pure ASGI middleware: every request runs in a stage named after its route.
+
+    The stage is opened with the raw path and relabelled with the route
+    template once routing has run, so ``/jobs/<id>`` requests share one row.
+
+    ``GET <path>`` returns the per-route table (401 if ``authorize(scope)``
+    is given and returns False). Snapshots are off by default
+    (``top_sites=0``) because taking one per request is expensive.
+    """
+
+    def __init__(
+        self,
+        app,
+        tracker: Optional[AllocationTracker] = None,
+        path: str = "/admin/allocations",
+        authorize: Optional[Authorize] = None,
+    ) -> None:
+        self.app = app
+        self.tracker = tracker or AllocationTracker(top_sites=0)
+        self.path = path
+        self.authorize = authorize
+        self.tracker.start()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope.get("path") == self.path and scope.get("method") == "GET":
+            if self.authorize is not None and not self.authorize(scope):
+                await send_unauthorized(send)
+                return
+            body = json.dumps([asdict(s) for s in self.tracker.report()]).encode("utf-8")
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        with self.tracker.stage(route_key(scope)) as frame:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if frame is not None:
+                    frame.path = route_key(scope)
+
+
+def install_from_env(
+    app,
+    env: str = "ALLOC_TRACKING",
+    authorize: Optional[Authorize] = None,
+) -> Optional[AllocationTracker]:
+    """``ALLOC_TRACKING`` unset or ``0`` -> off; otherwise adds ``AllocationMiddleware``.
+
+    ``authorize`` guards ``/admin/allocations``. Returns the tracker.
+    """
+    if os.getenv(env, "").strip() in ("", "0"):
+        return None
+    tracker = AllocationTracker(top_sites=0)
+    app.add_middleware(AllocationMiddleware, tracker=tracker, authorize=authorize)
+    return tracker
+
+
+def main():
+    print("-- allocation attribution by stage (contextvars + tracemalloc) --")
+    keep: List[bytes] = []
+
+    def extract() -> None:
+        keep.append(bytes(2_000_000))  # retained 2MB
+
+    def transform() -> None:
+        scratch = [bytes(1024) for _ in range(5_000)]  # ~5MB peak, freed
+        with tracker.stage("dedupe"):
+            keep.append(bytes(500_000))
+        del scratch
+
+    with AllocationTracker() as tracker:
+        with tracker.stage("pipeline"):
+            with tracker.stage("extract"):
+                extract()
+            with tracker.stage("transform"):
+                transform()
+        print(tracker.format_report())
+
+    print("-- 3 overlapping requests: one attributed, two unsampled --")
+
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def call(mw, path: str) -> None:
+        async def send(message):
+            pass
+
+        await mw({"type": "http", "method": "GET", "path": path}, None, send)
+
+    async def burst() -> None:
+        mw = AllocationMiddleware(app, AllocationTracker(top_sites=0))
+        await asyncio.gather(*(call(mw, "/report") for _ in range(3)))
+        await call(mw, "/report")
+        print(mw.tracker.format_report())
+        mw.tracker.stop()
+
+    asyncio.run(burst())
+
+
+if __name__ == "__main__":
+    main()
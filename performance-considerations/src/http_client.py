@@ -0,0 +1,514 @@
+"""Shared outbound HTTP client: keep-alive pools, deadlines and GET coalescing.
+
+The fix for ``pitfalls.blocking_call_demo`` and for opening a new client per
+request. One ``HTTPClient`` per process:
+
+- keeps a pool of keep-alive connections per (scheme, host, port)
+- enforces separate connect, read and total deadlines (``Timeouts``)
+- coalesces concurrent identical GETs into one upstream request
+- works from sync code (``get``/``request``) and async code (``aget``/``arequest``)
+  without blocking the event loop
+- uses httpx (HTTP/2 when ``h2`` is installed) if available, else the stdlib
+
+``StubServer`` is a tiny local HTTP server for offline tests and demos.
+
+Run the demo (offline, against the stub server):
+  python performance-considerations/src/http_client.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures as cf
+import http.client
+import json
+import socket
+import ssl
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import httpx  # type: ignore
+except ImportError:  # stdlib transport only
+    httpx = None  # type: ignore
+
+try:
+    import h2  # type: ignore  # noqa: F401
+
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
+
+class ConnectTimeout(TimeoutError):
+    pass
+
+
+class ReadTimeout(TimeoutError):
+    pass
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, response: "Response") -> None:
+        super().__init__(f"HTTP {response.status} from {response.url}")
+        self.response = response
+
+
+@dataclass(frozen=True)
+class Timeouts:
+    connect: float = 2.0
+    read: float = 5.0
+    total: float = 10.0
+
+
+@dataclass(frozen=True)
+class Response:
+    # Coalesced GETs hand the same instance to every caller; treat as read-only.
+    url: str
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    http_version: str = "HTTP/1.1"
+
+    def json(self):
+        return json.loads(self.body)
+
+    def raise_for_status(self) -> "Response":
+        if self.status >= 400:
+            raise HTTPStatusError(self)
+        return self
+
+
+class _Deadline:
+    def __init__(self, total: float) -> None:
+        self.expires = time.monotonic() + total
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    def cap(self, timeout: float) -> float:
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("total deadline exceeded")
+        return min(timeout, remaining)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_PoolKey = Tuple[str, str, int]
+_STALE = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+_IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class _HostPool:
+    """Idle keep-alive connections for one origin, bounded by ``maxsize``."""
+
+    def __init__(self, key: _PoolKey, maxsize: int, ssl_context: Optional[ssl.SSLContext]) -> None:
+        self.key = key
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxsize)
+        self._ssl_context = ssl_context
+        self.opened = 0
+
+    def acquire(self, deadline: _Deadline) -> http.client.HTTPConnection:
+        if not self._slots.acquire(timeout=max(deadline.remaining(), 0)):
+            raise DeadlineExceeded(f"no free connection to {self.key[1]}:{self.key[2]}")
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self.opened += 1
+        scheme, host, port = self.key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port)
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class _StdlibTransport:
+    http_version = "HTTP/1.1"
+
+    def __init__(self, max_per_host: int, ssl_context: Optional[ssl.SSLContext]) -> None:
+        self._max_per_host = max_per_host
+        self._ssl_context = ssl_context or ssl.create_default_context()
+        self._pools: Dict[_PoolKey, _HostPool] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, key: _PoolKey) -> _HostPool:
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = _HostPool(key, self._max_per_host, self._ssl_context)
+            return pool
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{s}://{h}:{p}": pool.opened for (s, h, p), pool in self._pools.items()}
+
+    def send(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes],
+             timeouts: Timeouts, deadline: _Deadline) -> Response:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        pool = self._pool((scheme, parts.hostname or "", port))
+
+        conn = pool.acquire(deadline)
+        reusable = False
+        try:
+            for attempt in (0, 1):
+                fresh = conn.sock is None
+                try:
+                    if fresh:
+                        conn.timeout = deadline.cap(timeouts.connect)
+                        self._timed(conn.connect, ConnectTimeout, deadline)
+                        # Small request/response pairs on a reused socket stall on Nagle + delayed ACK
+                        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    conn.sock.settimeout(deadline.cap(timeouts.read))
+                    conn.request(method, target, body=body, headers=headers)
+                    resp = self._timed(conn.getresponse, ReadTimeout, deadline)
+                    break
+                except _STALE:
+                    # The server closed an idle keep-alive connection; retry once on a new one
+                    conn.close()
+                    if fresh or attempt or method not in _IDEMPOTENT:
+                        raise
+            chunks = []
+            while True:
+                conn.sock.settimeout(deadline.cap(timeouts.read))
+                chunk = self._timed(lambda: resp.read(65536), ReadTimeout, deadline)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            reusable = not resp.will_close
+            return Response(url, resp.status, dict(resp.getheaders()), b"".join(chunks), self.http_version)
+        finally:
+            pool.release(conn, reusable)
+
+    @staticmethod
+    def _timed(fn: Callable, exc: type, deadline: _Deadline):
+        try:
+            return fn()
+        except socket.timeout as e:
+            if deadline.expired():
+                raise DeadlineExceeded("total deadline exceeded") from e
+            raise exc(str(e)) from e
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+class _HttpxTransport:
+    def __init__(self, max_per_host: int, timeouts: Timeouts, ssl_context: Optional[ssl.SSLContext]) -> None:
+        self.http_version = "HTTP/2" if _HAS_H2 else "HTTP/1.1"
+        self._client = httpx.Client(
+            http2=_HAS_H2,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=max_per_host),
+            timeout=httpx.Timeout(timeouts.read, connect=timeouts.connect, pool=timeouts.total),
+            verify=ssl_context if ssl_context is not None else True,
+        )
+        self._opened: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._opened)
+
+    def _trace(self, url: str) -> Callable[[str, dict], None]:
+        """httpcore trace hook: counts the TCP connections opened for ``url``'s origin."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = f"{scheme}://{parts.hostname}:{parts.port or (443 if scheme == 'https' else 80)}"
+
+        def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                with self._lock:
+                    self._opened[key] += 1
+
+        return trace
+
+    def send(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes],
+             timeouts: Timeouts, deadline: _Deadline) -> Response:
+        timeout = httpx.Timeout(
+            deadline.cap(timeouts.read),
+            connect=deadline.cap(timeouts.connect),
+            pool=deadline.cap(timeouts.total),
+        )
+        try:
+            with self._client.stream(method, url, headers=headers, content=body, timeout=timeout,
+                                     extensions={"trace": self._trace(url)}) as r:
+                chunks = []
+                for chunk in r.iter_bytes():
+                    chunks.append(chunk)
+                    if deadline.expired():
+                        raise DeadlineExceeded("total deadline exceeded")
+                return Response(url, r.status_code, dict(r.headers), b"".join(chunks), r.http_version)
+        except httpx.ConnectTimeout as e:
+            raise ConnectTimeout(str(e)) from e
+        except httpx.TimeoutException as e:
+            if deadline.expired():
+                raise DeadlineExceeded("total deadline exceeded") from e
+            raise ReadTimeout(str(e)) from e
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class HTTPClient:
+    """Process-wide outbound client. Thread-safe; share one instance."""
+
+    def __init__(
+        self,
+        timeouts: Timeouts = Timeouts(),
+        max_per_host: int = 10,
+        coalesce: bool = True,
+        transport: str = "auto",
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        if transport not in ("auto", "httpx", "stdlib"):
+            raise ValueError("transport must be 'auto', 'httpx' or 'stdlib'")
+        if transport == "httpx" or (transport == "auto" and httpx is not None):
+            if httpx is None:
+                raise RuntimeError("httpx not installed")
+            self._transport = _HttpxTransport(max_per_host, timeouts, ssl_context)
+        else:
+            self._transport = _StdlibTransport(max_per_host, ssl_context)
+        self.timeouts = timeouts
+        self.coalesce = coalesce
+        self._inflight: Dict[tuple, cf.Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._executor: Optional[cf.ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._max_workers = max_per_host * 4
+        self.coalesced = 0
+
+    # --- sync API ---
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                body: Optional[bytes] = None, timeouts: Optional[Timeouts] = None) -> Response:
+        t = timeouts or self.timeouts
+        return self._transport.send(method, url, dict(headers or {}), body, t, _Deadline(t.total))
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeouts: Optional[Timeouts] = None) -> Response:
+        if not self.coalesce:
+            return self.request("GET", url, headers, timeouts=timeouts)
+        key = self._key(url, headers)
+        fut, leader = self._join(key)
+        if leader:
+            self._complete(key, fut, lambda: self.request("GET", url, headers, timeouts=timeouts))
+        return fut.result()
+
+    # --- async API ---
+    async def arequest(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                       body: Optional[bytes] = None, timeouts: Optional[Timeouts] = None) -> Response:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool_executor(), lambda: self.request(method, url, headers, body, timeouts)
+        )
+
+    async def aget(self, url: str, headers: Optional[Dict[str, str]] = None,
+                   timeouts: Optional[Timeouts] = None) -> Response:
+        if not self.coalesce:
+            return await self.arequest("GET", url, headers, timeouts=timeouts)
+        key = self._key(url, headers)
+        fut, leader = self._join(key)
+        if leader:
+            fetch = lambda: self.request("GET", url, headers, timeouts=timeouts)  # noqa: E731
+            self._pool_executor().submit(self._complete, key, fut, fetch)
+        # Followers wait on the leader's future without holding a thread. Each
+        # caller awaits its own wrapper, shielded, so cancelling one caller
+        # leaves the shared future to the others.
+        return await asyncio.shield(asyncio.wrap_future(fut))
+
+    # --- coalescing ---
+    @staticmethod
+    def _key(url: str, headers: Optional[Dict[str, str]]) -> tuple:
+        return (url, tuple(sorted((k.lower(), v) for k, v in (headers or {}).items())))
+
+    def _join(self, key: tuple) -> Tuple[cf.Future, bool]:
+        with self._inflight_lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut, False
+            fut = self._inflight[key] = cf.Future()
+            return fut, True
+
+    def _complete(self, key: tuple, fut: cf.Future, fetch: Callable[[], Response]) -> None:
+        try:
+            result = fetch()
+        except BaseException as e:
+            self._forget(key)
+            fut.set_exception(e)
+        else:
+            self._forget(key)
+            fut.set_result(result)
+
+    def _forget(self, key: tuple) -> None:
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+
+    # --- lifecycle ---
+    def _pool_executor(self) -> cf.ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = cf.ThreadPoolExecutor(self._max_workers, thread_name_prefix="http-client")
+            return self._executor
+
+    def connections_opened(self) -> Dict[str, int]:
+        return self._transport.stats()
+
+    def close(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self._transport.close()
+
+    def __enter__(self) -> "HTTPClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# --- offline stub server ---
+@dataclass
+class StubRoute:
+    body: bytes = b"{}"
+    status: int = 200
+    delay: float = 0.0
+    content_type: str = "application/json"
+
+
+@dataclass
+class StubServer:
+    """Local HTTP/1.1 keep-alive server on 127.0.0.1 with canned routes."""
+
+    routes: Dict[str, StubRoute] = field(default_factory=dict)
+    hits: Counter = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        stub = self
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _handle(self) -> None:
+                path = self.path.split("?", 1)[0]
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with lock:
+                    stub.hits[path] += 1
+                route = stub.routes.get(path, StubRoute(b'{"detail":"not found"}', 404))
+                if route.delay:
+                    time.sleep(route.delay)
+                try:
+                    self.send_response(route.status)
+                    self.send_header("Content-Type", route.content_type)
+                    self.send_header("Content-Length", str(len(route.body)))
+                    self.end_headers()
+                    self.wfile.write(route.body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (timeout demo)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    print("-- shared HTTP client (offline stub server) --")
+    routes = {
+        "/catalog": StubRoute(b'{"items": [1, 2, 3]}'),
+        "/slow": StubRoute(b"{}", delay=0.3),
+    }
+    with StubServer(routes) as stub, HTTPClient(Timeouts(connect=0.5, read=1.0, total=2.0)) as client:
+        n = 200
+        t0 = time.perf_counter()
+        for _ in range(n):
+            conn = http.client.HTTPConnection("127.0.0.1", int(stub.url.rsplit(":", 1)[1]), timeout=1)
+            conn.request("GET", "/catalog")
+            conn.getresponse().read()
+            conn.close()
+        t1 = time.perf_counter()
+        for _ in range(n):
+            client.request("GET", f"{stub.url}/catalog").raise_for_status()
+        t2 = time.perf_counter()
+        print(f"{n} GETs: new connection each={t1-t0:.3f}s, pooled keep-alive={t2-t1:.3f}s")
+        print(f"  connections opened by pooled client: {client.connections_opened()}")
+
+        stub.hits.clear()
+        with cf.ThreadPoolExecutor(20) as ex:
+            list(ex.map(lambda _: client.get(f"{stub.url}/slow"), range(20)))
+        print(f"Coalescing (sync): 20 concurrent GET /slow -> {stub.hits['/slow']} upstream request(s)")
+
+        async def fan_out():
+            return await asyncio.gather(*(client.aget(f"{stub.url}/slow") for _ in range(50)))
+
+        stub.hits.clear()
+        t0 = time.perf_counter()
+        asyncio.run(fan_out())
+        print(
+            f"Coalescing (async): 50 concurrent GET /slow -> {stub.hits['/slow']} upstream "
+            f"request(s) in {time.perf_counter()-t0:.2f}s"
+        )
+
+        try:
+            client.request("GET", f"{stub.url}/slow", timeouts=Timeouts(connect=0.5, read=0.1, total=2.0))
+        except ReadTimeout as e:
+            print(f"Read deadline (0.1s) on 0.3s route: {type(e).__name__}")
+
+
+if __name__ == "__main__":
+    main()
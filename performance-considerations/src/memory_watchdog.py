@@ -0,0 +1,306 @@
+"""In-process memory watchdog built on tracemalloc snapshot diffs.
+
+Periodically snapshots traced allocations, diffs them against the previous
+snapshot and reports the allocation sites that grew the most (with
+tracebacks). Sites that keep growing across consecutive checks are flagged as
+suspected leaks.
+
+Overhead is kept low by duty-cycling: with ``duty_cycle < 1`` tracemalloc is
+only enabled for a short window of every interval, so the report shows the
+allocations made during that window that are still alive at its end.
+
+Usage:
+  - Background thread: ``MemoryWatchdog(interval=30).start()``
+  - ASGI/FastAPI: ``app.add_middleware(MemoryWatchdogMiddleware, watchdog=wd)``
+
+Run the demo (feeds ``pitfalls.memory_growth`` and reports the leaking line):
+  python performance-considerations/src/memory_watchdog.py
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from request_profiling import Authorize, send_unauthorized
+
+
+@dataclass
+class GrowthSite:
+    size_diff: int
+    count_diff: int
+    size: int
+    traceback: List[str]
+    streak: int = 1  # consecutive reports this site has grown in
+    # Frames are oldest first, so traceback[-1] is the allocating line
+
+
+@dataclass
+class WatchdogReport:
+    taken_at: float
+    traced_current: int
+    traced_peak: int
+    sites: List[GrowthSite] = field(default_factory=list)
+
+    def suspected_leaks(self, min_streak: int = 3) -> List[GrowthSite]:
+        return [s for s in self.sites if s.streak >= min_streak]
+
+    def format(self, limit: int = 5) -> str:
+        lines = [
+            f"traced current={self.traced_current/1e6:.2f}MB peak={self.traced_peak/1e6:.2f}MB"
+        ]
+        for s in self.sites[:limit]:
+            lines.append(
+                f"  +{s.size_diff/1024:.1f}KiB (+{s.count_diff} blocks, streak={s.streak})"
+            )
+            lines.extend(f"      {frame}" for frame in s.traceback)
+        return "\n".join(lines)
+
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryWatchdog:
+    """Collect tracemalloc growth reports on demand or from a daemon thread.
+
+    ``duty_cycle=1.0`` keeps tracing on and diffs consecutive snapshots.
+    ``duty_cycle<1.0`` traces only ``interval * duty_cycle`` seconds per cycle.
+    """
+
+    def __init__(
+        self,
+        interval: float = 30.0,
+        top_n: int = 10,
+        frames: int = 5,
+        duty_cycle: float = 1.0,
+        min_growth: int = 1024,
+        history: int = 20,
+        on_report: Optional[Callable[[WatchdogReport], None]] = None,
+    ) -> None:
+        if not 0.0 < duty_cycle <= 1.0:
+            raise ValueError("duty_cycle must be in (0, 1]")
+        self.interval = interval
+        self.top_n = top_n
+        self.frames = frames
+        self.duty_cycle = duty_cycle
+        self.min_growth = min_growth
+        self.on_report = on_report
+        self.reports: Deque[WatchdogReport] = deque(maxlen=history)
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._streaks: Dict[tuple, int] = {}
+        self._owns_tracing = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # --- tracing control ---
+    def _start_tracing(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns_tracing = True
+
+    def _stop_tracing(self) -> None:
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    # --- checks ---
+    def check(self) -> Optional[WatchdogReport]:
+        """Diff against the previous snapshot (continuous mode).
+
+        The first call only records a baseline and returns None.
+        """
+        with self._lock:
+            self._start_tracing()
+            current = self._snapshot()
+            previous, self._previous = self._previous, current
+            if previous is None:
+                return None
+            stats = current.compare_to(previous, "traceback")
+            return self._record(stats, tracemalloc.get_traced_memory())
+
+    def check_window(self, window: float) -> WatchdogReport:
+        """Trace for ``window`` seconds only and report what survived it."""
+        with self._lock:
+            was_tracing = tracemalloc.is_tracing()
+            if was_tracing:
+                baseline = self._snapshot()
+            else:
+                tracemalloc.start(self.frames)
+                baseline = None
+            try:
+                self._stop.wait(window)
+                current = self._snapshot()
+                traced = tracemalloc.get_traced_memory()
+            finally:
+                if not was_tracing:
+                    tracemalloc.stop()
+            if baseline is None:
+                stats = current.statistics("traceback")
+            else:
+                stats = current.compare_to(baseline, "traceback")
+            return self._record(stats, traced)
+
+    def _record(self, stats: list, traced: tuple[int, int]) -> WatchdogReport:
+        sites: List[GrowthSite] = []
+        streaks: Dict[tuple, int] = {}
+        for stat in stats:
+            size_diff = getattr(stat, "size_diff", stat.size)
+            if size_diff < self.min_growth:
+                continue
+            key = tuple((f.filename, f.lineno) for f in stat.traceback)
+            streaks[key] = self._streaks.get(key, 0) + 1
+            if len(sites) < self.top_n:
+                sites.append(
+                    GrowthSite(
+                        size_diff=size_diff,
+                        count_diff=getattr(stat, "count_diff", stat.count),
+                        size=stat.size,
+                        traceback=[f"{f.filename}:{f.lineno}" for f in stat.traceback],
+                        streak=streaks[key],
+                    )
+                )
+        # Sites that stopped growing lose their streak
+        self._streaks = streaks
+        report = WatchdogReport(time.time(), traced[0], traced[1], sites)
+        self.reports.append(report)
+        if self.on_report is not None:
+            self.on_report(report)
+        return report
+
+    # --- background thread ---
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if self.duty_cycle >= 1.0:
+                self.check()
+                self._stop.wait(self.interval)
+            else:
+                window = self.interval * self.duty_cycle
+                self.check_window(window)
+                self._stop.wait(self.interval - window)
+
+    def start(self) -> "MemoryWatchdog":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="memory-watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._previous = None
+            self._stop_tracing()
+
+    def latest(self) -> Optional[WatchdogReport]:
+        return self.reports[-1] if self.reports else None
+
+
+class MemoryWatchdogMiddleware:
+    """Pure ASGI middleware: starts the watchdog with the app and serves reports.
+
+    Works with FastAPI/Starlette via ``app.add_middleware`` and with any other
+    ASGI app by wrapping it directly. ``GET <path>`` returns the latest reports
+    as JSON (401 if ``authorize(scope)`` is given and returns False); every
+    other request passes through untouched.
+    """
+
+    def __init__(
+        self,
+        app,
+        watchdog: Optional[MemoryWatchdog] = None,
+        path: str = "/admin/memory",
+        authorize: Optional[Authorize] = None,
+    ) -> None:
+        self.app = app
+        self.watchdog = watchdog or MemoryWatchdog()
+        self.path = path
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(scope, receive, send)
+            return
+        if scope["type"] == "http":
+            self.watchdog.start()  # idempotent; covers servers without lifespan
+            if scope.get("path") == self.path and scope.get("method") == "GET":
+                if self.authorize is not None and not self.authorize(scope):
+                    await send_unauthorized(send)
+                    return
+                await self._serve_reports(send)
+                return
+        await self.app(scope, receive, send)
+
+    async def _lifespan(self, scope, receive, send) -> None:
+        async def wrapped_receive():
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.watchdog.start()
+            elif message["type"] == "lifespan.shutdown":
+                self.watchdog.stop()
+            return message
+
+        await self.app(scope, wrapped_receive, send)
+
+    async def _serve_reports(self, send) -> None:
+        body = json.dumps([asdict(r) for r in self.watchdog.reports]).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def main():
+    import pitfalls
+
+    print("-- memory watchdog (tracemalloc snapshot diffs) --")
+    wd = MemoryWatchdog(top_n=3, frames=3)
+    wd.check()  # baseline
+    for i in range(4):
+        pitfalls.memory_growth(500)
+        report = wd.check()
+        if report is not None:
+            print(f"check {i}:")
+            print(report.format(limit=1))
+    leaks = wd.latest().suspected_leaks() if wd.latest() else []
+    print(f"Suspected leaks (grew in >=3 consecutive checks): {len(leaks)}")
+    for s in leaks:
+        print(f"  {s.traceback[-1]} total={s.size/1024:.0f}KiB")
+    wd.stop()
+
+    print("-- duty-cycled window (tracing on for 0.2s only) --")
+    def leak_slowly():
+        for _ in range(5):
+            pitfalls.memory_growth(200)
+            time.sleep(0.02)
+
+    t = threading.Thread(target=leak_slowly)
+    wd = MemoryWatchdog(top_n=1, frames=3)
+    t.start()
+    print(wd.check_window(0.2).format(limit=1))
+    t.join()
+
+
+if __name__ == "__main__":
+    main()
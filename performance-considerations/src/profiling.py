@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import cProfile
+import io
 import pstats
 import timeit
 import tracemalloc
@@ -11,14 +12,21 @@ def work(n: int = 40000) -> int:
     return sum(i * i % 97 for i in range(n))
 
 
+def format_stats(*profilers: cProfile.Profile, limit: int = 10, sort: str = "cumulative") -> str:
+    """Render the top ``limit`` pstats rows for one or more merged profiles."""
+    out = io.StringIO()
+    stats = pstats.Stats(*profilers, stream=out).strip_dirs().sort_stats(sort)
+    stats.print_stats(limit)
+    return out.getvalue()
+
+
 def profile_work():
     print("-- cProfile + pstats --")
     profiler = cProfile.Profile()
     profiler.enable()
     _ = work(80_000)
     profiler.disable()
-    stats = pstats.Stats(profiler).strip_dirs().sort_stats("cumulative")
-    stats.print_stats(10)
+    print(format_stats(profiler, limit=10), end="")
 
 
 def timeit_work():
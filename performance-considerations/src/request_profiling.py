@@ -0,0 +1,318 @@
+"""Per-route request profiling middleware for the FastAPI apps.
+
+For a sampled fraction of requests, or any request carrying the debug header,
+the handler runs under cProfile or tracemalloc. The top-N report is stored per
+route template in a bounded ring buffer and served from an admin endpoint:
+
+  X-Debug-Profile: cprofile      -> pstats (same report as profiling.profile_work)
+  X-Debug-Profile: tracemalloc   -> top allocation lines during the request
+  GET /admin/request-profiles    -> {route: [recent profiles...]}
+
+Only one request is profiled at a time (cProfile and tracemalloc are process
+or thread global); concurrent requests simply are not sampled. For async
+handlers, coroutines of other requests interleaving on the event loop show up
+in the cProfile report too.
+
+Enable in an app (after routes are declared), with this folder on PYTHONPATH:
+  request_profiling.install_from_env(app)   # REQUEST_PROFILING=0.01 turns it on
+
+Run the demo (no FastAPI needed; drives a bare ASGI app):
+  python performance-considerations/src/request_profiling.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, List, Optional
+
+from profiling import format_stats
+
+MODES = ("cprofile", "tracemalloc")
+
+Authorize = Callable[[dict], bool]  # ASGI scope -> may this client use the debug/admin features?
+
+
+async def send_unauthorized(send) -> None:
+    await send({"type": "http.response.start", "status": 401,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"detail": "not authorized"}'})
+
+
+class _Capture:
+    """Profilers collected for one request (loop thread + any worker threads)."""
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def new_profile(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        return profile
+
+
+_active: ContextVar[Optional[_Capture]] = ContextVar("request_profile", default=None)
+
+# 3.12+ runs cProfile on sys.monitoring, which is interpreter-wide: the
+# middleware's profile already sees worker threads, and a second profile
+# cannot be enabled while it is on
+_PER_THREAD = sys.version_info < (3, 12)
+
+
+def route_key(scope) -> str:
+    """``"GET /jobs/{job_id}"`` once routed, else the raw path."""
+    # FastAPI/Starlette record the matched route in the shared scope dict
+    route = scope.get("route")
+    template = getattr(route, "path", None) or scope.get("path", "<unmatched>")
+    return f"{scope.get('method')} {template}"
+
+
+def profile_sync_endpoint(fn):
+    """Profile a sync endpoint inside the worker thread Starlette runs it on.
+
+    Before 3.12 cProfile only sees the thread that enabled it, so the
+    middleware alone misses ``def`` endpoints. The request's capture reaches
+    the worker thread through the copied contextvars context. On 3.12+ the
+    wrapper is a passthrough.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        capture = _active.get()
+        if not _PER_THREAD or capture is None or capture.mode != "cprofile":
+            return fn(*args, **kwargs)
+        profile = capture.new_profile()
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    return wrapper
+
+
+class ProfileStore:
+    """Last ``per_route`` profiles for each route template."""
+
+    def __init__(self, per_route: int = 10) -> None:
+        self.per_route = per_route
+        self._routes: Dict[str, Deque[dict]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, record: dict) -> None:
+        with self._lock:
+            ring = self._routes.get(route)
+            if ring is None:
+                ring = self._routes[route] = deque(maxlen=self.per_route)
+            ring.append(record)
+
+    def snapshot(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            return {route: list(ring) for route, ring in self._routes.items()}
+
+
+class RequestProfilerMiddleware:
+    """Pure ASGI middleware; add with ``app.add_middleware`` or via ``install``.
+
+    Given ``authorize``, the admin endpoint answers 401 and the debug header
+    is ignored for requests it rejects (sampling still applies).
+    """
+
+    def __init__(
+        self,
+        app,
+        store: Optional[ProfileStore] = None,
+        sample_rate: float = 0.0,
+        mode: str = "cprofile",
+        top_n: int = 20,
+        header: str = "x-debug-profile",
+        path: str = "/admin/request-profiles",
+        authorize: Optional[Authorize] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.app = app
+        self.store = store or ProfileStore()
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.top_n = top_n
+        self.header = header.lower().encode("latin-1")
+        self.path = path
+        self.authorize = authorize
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope.get("path") == self.path and scope.get("method") == "GET":
+            if self.authorize is not None and not self.authorize(scope):
+                await send_unauthorized(send)
+                return
+            body = json.dumps(self.store.snapshot()).encode("utf-8")
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        mode = self._requested_mode(scope)
+        if mode is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profiled(mode, scope, receive, send)
+        finally:
+            self._busy.release()
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        for name, value in scope.get("headers", ()):
+            if name == self.header and (self.authorize is None or self.authorize(scope)):
+                requested = value.decode("latin-1").strip().lower()
+                return requested if requested in MODES else self.mode
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.mode
+        return None
+
+    async def _profiled(self, mode: str, scope, receive, send) -> None:
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        capture = _Capture(mode)
+        token = _active.set(capture)
+        owns_tracing = False
+        before = None
+        profile = None
+        if mode == "tracemalloc":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(1)
+                owns_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        else:
+            profile = capture.new_profile()
+            profile.enable()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - t0
+            _active.reset(token)
+            if profile is not None:
+                profile.disable()
+                report = format_stats(*capture.profiles, limit=self.top_n)
+                extra = {}
+            else:
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if owns_tracing:
+                    tracemalloc.stop()
+                stats = after.compare_to(before, "lineno")[: self.top_n]
+                report = "\n".join(str(s) for s in stats)
+                extra = {"peak_bytes": peak}
+            self.store.add(
+                route_key(scope),
+                {
+                    "at": time.time(),
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "mode": mode,
+                    "status": status["code"],
+                    "duration_ms": round(duration * 1000, 3),
+                    **extra,
+                    "report": report,
+                },
+            )
+
+
+def install(app, **kwargs) -> ProfileStore:
+    """Wrap sync endpoints of a FastAPI app and add the middleware.
+
+    Call after all routes are declared. Returns the shared ``ProfileStore``.
+    """
+    for route in getattr(app, "routes", ()) if _PER_THREAD else ():
+        dependant = getattr(route, "dependant", None)
+        call = getattr(dependant, "call", None)
+        if call is not None and not asyncio.iscoroutinefunction(call):
+            dependant.call = profile_sync_endpoint(call)
+    store = kwargs.pop("store", None) or ProfileStore()
+    app.add_middleware(RequestProfilerMiddleware, store=store, **kwargs)
+    return store
+
+
+def install_from_env(
+    app,
+    env: str = "REQUEST_PROFILING",
+    authorize: Optional[Authorize] = None,
+) -> Optional[ProfileStore]:
+    """``REQUEST_PROFILING`` unset or ``0`` -> off; otherwise the sample rate.
+
+    Once on, the debug header always triggers profiling (use ``1e-9`` for
+    header-only). ``authorize`` guards the admin endpoint and the debug
+    header; without it, keep them behind the gateway's auth.
+    """
+    value = os.getenv(env, "").strip()
+    if value in ("", "0"):
+        return None
+    return install(app, sample_rate=float(value), authorize=authorize)
+
+
+def main():
+    import profiling
+
+    print("-- per-route request profiling (bare ASGI app) --")
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/work":
+            profiling.work(200_000)
+        elif scope["path"] == "/alloc":
+            app.cache = [bytes(1024) for _ in range(2_000)]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    store = ProfileStore(per_route=3)
+    mw = RequestProfilerMiddleware(app, store=store, sample_rate=0.0, top_n=5)
+
+    async def call(path: str, mode: Optional[str] = None) -> bytes:
+        headers = [(b"x-debug-profile", mode.encode())] if mode else []
+        body = []
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        await mw({"type": "http", "method": "GET", "path": path, "headers": headers}, None, send)
+        return b"".join(body)
+
+    async def run():
+        await call("/work")  # not sampled: no header, sample_rate=0
+        for _ in range(5):
+            await call("/work", "cprofile")  # ring buffer keeps the last 3
+        await call("/alloc", "tracemalloc")
+        return json.loads(await call("/admin/request-profiles"))
+
+    profiles = asyncio.run(run())
+    for route, records in profiles.items():
+        print(f"{route}: {len(records)} stored, last took {records[-1]['duration_ms']}ms")
+    print(profiles["GET /work"][-1]["report"].strip().splitlines()[0])
+    print(f"/alloc peak: {profiles['GET /alloc'][-1]['peak_bytes']/1e6:.1f}MB, top line:")
+    print("  " + profiles["GET /alloc"][-1]["report"].splitlines()[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Low-overhead sampling profiler with flamegraph export.
+
+Unlike ``profiling.profile_work`` (cProfile instruments every call), a sampler
+thread wakes up ``hz`` times a second, grabs every thread's stack with
+``sys._current_frames()`` and counts identical stacks. Cost is proportional
+to the sample rate, not to how much code runs, so it can stay on in
+production.
+
+Exports:
+  - collapsed stacks (``a;b;c 42`` per line) for flamegraph.pl / inferno
+  - speedscope JSON (open in https://www.speedscope.app)
+
+Toggle in a running server with a signal (``install_signal_toggle``) or the
+``SamplingProfilerMiddleware`` admin endpoint. The server apps get both from
+``install_from_env`` below when ``SAMPLING_PROFILER`` is set to a sample rate
+in Hz.
+
+Run the demo (profiles ``profiling.work`` and reports the overhead):
+  python performance-considerations/src/sampling_profiler.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+from typing import Callable, Dict, List, Optional, Tuple
+
+_Stack = Tuple[CodeType, ...]
+
+
+class SamplingProfiler:
+    """Sample all thread stacks at ``hz`` from a daemon thread."""
+
+    def __init__(self, hz: float = 100.0, max_depth: int = 128) -> None:
+        if hz <= 0:
+            raise ValueError("hz must be positive")
+        self.hz = hz
+        self.max_depth = max_depth
+        self._stacks: Counter = Counter()  # (thread name, stack) -> samples
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.sampling_time = 0.0  # seconds spent inside _sample()
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "SamplingProfiler":
+        if not self.running:
+            self._stop.clear()
+            self.started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._loop, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self.started_at is not None:
+            self.elapsed += time.perf_counter() - self.started_at
+            self.started_at = None
+
+    def toggle(self) -> bool:
+        """Start if stopped, stop if running. Returns the new running state."""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+        return self.running
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.sampling_time = 0.0
+            self.elapsed = 0.0
+
+    def overhead(self) -> float:
+        """Fraction of wall time the sampler thread spent collecting stacks."""
+        elapsed = self.elapsed
+        if self.started_at is not None:
+            elapsed += time.perf_counter() - self.started_at
+        return self.sampling_time / elapsed if elapsed else 0.0
+
+    # --- sampling ---
+    def _loop(self) -> None:
+        interval = 1.0 / self.hz
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            self._sample()
+            t1 = time.perf_counter()
+            self.sampling_time += t1 - t0
+            next_at += interval
+            if next_at < t1:  # fell behind (e.g. GIL contention); don't burst to catch up
+                next_at = t1
+            self._stop.wait(next_at - t1)
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        frames = sys._current_frames()
+        stacks: List[Tuple[str, _Stack]] = []
+        frame = f = None
+        for ident, frame in frames.items():
+            if ident == me:
+                continue
+            codes = []
+            f = frame
+            while f is not None and len(codes) < self.max_depth:
+                codes.append(f.f_code)
+                f = f.f_back
+            codes.reverse()
+            stacks.append((self._thread_name(ident), tuple(codes)))
+        del frames, frame, f  # never keep frames (and their locals) alive
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate() if t.ident}
+            name = self._thread_names.get(ident, f"thread-{ident}")
+        return name
+
+    # --- export ---
+    @staticmethod
+    def _frame_label(code: CodeType) -> str:
+        return f"{Path(code.co_filename).name}:{code.co_name}:{code.co_firstlineno}"
+
+    def folded(self) -> Dict[str, int]:
+        """Collapsed stacks: ``thread;root;...;leaf`` -> sample count."""
+        with self._lock:
+            items = list(self._stacks.items())
+        out: Counter = Counter()
+        for (thread, stack), count in items:
+            out[";".join([thread, *(self._frame_label(c) for c in stack)])] += count
+        return dict(out)
+
+    def collapsed_text(self) -> str:
+        lines = [f"{stack} {count}" for stack, count in sorted(self.folded().items())]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(self, name: str = "sampling profile") -> dict:
+        with self._lock:
+            items = list(self._stacks.items())
+        frame_index: Dict[CodeType, int] = {}
+        frames: List[dict] = []
+        per_thread: Dict[str, Tuple[List[List[int]], List[int]]] = {}
+        for (thread, stack), count in items:
+            idx = []
+            for code in stack:
+                i = frame_index.get(code)
+                if i is None:
+                    i = frame_index[code] = len(frames)
+                    frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+                idx.append(i)
+            samples, weights = per_thread.setdefault(thread, ([], []))
+            samples.append(idx)
+            weights.append(count)
+        profiles = [
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "none",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+            for thread, (samples, weights) in sorted(per_thread.items())
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "sampling_profiler.py",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def write(self, out_dir: Path, stem: str = "profile") -> Tuple[Path, Path]:
+        """Write ``<stem>.collapsed`` and ``<stem>.speedscope.json``."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        collapsed_fp = out_dir / f"{stem}.collapsed"
+        speedscope_fp = out_dir / f"{stem}.speedscope.json"
+        collapsed_fp.write_text(self.collapsed_text(), encoding="utf-8")
+        with speedscope_fp.open("w", encoding="utf-8") as f:
+            json.dump(self.speedscope(stem), f)
+        return collapsed_fp, speedscope_fp
+
+
+def install_signal_toggle(profiler: SamplingProfiler, out_dir: Path, signum: Optional[int] = None) -> None:
+    """``kill -USR2 <pid>`` starts sampling; the next one stops and writes files.
+
+    POSIX only; call from the main thread.
+    """
+    if signum is None:
+        signum = signal.SIGUSR2
+
+    def handler(_signum, _frame):
+        if profiler.toggle():
+            print(f"[profiler] sampling at {profiler.hz:g}Hz", file=sys.stderr)
+        else:
+            stem = f"profile-{os.getpid()}-{int(time.time())}"
+            paths = profiler.write(out_dir, stem)
+            profiler.clear()
+            print(f"[profiler] wrote {paths[0]} and {paths[1]}", file=sys.stderr)
+
+    signal.signal(signum, handler)
+
+
+class SamplingProfilerMiddleware:
+    """Pure ASGI admin endpoint for toggling the profiler and fetching results.
+
+    - ``POST <path>/start`` / ``POST <path>/stop`` / ``POST <path>/clear``
+    - ``GET <path>`` status, ``GET <path>/collapsed``, ``GET <path>/speedscope``
+
+    ``authorize(scope)`` returning False answers 401.
+    """
+
+    def __init__(
+        self,
+        app,
+        profiler: Optional[SamplingProfiler] = None,
+        path: str = "/admin/profiler",
+        authorize: Optional[Callable[[dict], bool]] = None,
+    ) -> None:
+        self.app = app
+        self.profiler = profiler or SamplingProfiler()
+        self.path = path.rstrip("/")
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not (path == self.path or path.startswith(self.path + "/")):
+            await self.app(scope, receive, send)
+            return
+        if self.authorize is not None and not self.authorize(scope):
+            await self._send(send, 401, {"detail": "not authorized"})
+            return
+        action = path[len(self.path):].strip("/")
+        method = scope.get("method")
+        p = self.profiler
+        if method == "POST" and action in ("start", "stop", "clear"):
+            getattr(p, action)()
+            await self._send(send, 200, self._status())
+        elif method == "GET" and action == "":
+            await self._send(send, 200, self._status())
+        elif method == "GET" and action == "collapsed":
+            await self._send(send, 200, p.collapsed_text().encode("utf-8"), b"text/plain; charset=utf-8")
+        elif method == "GET" and action == "speedscope":
+            await self._send(send, 200, p.speedscope())
+        else:
+            await self._send(send, 404, {"detail": "Not found"})
+
+    def _status(self) -> dict:
+        p = self.profiler
+        return {"running": p.running, "hz": p.hz, "samples": p.samples, "overhead": round(p.overhead(), 5)}
+
+    @staticmethod
+    async def _send(send, status: int, body, content_type: bytes = b"application/json") -> None:
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def install_from_env(
+    app,
+    env: str = "SAMPLING_PROFILER",
+    dir_env: str = "SAMPLING_PROFILER_DIR",
+    authorize: Optional[Callable[[dict], bool]] = None,
+) -> Optional[SamplingProfiler]:
+    """``SAMPLING_PROFILER`` unset or ``0`` -> off; otherwise the sample rate in Hz.
+
+    Adds ``SamplingProfilerMiddleware`` and, from the main thread on POSIX,
+    the ``SIGUSR2`` toggle writing to ``$SAMPLING_PROFILER_DIR`` (default
+    ``/tmp/sampling-profiler``). The profiler starts idle.
+    """
+    value = os.getenv(env, "").strip()
+    if value in ("", "0"):
+        return None
+    profiler = SamplingProfiler(hz=float(value))
+    if hasattr(signal, "SIGUSR2") and threading.current_thread() is threading.main_thread():
+        install_signal_toggle(profiler, Path(os.getenv(dir_env, "/tmp/sampling-profiler")))
+    app.add_middleware(SamplingProfilerMiddleware, profiler=profiler, authorize=authorize)
+    return profiler
+
+
+def main():
+    import profiling
+
+    print("-- sampling profiler (sys._current_frames) --")
+    rounds = 60
+
+    def run() -> float:
+        # best of 3 to keep scheduler noise out of a ~2% comparison
+        best = float("inf")
+        for _ in range(3):
+            t0 = time.perf_counter()
+            for _ in range(rounds):
+                profiling.work(200_000)
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    baseline = run()
+    profiler = SamplingProfiler(hz=100).start()
+    sampled = run()
+    profiler.stop()
+    print(f"work() x{rounds}: baseline={baseline:.3f}s, with 100Hz sampler={sampled:.3f}s")
+    print(
+        f"samples={profiler.samples}, sampler self-time={profiler.overhead():.3%} of wall, "
+        f"slowdown={(sampled - baseline) / baseline:+.2%}"
+    )
+    top = sorted(profiler.folded().items(), key=lambda kv: kv[1], reverse=True)[:3]
+    print("Top stacks:")
+    for stack, count in top:
+        print(f"  {count:4d}  {stack.split(';', 1)[1]}")
+
+    out_dir = Path("/tmp/sampling-profiler")
+    collapsed_fp, speedscope_fp = profiler.write(out_dir)
+    print(f"Wrote {collapsed_fp} (flamegraph.pl) and {speedscope_fp} (speedscope.app)")
+
+
+if __name__ == "__main__":
+    main()
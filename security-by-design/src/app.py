@@ -11,6 +11,15 @@ from pydantic import BaseModel
 # Local sibling imports (no package context needed)
 import auth_rbac
 
+# Opt-in profiling (REQUEST_PROFILING, SAMPLING_PROFILER, ALLOC_TRACKING): importable
+# when performance-considerations/src is on PYTHONPATH; see its README
+try:
+    import alloc_tracking
+    import request_profiling
+    import sampling_profiler
+except ImportError:
+    alloc_tracking = request_profiling = sampling_profiler = None  # type: ignore
+
 
 app = FastAPI(title="Security by Design Demo")
 
@@ -92,3 +101,19 @@ def search_safe(q: str):
     query = "SELECT id, name FROM items WHERE name LIKE ?"
     rows = conn.execute(query, (f"%{q}%",)).fetchall()
     return {"results": rows}
+
+
+def profiling_allowed(scope) -> bool:
+    """Same check as /admin/dashboard: a Bearer token of an admin user."""
+    authorization = dict(scope.get("headers", ())).get(b"authorization")
+    try:
+        return current_user_role(authorization.decode("latin-1") if authorization else None) == "admin"
+    except HTTPException:
+        return False
+
+
+if request_profiling is not None:
+    # The profiling admin endpoints and the X-Debug-Profile header are admin-only here
+    alloc_tracking.install_from_env(app, authorize=profiling_allowed)
+    sampling_profiler.install_from_env(app, authorize=profiling_allowed)
+    request_profiling.install_from_env(app, authorize=profiling_allowed)
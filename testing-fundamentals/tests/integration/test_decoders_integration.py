@@ -0,0 +1,65 @@
+"""Integration test: every JSON decoder gives clean_order the same orders.
+
+The decoders (stdlib json, orjson, msgspec) live in the data-engineering
+ingestion demo; orjson and msgspec are optional and skipped when missing.
+The lines mix JSON types the way real exports do.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[3]
+DEMO = ROOT / "data-engineering-and-ml-pipelines" / "ingestion-and-transformation"
+SCRIPT = DEMO / "ingest_transform.py"
+
+LINES = [
+    b'{"customer_id": 1, "amount": 10.5}',
+    b'{"customer_id": 1.0, "amount": 2}',
+    b'{"customer_id": "c-17", "amount": "7.25"}',
+    b'{"customer_id": 2, "amount": true}',
+    b'{"customer_id": 3, "amount": null, "note": {"gift": true}}',
+    b'{"amount": 4}',
+]
+EXPECTED = [("1", 10.5), ("1", 2.0), ("c-17", 7.25), ("2", 1.0), ("3", 0.0)]
+
+
+@pytest.fixture(scope="module")
+def ingest_transform():
+    """Load the demo, then drop it and its sibling modules from sys.modules."""
+    before = set(sys.modules)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(sys, "path", list(sys.path))  # the demo appends its folder
+        spec = importlib.util.spec_from_file_location("ingest_transform", SCRIPT)
+        assert spec and spec.loader, "Could not load the ingestion demo."
+        module = importlib.util.module_from_spec(spec)
+        mp.setitem(sys.modules, "ingest_transform", module)  # dataclasses look it up
+        spec.loader.exec_module(module)  # type: ignore[attr-defined]
+        yield module
+    for name in set(sys.modules) - before:
+        if Path(getattr(sys.modules[name], "__file__", None) or "").parent == DEMO:
+            del sys.modules[name]  # columnar, decoders, engines
+
+
+def orders(ingest_transform, rows):
+    return [o for o in map(ingest_transform.clean_order, rows) if o is not None]
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgspec"])
+def test_decoders_agree_on_mixed_types(ingest_transform, name):
+    decoders = ingest_transform.decoders
+    if name not in decoders.available():
+        pytest.skip(f"{name} not installed")
+    dec = decoders.get_decoder(name, "order")
+
+    assert orders(ingest_transform, dec.decode_lines(b"\n".join(LINES) + b"\n")) == EXPECTED
+    assert orders(ingest_transform, (dec.decode_line(line) for line in LINES)) == EXPECTED
+    assert orders(ingest_transform, dec.decode_document(b"[" + b",".join(LINES) + b"]")) == EXPECTED
+
+
+def test_decoder_names_cover_the_demo(ingest_transform):
+    assert set(ingest_transform.decoders.DECODERS) == {"json", "orjson", "msgspec"}
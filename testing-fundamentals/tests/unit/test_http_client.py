@@ -0,0 +1,48 @@
+"""Unit test: coalesced GETs in the shared HTTP client (performance-considerations).
+
+Runs offline against the module's own stub server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[3] / "performance-considerations" / "src" / "http_client.py"
+
+
+@pytest.fixture(scope="module")
+def http_client():
+    spec = importlib.util.spec_from_file_location("http_client", SRC)
+    assert spec and spec.loader
+    mod = importlib.util.module_from_spec(spec)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "http_client", mod)  # dataclasses look it up
+        spec.loader.exec_module(mod)  # type: ignore[attr-defined]
+        yield mod
+
+
+def test_cancelled_aget_leaves_coalesced_callers_their_response(http_client):
+    routes = {"/slow": http_client.StubRoute(b'{"ok": true}', delay=0.3)}
+    timeouts = http_client.Timeouts(connect=1.0, read=2.0, total=3.0)
+
+    async def scenario(client, url):
+        first = asyncio.create_task(client.aget(url))
+        second = asyncio.create_task(client.aget(url))
+        await asyncio.sleep(0.05)  # both joined the same in-flight GET
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, await client.aget(url)
+
+    with http_client.StubServer(routes) as stub, http_client.HTTPClient(timeouts, transport="stdlib") as client:
+        shared, later = asyncio.run(scenario(client, f"{stub.url}/slow"))
+
+        assert client.coalesced == 1
+        assert shared.status == 200 and shared.json() == {"ok": True}
+        assert later.status == 200
+        assert stub.hits["/slow"] == 2  # the shared GET, then the later one
@@ -0,0 +1,141 @@
+"""Unit test: retries, failure blocking and --resume in the DAG orchestrator.
+
+Runs simple_orchestrator's Orchestrator inline on small DAGs of plain
+functions, with the run state journaled to a temporary file.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[3]
+DEMO = ROOT / "data-engineering-and-ml-pipelines" / "orchestration"
+SCRIPT = DEMO / "simple_orchestrator.py"
+
+
+@pytest.fixture(scope="module")
+def orch():
+    """Load the orchestrator, then drop it and the demo modules it imported from sys.modules."""
+    before = set(sys.modules)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(sys, "path", [str(DEMO)] + sys.path)  # as when run as a script; it appends its siblings
+        spec = importlib.util.spec_from_file_location("simple_orchestrator", SCRIPT)
+        assert spec and spec.loader, "Could not load the orchestrator."
+        module = importlib.util.module_from_spec(spec)
+        mp.setitem(sys.modules, "simple_orchestrator", module)  # dataclasses look it up
+        spec.loader.exec_module(module)  # type: ignore[attr-defined]
+        yield module
+    for name in set(sys.modules) - before:
+        if ROOT in Path(getattr(sys.modules[name], "__file__", None) or "").parents:
+            del sys.modules[name]  # run_state, task_cache, ingest_transform, ...
+
+
+def statuses(orch, fp):
+    return {name: t["status"] for name, t in orch.RunState(fp).load()["tasks"].items()}
+
+
+def test_retried_failure_eventually_succeeds(orch, tmp_path):
+    calls = Counter()
+    loaded = []
+
+    def extract():
+        calls["extract"] += 1
+        if calls["extract"] < 3:
+            raise ConnectionError("source not reachable")
+        return [1, 2, 3]
+
+    def load(extract):
+        calls["load"] += 1
+        loaded.append(extract)
+
+    state = tmp_path / "run_state.jsonl"
+    tasks = [
+        orch.Task("extract", extract, retries=2, backoff=0.01),
+        orch.Task("load", load, deps=["extract"]),
+    ]
+    orch.Orchestrator(tasks, log_fp=None, state=orch.RunState(state)).run_all()
+
+    assert calls == {"extract": 3, "load": 1}
+    assert loaded == [[1, 2, 3]]
+    saved = orch.RunState(state).load()["tasks"]
+    assert saved["extract"]["status"] == "done" and saved["extract"]["attempts"] == 3
+
+
+def test_failed_task_blocks_only_its_descendants(orch, tmp_path):
+    calls = Counter()
+
+    def task(name, deps=(), retries=0):
+        def run():
+            calls[name] += 1
+            if name == "b":
+                raise ValueError("bad batch")
+
+        return orch.Task(name, run, deps=list(deps), retries=retries, backoff=0.01)
+
+    # a -> b -> c -> d, a -> e, and f on its own
+    tasks = [task("a"), task("b", ["a"], retries=1), task("c", ["b"]), task("d", ["c"]), task("e", ["a"]), task("f")]
+    state = tmp_path / "run_state.jsonl"
+    o = orch.Orchestrator(tasks, log_fp=None, state=orch.RunState(state))
+    with pytest.raises(RuntimeError, match=r"1 task\(s\) failed: b; not run: c, d"):
+        o.run_all()
+
+    assert calls == {"a": 1, "b": 2, "e": 1, "f": 1}
+    assert sorted(o.done) == ["a", "e", "f"]
+    assert statuses(orch, state) == {
+        "a": "done", "b": "failed", "c": "blocked", "d": "blocked", "e": "done", "f": "done"
+    }
+
+
+def test_resume_skips_done_tasks_but_reruns_a_needed_producer(orch, tmp_path, capsys):
+    calls = []
+    broken = {"b", "e"}
+    run = Counter()
+
+    def a():
+        calls.append("a")
+        return f"a from run {run['n']}"
+
+    def b(a):
+        calls.append("b")
+        if "b" in broken:
+            raise RuntimeError("b failed")
+        return a
+
+    def c():
+        calls.append("c")
+        return "c"
+
+    def e():  # runs after c, but does not take its result
+        calls.append("e")
+        if "e" in broken:
+            raise RuntimeError("e failed")
+
+    def tasks():
+        return [
+            orch.Task("a", a),
+            orch.Task("b", b, deps=["a"]),
+            orch.Task("c", c),
+            orch.Task("e", e, deps=["c"]),
+        ]
+
+    state = tmp_path / "run_state.jsonl"
+    run["n"] = 1
+    with pytest.raises(RuntimeError):
+        orch.Orchestrator(tasks(), log_fp=None, state=orch.RunState(state)).run_all()
+    assert statuses(orch, state) == {"a": "done", "b": "failed", "c": "done", "e": "failed"}
+
+    calls.clear()
+    broken.clear()
+    run["n"] = 2
+    resumed = orch.Orchestrator(tasks(), log_fp=None, state=orch.RunState(state), resume=True)
+    resumed.run_all()
+
+    assert calls == ["a", "b", "e"]  # c stays skipped; a runs again, as b takes its result
+    assert resumed.results["b"] == "a from run 2"
+    assert "RERUN a: done in run" in capsys.readouterr().out
+    assert set(statuses(orch, state).values()) == {"done"}
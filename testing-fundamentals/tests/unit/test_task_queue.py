@@ -0,0 +1,74 @@
+"""Unit test: lease expiry in the SQLite task queue (data-engineering orchestration).
+
+Uses a lease of a fraction of a second, so a worker that stops heartbeating
+loses its task after a short sleep.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[3] / "data-engineering-and-ml-pipelines" / "orchestration" / "task_queue.py"
+LEASE_S = 0.2
+
+
+@pytest.fixture(scope="module")
+def task_queue():
+    spec = importlib.util.spec_from_file_location("task_queue", SRC)
+    assert spec and spec.loader
+    mod = importlib.util.module_from_spec(spec)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "task_queue", mod)  # dataclasses look it up
+        spec.loader.exec_module(mod)  # type: ignore[attr-defined]
+        yield mod
+
+
+def task(name, deps=()):
+    return SimpleNamespace(name=name, deps=list(deps), resources=[], retries=0, backoff=1.0)
+
+
+@pytest.fixture
+def queue(task_queue, tmp_path):
+    q = task_queue.TaskQueue(tmp_path / "queue.sqlite", lease_s=LEASE_S)
+    yield q
+    q.close()
+
+
+def expire():
+    time.sleep(LEASE_S * 1.5)
+
+
+def test_expired_lease_is_leased_again_and_the_late_completion_ignored(queue):
+    queue.create([task("extract")], ["extract"])
+    first = queue.lease("w1")
+    assert first is not None and queue.lease("w2") is None  # held while the lease runs
+
+    expire()
+    second = queue.lease("w2")
+
+    assert second is not None and second.name == "extract"
+    assert second.token != first.token and second.attempt == 2
+    assert queue.complete(first, "ran", "late", None) is False
+    assert queue.complete(second, "ran", "on time", None) is True
+    assert queue.results(["extract"]) == {"extract": "on time"}
+    row = queue.rows()[0]
+    assert (row["state"], row["lost"], row["worker"]) == ("done", 1, "w2")
+
+
+def test_task_losing_its_lease_max_lost_times_fails_and_blocks_descendants(task_queue, queue):
+    queue.create([task("extract"), task("load", ["extract"]), task("report", ["load"])], ["extract", "load", "report"])
+    for _ in range(task_queue.MAX_LOST):
+        assert queue.lease("w1").name == "extract"
+        expire()
+
+    assert queue.lease("w2") is None
+    assert queue.counts() == {"failed": 1, "blocked": 2}
+    assert queue.finished()
+    failed = queue.rows()[0]
+    assert failed["state"] == "failed" and f"lost its lease {task_queue.MAX_LOST} times" in failed["error"]
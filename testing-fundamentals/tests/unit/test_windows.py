@@ -0,0 +1,142 @@
+"""Unit test: event-time windows (batch-vs-streaming/windows.py) against brute force.
+
+Feeds a random event stream to WindowEngine in random batches, through a
+JSON checkpoint and a fresh engine every few batches, and compares the
+windows it closed with ones summed directly from the events. Events of a
+customer arrive in time order, others up to ``DISORDER`` seconds out of
+order, within the lateness, so none is late.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import random
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[3] / "data-engineering-and-ml-pipelines" / "batch-vs-streaming" / "windows.py"
+LATENESS = 120.0
+DISORDER = 90
+GAP = 300
+SLIDE, SIZE = 60, 300
+
+
+@pytest.fixture(scope="module")
+def windows():
+    spec = importlib.util.spec_from_file_location("windows", SRC)
+    assert spec and spec.loader
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)  # type: ignore[attr-defined]
+    return mod
+
+
+def engine(windows):
+    return windows.WindowEngine(
+        [
+            windows.Tumbling("1m", 60),
+            windows.Tumbling("1h", 3600),
+            windows.Sliding("5m/1m", SIZE, SLIDE),
+            windows.Sessions("session", GAP),
+        ],
+        lateness=LATENESS,
+    )
+
+
+def stream(seed=11, customers=6, n=1200):
+    """(event time, event) pairs in arrival order."""
+    rnd = random.Random(seed)
+    t0 = 1_700_000_000
+    delay = {c: rnd.randint(0, DISORDER) for c in range(customers)}  # per customer, so each stays in order
+    arrivals = []
+    t = t0
+    for _ in range(n):
+        t += rnd.choice([0, 1, 5, 20, 45, 120, GAP, 400])  # GAP: sessions split only past it
+        cid = rnd.randrange(customers)
+        etype = rnd.choice(["order_placed", "order_placed", "order_refund", "page_view"])
+        evt = {"customer_id": cid, "event_type": etype, "ts": float(t)}
+        if etype != "page_view":
+            evt["amount"] = rnd.randint(1, 400) / 4 * (-1 if etype == "order_refund" else 1)
+        if rnd.random() < 0.2:
+            evt["ts"] = datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+        arrivals.append((t + delay[cid], len(arrivals), t, evt))
+    return [(t, evt) for _, _, t, evt in sorted(arrivals)]
+
+
+def iso(t):
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def row(name, start, end, events):
+    return {
+        "window": name,
+        "start": iso(start),
+        "end": iso(end),
+        "events": len(events),
+        "orders": sum(e["event_type"] == "order_placed" for e in events),
+        "refunds": sum(e["event_type"] == "order_refund" for e in events),
+        "revenue": round(sum(e.get("amount", 0) for e in events if e["event_type"] != "page_view"), 2),
+    }
+
+
+def reference(timed, watermark):
+    """Every window whose end the watermark passed, summed from the events."""
+    rows = []
+    for name, size in (("1m", 60), ("1h", 3600)):
+        by_start = defaultdict(list)
+        for t, evt in timed:
+            by_start[t - t % size].append(evt)
+        rows += [row(name, s, s + size, evts) for s, evts in by_start.items() if s + size <= watermark]
+
+    first = min(t for t, _ in timed)
+    for end in range(first - first % SLIDE + SLIDE, int(watermark // SLIDE) * SLIDE + 1, SLIDE):
+        evts = [evt for t, evt in timed if end - SIZE <= t < end]
+        if evts:
+            rows.append(row("5m/1m", end - SIZE, end, evts))
+            rows[-1]["orders_per_min"] = round(rows[-1]["orders"] * 60 / SIZE, 3)
+
+    by_key = defaultdict(list)
+    for t, evt in sorted(timed, key=lambda p: p[0]):
+        by_key[str(evt["customer_id"])].append((t, evt))
+    for key, timed_evts in by_key.items():
+        sessions = [[timed_evts[0]]]
+        for t, evt in timed_evts[1:]:
+            if t - sessions[-1][-1][0] > GAP:
+                sessions.append([])
+            sessions[-1].append((t, evt))
+        for i, s in enumerate(sessions):
+            if i < len(sessions) - 1 or s[-1][0] + GAP <= watermark:  # a later session closes it too
+                rows.append(row("session", s[0][0], s[-1][0] + GAP, [evt for _, evt in s]))
+                rows[-1]["key"] = key
+    return rows
+
+
+def ordered(rows):
+    return sorted(rows, key=lambda r: (r["window"], r["start"], r.get("key", "")))
+
+
+@pytest.mark.parametrize("seed", [11, 12, 13])
+def test_windows_match_brute_force_across_checkpoints(windows, seed):
+    timed = stream(seed)
+    events = [evt for _, evt in timed]
+    rnd = random.Random(seed)
+    eng = engine(windows)
+    rows = []
+    pos = batches = 0
+    while pos < len(events):
+        size = rnd.randint(1, 60)
+        rows += eng.process(events[pos : pos + size], now=0.0)
+        pos += size
+        batches += 1
+        if batches % 5 == 0:  # restart from a checkpoint, as after a crash
+            saved = json.loads(json.dumps(eng.to_dict()))
+            eng = engine(windows)
+            eng.load(saved)
+
+    watermark = max(t for t, _ in timed) - LATENESS
+    assert eng.watermark == watermark
+    assert eng.late == 0
+    assert ordered(rows) == ordered(reference(timed, watermark))